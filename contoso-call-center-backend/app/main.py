@@ -1,13 +1,24 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
-import psycopg
 import time
+
+APP_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
+from fastapi import Response as FastAPIResponse
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 import random
+import asyncio
 import base64
-from typing import Dict, List
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Union
 import uuid
+import json
 import os
+import re
+import tempfile
+from collections import deque
+from functools import partial
+from itertools import islice
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -15,19 +26,96 @@ load_dotenv()
 from .models import (
     CallGenerationRequest, 
     CallGenerationResponse, 
+    CallSearchResponse,
+    SessionCallsResponse,
     GeneratedCall, 
+    FailedCall,
+    CompandingType,
     TranscriptData,
     ScenarioType,
     SentimentType,
     DurationType
 )
-from .services import AudioGenerator, AzureBatchAudioGenerator, SyntheticDataGenerator
-from .services.azure_openai_generator import AzureOpenAITranscriptGenerator
+from .services.lazy_backend import LazyBackend
+from .services.parsed_transcript import gender_detector
+from .services.tracing import tracer
+from .services.audio_transcoder import AudioTranscoder, DELIVERY_FORMATS, variant_filename
+from .services.archive_streamer import ARCHIVE_FORMATS, ArchiveEntry, stream_archive
+from .services.artifact_catalog import ArtifactCatalog, ArtifactRecord
+from .services.artifact_layout import artifact_layout, new_artifact_id
+from .services.call_catalog import CallCatalog
+from .services.call_search import CallSearchIndex, decode_cursor, encode_cursor
+from .services.state_store import StoredBlob, create_state_store
+from .services.cancellation import (
+    GENERATION_LEASE_SECONDS, CancellationToken, GenerationCancelled, cancellable_sleep, cancellation_scope,
+    check_cancelled, generation_running
+)
+from .services.idempotency import IDEMPOTENCY_WAIT_SECONDS, IdempotencyConflict, IdempotencyRecords, request_fingerprint
+from .services.generation_admission import (
+    PRIORITY_WEIGHTS, AdmissionController, AdmissionRejected, CallScheduler, StageLimits
+)
+from .responses import artifact_response, json_response
+
+call_catalog = CallCatalog()
+call_search_index = CallSearchIndex()
+generation_admission = AdmissionController()
+stage_limits = StageLimits()
+call_scheduler = CallScheduler()
+
+startup_report: Dict = {'warmup': 'pending'}
+
+async def _warm_backends() -> None:
+    """Construct the generation backends in worker threads once the server is accepting requests."""
+    startup_report['warmup'] = 'running'
+    started = time.perf_counter()
+    backends = [transcript_generator, audio_generator, data_generator]
+    if USE_BATCH_AUDIO:
+        backends.append(batch_audio_generator)
+    
+    try:
+        for backend in backends:
+            await asyncio.to_thread(backend.warm)
+        await asyncio.to_thread(gender_detector)
+        startup_report['warmup'] = 'done'
+    except Exception as e:
+        startup_report['warmup'] = f"failed: {e}"
+    startup_report['warmup_seconds'] = round(time.perf_counter() - started, 3)
+    tracer.info("Backends warmed in %.2fs", startup_report['warmup_seconds'])
+
+def _backfill_artifact_catalog() -> None:
+    """Catalog artifacts written before the catalog existed, once, when it is first created."""
+    if not artifact_catalog.is_empty():
+        return
+    imported = (artifact_catalog.import_directory(AUDIO_DIR, 'audio', 'wav', 'wav')
+                + artifact_catalog.import_directory(TRANSCRIPT_DIR, 'transcript', 'txt', 'txt'))
+    if imported:
+        tracer.info("Imported %d existing artifacts into the catalog", imported)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup_report['app_import_seconds'] = round(APP_IMPORT_READY - APP_IMPORT_STARTED, 3)
+    await call_catalog.open()
+    await asyncio.to_thread(_backfill_artifact_catalog)
+    startup_report['startup_seconds'] = round(time.perf_counter() - APP_IMPORT_STARTED, 3)
+    tracer.info("App imported in %.2fs, ready after %.2fs", startup_report['app_import_seconds'], startup_report['startup_seconds'])
+    
+    warm_task = None
+    if WARM_BACKENDS:
+        warm_task = asyncio.create_task(_warm_backends())
+    else:
+        startup_report['warmup'] = 'disabled'
+    
+    yield
+    
+    if warm_task and not warm_task.done():
+        warm_task.cancel()
+    await call_catalog.close()
 
 app = FastAPI(
     title="Contoso Call Center Synthetic Generator API",
     description="API for generating synthetic call center transcripts and audio files",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Disable CORS. Do not remove this for full-stack development.
@@ -39,21 +127,82 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
-transcript_generator = AzureOpenAITranscriptGenerator()
-audio_generator = AudioGenerator()
-batch_audio_generator = AzureBatchAudioGenerator()
-data_generator = SyntheticDataGenerator()
+# Backends are built on first use (or by the warm-up task after startup) to keep cold starts fast
+transcript_generator = LazyBackend('transcript_generator', '.azure_openai_generator', 'AzureOpenAITranscriptGenerator')
+audio_generator = LazyBackend('audio_generator', '.audio_generator', 'AudioGenerator')
+batch_audio_generator = LazyBackend('batch_audio_generator', '.azure_batch_audio_generator', 'AzureBatchAudioGenerator')
+data_generator = LazyBackend('data_generator', '.data_generator', 'SyntheticDataGenerator')
+audio_transcoder = AudioTranscoder()
+artifact_catalog = ArtifactCatalog()
 
 USE_BATCH_AUDIO = os.environ.get('USE_BATCH_AUDIO', 'false').lower() == 'true'
+STREAM_TRANSCRIPT_TO_TTS = os.environ.get('STREAM_TRANSCRIPT_TO_TTS', 'false').lower() == 'true'
+TRANSCRIPTS_PER_COMPLETION = max(1, int(os.environ.get('TRANSCRIPTS_PER_COMPLETION', '1')))
+WARM_BACKENDS = os.environ.get('WARM_BACKENDS', 'true').lower() == 'true'
+CANCEL_POLL_SECONDS = float(os.environ.get('CANCEL_POLL_SECONDS', '0.5'))
+CALL_MAX_ATTEMPTS = max(1, int(os.environ.get('CALL_MAX_ATTEMPTS', '3')))
+CALL_RETRY_BACKOFF = float(os.environ.get('CALL_RETRY_BACKOFF', '1.0'))
+BULK_MAX_CALLS = int(os.environ.get('BULK_MAX_CALLS', '10000'))
+BULK_CHUNK_SIZE = max(1, int(os.environ.get('BULK_CHUNK_SIZE', '25')))
+BULK_CHUNKS_IN_FLIGHT = 2
+IDEMPOTENCY_RETRY_AFTER = 5
+
+_REQUEST_ID = re.compile(r'^[\w.-]{1,128}$')
+
+AUDIO_DIR = artifact_layout.base_directory('audio')
+TRANSCRIPT_DIR = artifact_layout.base_directory('transcript')
+
+# Sessions and artifacts not saved locally; STATE_BACKEND=filesystem shares them between workers
+state_store = create_state_store()
+idempotency_records = IdempotencyRecords(state_store)
+
+def _store_in_memory(kind: str, artifact_id: str, content) -> None:
+    """Keep an artifact in the state store along with its ETag and creation time for conditional GETs."""
+    state_store.put_blob(kind, artifact_id, content)
 
-generated_calls_storage: Dict[str, List[GeneratedCall]] = {}
-in_memory_transcripts: Dict[str, str] = {}
-in_memory_audio: Dict[str, bytes] = {}
+# Cancellation tokens of the generation requests running in this worker, by request id
+active_generations: Dict[str, CancellationToken] = {}
+
+def _memory_key(record: ArtifactRecord) -> str:
+    """Key of an in-memory artifact: the id for originals, the variant file name for transcodes."""
+    if record.kind == 'audio' and record.format != 'wav':
+        return variant_filename(record.artifact_id, record.format)
+    return record.artifact_id
+
+def _memory_blob(record: ArtifactRecord) -> StoredBlob:
+    blob = state_store.get_blob(record.kind, _memory_key(record))
+    if blob is None:
+        raise KeyError(record.artifact_id)
+    return blob
+
+def _serve_record(request: Request, record: ArtifactRecord, media_type: str, filename: str):
+    if record.path is not None:
+        return artifact_response(request, media_type, filename, path=record.path)
+    blob = _memory_blob(record)
+    return artifact_response(
+        request, media_type, filename,
+        content=blob.content, etag=blob.etag, last_modified=blob.created_at
+    )
 
 @app.get("/healthz")
 async def healthz():
     return {"status": "ok"}
 
+@app.get("/startup-report")
+async def get_startup_report():
+    """Import and initialization costs of the app and each generation backend."""
+    return {
+        **startup_report,
+        'backends': {
+            name: backend.report() for name, backend in (
+                ('transcript_generator', transcript_generator),
+                ('audio_generator', audio_generator),
+                ('batch_audio_generator', batch_audio_generator),
+                ('data_generator', data_generator)
+            )
+        }
+    }
+
 @app.get("/")
 async def root():
     return {
@@ -62,167 +211,867 @@ async def root():
         "disclaimer": "All generated data is synthetic and fictitious. This application is for simulation purposes only and does not contain real PHI or PII data."
     }
 
-@app.post("/generate-calls", response_model=CallGenerationResponse)
-async def generate_calls(request: CallGenerationRequest):
-    """Generate synthetic call center transcripts and audio files."""
-    
-    if not request.scenarios:
-        raise HTTPException(status_code=400, detail="At least one scenario must be selected")
-    
-    if request.num_calls < 1 or request.num_calls > 50:
-        raise HTTPException(status_code=400, detail="Number of calls must be between 1 and 50")
+def _transcript_groups(plan: Dict[int, str]) -> List[Tuple[str, List[int]]]:
+    """Split the planned calls into groups of up to TRANSCRIPTS_PER_COMPLETION calls sharing a scenario."""
+    indexes_by_scenario: Dict[str, List[int]] = {}
+    for call_number, scenario in plan.items():
+        indexes_by_scenario.setdefault(scenario, []).append(call_number)
     
-    start_time = time.time()
-    generated_calls = []
-    session_id = str(uuid.uuid4())
+    return [
+        (scenario, indexes[start:start + TRANSCRIPTS_PER_COMPLETION])
+        for scenario, indexes in indexes_by_scenario.items()
+        for start in range(0, len(indexes), TRANSCRIPTS_PER_COMPLETION)
+    ]
+
+def _prefetch_transcripts(scenario: str, group: List[int], request: CallGenerationRequest) -> Dict[int, Dict]:
+    """Generate the transcripts of a group of calls sharing a scenario in one completion.
     
-    try:
-        scenarios_list = [s.value for s in request.scenarios]
-        scenario_distribution = []
-        
-        for i in range(request.num_calls):
-            scenario_distribution.append(scenarios_list[i % len(scenarios_list)])
-        
-        random.shuffle(scenario_distribution)
-        
-        for i in range(request.num_calls):
-            scenario = scenario_distribution[i]
-            
-            transcript_data = transcript_generator.generate_transcript(
-                scenario=scenario,
-                sentiment=request.sentiment.value,
-                duration=request.duration.value
-            )
+    Returns transcript data keyed by call number. If the completion fails nothing is
+    returned, so the group's calls generate their transcripts one at a time with the usual retries.
+    """
+    check_cancelled()
+    with tracer.span('transcripts.prefetch', kind='stage', scenario=scenario, calls=len(group)):
+        try:
+            with stage_limits.slot('llm'):
+                results = transcript_generator.generate_transcripts(
+                    scenario, request.sentiment.value, request.duration.value, len(group)
+                )
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            tracer.error("Transcripts for calls %s failed, generating them one at a time: %s", group, e)
+            return {}
+    return dict(zip(group, results))
+
+def _generate_single_call(session_id: str, call_number: int, scenario: str, request: CallGenerationRequest,
+                          transcript_data: Optional[Dict] = None) -> GeneratedCall:
+    """Generate the transcript (unless already generated) and (optionally) audio for one call."""
+    check_cancelled()
+    with tracer.span('call', kind='call', call_number=call_number, scenario=scenario) as call_span:
+        # Streamed mode: synthesize each transcript line while the rest of the completion is generated
+        audio_stream = None
+        try:
+            if transcript_data is None:
+                if STREAM_TRANSCRIPT_TO_TTS and request.audio_settings.generate_audio and not USE_BATCH_AUDIO:
+                    audio_stream = audio_generator.open_stream(slot=partial(stage_limits.slot, 'tts'))
             
+                with stage_limits.slot('llm'):
+                    transcript_data = transcript_generator.generate_transcript(
+                        scenario=scenario,
+                        sentiment=request.sentiment.value,
+                        duration=request.duration.value,
+                        on_line=audio_stream.submit if audio_stream else None
+                    )
+        
             transcript_model = TranscriptData(**transcript_data)
-            
-            from datetime import datetime
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
-            transcript_id = f"contoso_call_{timestamp}_call_{i+1}"
+        
+            transcript_id = new_artifact_id(call_number)
+            call_span.set_attribute('transcript_id', transcript_id)
             transcript_result = transcript_generator.save_transcript_to_file(
                 transcript_data, 
                 transcript_id, 
-                save_locally=request.save_transcripts_locally
+                save_locally=request.save_transcripts_locally,
+                session_id=session_id
             )
-            
+        
+            transcript_size = len(transcript_result['content'].encode('utf-8'))
             if request.save_transcripts_locally and transcript_result['file_path']:
-                transcript_file_url = f"/transcript/{transcript_id}"
+                artifact_catalog.record(transcript_id, 'transcript', 'txt', transcript_size, path=transcript_result['file_path'],
+                                        session_id=session_id, call_id=call_number)
             else:
-                in_memory_transcripts[transcript_id] = transcript_result['content']
-                transcript_file_url = f"/transcript/{transcript_id}"
-            
+                _store_in_memory('transcript', transcript_id, transcript_result['content'])
+                artifact_catalog.record(transcript_id, 'transcript', 'txt', transcript_size,
+                                        session_id=session_id, call_id=call_number)
+            transcript_file_url = f"/transcript/{transcript_id}"
+        
             audio_file_url = None
             if request.audio_settings.generate_audio:
+                check_cancelled()
+                channel_simulation = request.audio_settings.channel_simulation
                 audio_settings = {
                     'sampling_rate': request.audio_settings.sampling_rate,
-                    'channels': request.audio_settings.channels
+                    'channels': request.audio_settings.channels,
+                    'channel_simulation': channel_simulation.model_dump(mode='json') if channel_simulation else None
                 }
-                audio_id = f"contoso_call_{timestamp}_call_{i+1}"
-                
+                audio_id = transcript_id
+            
                 audio_result = None
-                
+            
                 if USE_BATCH_AUDIO:
-                    print(f"Debug: Attempting batch audio generation")
-                    audio_result = batch_audio_generator.generate_audio(
-                        transcript_data['transcript'],
-                        audio_settings,
-                        audio_id,
-                        save_locally=request.audio_settings.save_audio_locally
-                    )
-                    
-                    if audio_result is None:
-                        print(f"Debug: Batch audio generation failed, falling back to standard generator")
+                    tracer.debug("Attempting batch audio generation")
+                    with stage_limits.slot('tts'):
+                        audio_result = batch_audio_generator.generate_audio(
+                            transcript_data['transcript'],
+                            audio_settings,
+                            audio_id,
+                            save_locally=request.audio_settings.save_audio_locally,
+                            session_id=session_id
+                        )
                 
-                if audio_result is None:
-                    print(f"Debug: Using standard audio generator")
-                    audio_result = audio_generator.generate_audio(
-                        transcript_data['transcript'],
+                    if audio_result is None:
+                        tracer.debug("Batch audio generation failed, falling back to standard generator")
+            
+                if audio_stream is not None:
+                    # Each line took a TTS slot as it was synthesized; holding one while waiting for them could deadlock
+                    audio_result = audio_stream.finish(
                         audio_settings,
                         audio_id,
-                        save_locally=request.audio_settings.save_audio_locally
+                        save_locally=request.audio_settings.save_audio_locally,
+                        session_id=session_id
                     )
                 
+                    if audio_result is None:
+                        tracer.debug("Streamed audio generation failed, falling back to standard generator")
+            
+                if audio_result is None:
+                    tracer.debug("Using standard audio generator")
+                    with stage_limits.slot('tts'):
+                        audio_result = audio_generator.generate_audio(
+                            transcript_data['transcript'],
+                            audio_settings,
+                            audio_id,
+                            save_locally=request.audio_settings.save_audio_locally,
+                            session_id=session_id
+                        )
+            
                 if audio_result:
                     if isinstance(audio_result, str) and os.path.exists(audio_result):
+                        artifact_catalog.record(audio_id, 'audio', 'wav', os.path.getsize(audio_result), path=audio_result,
+                                                session_id=session_id, call_id=call_number)
                         audio_file_url = f"/audio/{audio_id}"
                     elif isinstance(audio_result, bytes):
-                        in_memory_audio[audio_id] = audio_result
+                        _store_in_memory('audio', audio_id, audio_result)
+                        artifact_catalog.record(audio_id, 'audio', 'wav', len(audio_result),
+                                                session_id=session_id, call_id=call_number)
                         audio_file_url = f"/audio/{audio_id}"
-            
-            generated_call = GeneratedCall(
-                id=i + 1,
+        
+            return GeneratedCall(
+                id=call_number,
                 scenario=scenario,
                 transcript_data=transcript_model,
                 audio_file_url=audio_file_url,
                 transcript_file_url=transcript_file_url
             )
-            
-            generated_calls.append(generated_call)
-        
-        generated_calls_storage[session_id] = generated_calls
-        
-        generation_time = time.time() - start_time
+        finally:
+            if audio_stream is not None:
+                audio_stream.cancel()  # No-op once finish() has collected every segment
+
+def _generate_call_with_retries(session_id: str, call_number: int, scenario: str, request: CallGenerationRequest,
+                                transcript_data: Optional[Dict] = None) -> Union[GeneratedCall, FailedCall]:
+    """Generate one call, retrying failures with exponential backoff; returns a FailedCall once attempts run out."""
+    for attempt in range(1, CALL_MAX_ATTEMPTS + 1):
+        try:
+            return _generate_single_call(session_id, call_number, scenario, request, transcript_data)
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            tracer.error("Call %d failed (attempt %d/%d): %s", call_number, attempt, CALL_MAX_ATTEMPTS, e)
+            if attempt == CALL_MAX_ATTEMPTS:
+                return FailedCall(id=call_number, scenario=scenario, error=str(e), attempts=attempt)
+            transcript_data = None  # A prefetched transcript may be what failed
+            cancellable_sleep(CALL_RETRY_BACKOFF * 2 ** (attempt - 1))
+
+async def _index_call(session_id: str, call: GeneratedCall, in_process: bool = True) -> None:
+    """Add a generated call to the search index and queue it, with its artifact locations, for the call catalog.
+    
+    Without the catalog the call goes to the in-process index, unless `in_process` is false.
+    """
+    transcript_data = call.transcript_data.model_dump()
+    if not call_catalog.enabled:
+        # The in-process index only serves /calls without the catalog, so it need not hold the calls otherwise
+        if in_process:
+            call_search_index.add(session_id, call.id, transcript_data, call.transcript_file_url, call.audio_file_url)
+        return
+    
+    transcript_id = call.transcript_file_url.rsplit('/', 1)[-1] if call.transcript_file_url else None
+    audio_id = call.audio_file_url.rsplit('/', 1)[-1] if call.audio_file_url else None
+    transcript_record = artifact_catalog.lookup(transcript_id, 'transcript', 'txt') if transcript_id else None
+    audio_record = artifact_catalog.lookup(audio_id, 'audio', 'wav') if audio_id else None
+    
+    await call_catalog.add(
+        session_id,
+        call.id,
+        transcript_data,
+        transcript_id=transcript_id,
+        transcript_path=transcript_record.path if transcript_record else None,
+        audio_id=audio_id,
+        audio_path=audio_record.path if audio_record else None
+    )
+
+async def _watch_cancellation(request_id: str, http_request: Request, token: CancellationToken) -> None:
+    """Cancel a generation when its client disconnects or a cancel request reaches any worker.
+    
+    Also renews the generation's lease in the state store, so other workers see it as running.
+    """
+    renewed = time.monotonic()
+    while not token.cancelled:
+        await asyncio.sleep(CANCEL_POLL_SECONDS)
+        if time.monotonic() - renewed >= GENERATION_LEASE_SECONDS / 3:
+            state_store.put_blob('generations', request_id, b'')
+            renewed = time.monotonic()
+        if await http_request.is_disconnected():
+            token.cancel('client disconnected')
+        elif state_store.get_blob('cancellations', request_id) is not None:
+            token.cancel('cancel requested')
+
+async def _schedule_call(session_id: str, weight: float, call_number: int, scenario: str, request: CallGenerationRequest,
+                         prefetch: Optional[asyncio.Future]) -> Union[GeneratedCall, FailedCall]:
+    """Queue one call on the call scheduler, once its group's transcripts are in if they are prefetched."""
+    transcript_data = None
+    if prefetch is not None:
+        # Shielded: the group's other calls still need it if this one is cancelled
+        transcript_data = (await asyncio.shield(prefetch)).get(call_number)
+    return await call_scheduler.run(
+        session_id, weight, _generate_call_with_retries, session_id, call_number, scenario, request, transcript_data
+    )
+
+async def _run_calls(session_id: str, plan: Dict[int, str], request: CallGenerationRequest, weight: float) -> List:
+    """Generate the planned calls on the call scheduler; returns a GeneratedCall, FailedCall or exception per call."""
+    # Each prefetch group is its own scheduled task, so a group's calls start as soon as its
+    # completion is in rather than after every group's
+    prefetches: Dict[int, asyncio.Future] = {}
+    if TRANSCRIPTS_PER_COMPLETION > 1:
+        for scenario, group in _transcript_groups(plan):
+            prefetch = asyncio.ensure_future(call_scheduler.run(session_id, weight, _prefetch_transcripts, scenario, group, request))
+            prefetches.update(dict.fromkeys(group, prefetch))
+    
+    # All calls are queued at once; the scheduler interleaves them with other requests' calls
+    pending = [
+        asyncio.ensure_future(_schedule_call(session_id, weight, call_number, scenario, request, prefetches.get(call_number)))
+        for call_number, scenario in plan.items()
+    ]
+    try:
+        return await asyncio.gather(*pending, return_exceptions=True)
+    except BaseException:
+        for task in pending + list(prefetches.values()):
+            task.cancel()
+        raise
+
+def _check_request_id(request_id: str) -> None:
+    if not _REQUEST_ID.match(request_id):
+        raise HTTPException(status_code=400, detail="X-Request-Id may only contain letters, digits, '.', '_' and '-'")
+    if request_id in active_generations or generation_running(state_store, request_id):
+        raise HTTPException(status_code=409, detail=f"Request {request_id} is already running")
+
+def _register_generation(request_id: str) -> CancellationToken:
+    """Make a generation cancellable by its request id from any worker."""
+    _check_request_id(request_id)
+    token = CancellationToken()
+    active_generations[request_id] = token
+    state_store.put_blob('generations', request_id, b'')
+    return token
+
+def _unregister_generation(request_id: str) -> None:
+    del active_generations[request_id]
+    state_store.delete_blob('generations', request_id)
+    state_store.delete_blob('cancellations', request_id)
+
+def _client_id(request: Request) -> str:
+    """Client identity used for per-client queue limits: X-Client-Id if sent, else the peer address."""
+    return request.headers.get('x-client-id') or (request.client.host if request.client else 'unknown')
+
+@app.post("/generate-calls", response_model=CallGenerationResponse)
+async def generate_calls(request: CallGenerationRequest, response: FastAPIResponse, http_request: Request, fast_response: bool = False,
+                         dedupe: bool = False):
+    """Generate synthetic call center transcripts and audio files.
+    
+    With `fast_response=true` the response is built from the already-validated calls
+    without a second validation pass, serialized in one step by pydantic-core and
+    compressed with brotli or gzip when the client's Accept-Encoding allows it.
+    
+    Requests wait in a bounded queue for a generation slot; when it is full the request
+    is rejected with 503 (or 429 for a client with too many queued requests) and a
+    Retry-After header. The time spent queued is returned in `X-Queue-Wait`. Admitted
+    requests share the call workers in weighted fair order according to `priority`.
+    
+    Generation stops, answering 409, when the client disconnects or
+    `POST /generate-calls/{request_id}/cancel` is called with the request's `X-Request-Id`.
+    
+    A call that still fails after CALL_MAX_ATTEMPTS attempts is listed in `failed_calls`
+    while the others are returned; `POST /sessions/{session_id}/resume` generates just those.
+    When every call fails the same body is returned with status 502.
+    
+    A retry sent with the same `Idempotency-Key` header gets the stored result of the first
+    request, or waits up to IDEMPOTENCY_WAIT_SECONDS for it while it is still running (then
+    answers 409 with Retry-After), instead of generating again. With `dedupe=true` the
+    request body itself serves as the key.
+    """
+    
+    if not request.scenarios:
+        raise HTTPException(status_code=400, detail="At least one scenario must be selected")
+    
+    if request.num_calls < 1 or request.num_calls > 50:
+        raise HTTPException(status_code=400, detail="Number of calls must be between 1 and 50")
+    
+    plan = _plan_calls(request)
+    session_id = str(uuid.uuid4())
+    request_id = http_request.headers.get('x-request-id') or str(uuid.uuid4())
+    
+    fingerprint = request_fingerprint(request.model_dump_json().encode('utf-8'))
+    idempotency_key = http_request.headers.get('idempotency-key') or (f"request:{fingerprint}" if dedupe else None)
+    on_complete = None
+    if idempotency_key:
+        wait_started = time.monotonic()
+        while True:
+            try:
+                existing = idempotency_records.claim(idempotency_key, fingerprint, request_id, session_id)
+            except IdempotencyConflict:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+            if existing is None:
+                break
+            if existing['status'] == 'completed':
+                replay = _replay_generation(existing, http_request)
+                if replay is not None:
+                    return replay
+                idempotency_records.release(idempotency_key)  # Session was cleaned up; generate afresh
+                continue
+            # The first request is still running; wait a while for its result
+            if time.monotonic() - wait_started >= IDEMPOTENCY_WAIT_SECONDS:
+                raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still running",
+                                    headers={'Retry-After': str(IDEMPOTENCY_RETRY_AFTER)})
+            if await http_request.is_disconnected():
+                raise HTTPException(status_code=409, detail="Client disconnected while waiting for the request with this Idempotency-Key")
+            await asyncio.sleep(CANCEL_POLL_SECONDS)
         
-        return CallGenerationResponse(
-            calls=generated_calls,
-            total_calls=len(generated_calls),
-            generation_time=round(generation_time, 2)
+        def on_complete(payload: CallGenerationResponse) -> None:
+            idempotency_records.complete(idempotency_key, payload.generation_time,
+                                         [failed.model_dump() for failed in payload.failed_calls])
+    
+    _save_checkpoint(session_id, request, plan)
+    try:
+        return await _generate_session(request, session_id, plan, [], response, http_request, fast_response,
+                                       default_request_id=request_id, on_complete=on_complete)
+    except BaseException:
+        if idempotency_key:
+            idempotency_records.release(idempotency_key)  # Let a retry run the generation again
+        raise
+
+def _plan_calls(request: CallGenerationRequest) -> Dict[int, str]:
+    """Spread the requested scenarios evenly over the calls, in random order; keyed by call number."""
+    scenarios_list = [s.value for s in request.scenarios]
+    scenario_distribution = []
+    
+    for i in range(request.num_calls):
+        scenario_distribution.append(scenarios_list[i % len(scenarios_list)])
+    
+    random.shuffle(scenario_distribution)
+    
+    return {i + 1: scenario for i, scenario in enumerate(scenario_distribution)}
+
+@app.post("/generate-calls/bulk")
+async def generate_calls_bulk(request: CallGenerationRequest, http_request: Request):
+    """Generate up to BULK_MAX_CALLS calls, streamed back as newline-delimited JSON.
+    
+    Calls are generated BULK_CHUNK_SIZE at a time, with the next chunk already running
+    while one is streamed, and each chunk is appended to the session on disk as it
+    finishes, so memory use stays flat however many calls are requested. Artifacts are
+    therefore always saved to disk, and STATE_BACKEND must be `filesystem`. The calls are
+    searchable through `/calls` only with the call catalog (DATABASE_URL). The stream has one `call` or `failed` event per call and a
+    `progress` event per chunk, and ends with a `completed`, `cancelled` or `error` event.
+    Priority, cancellation and `POST /sessions/{session_id}/resume` work as for
+    `/generate-calls`.
+    """
+    if state_store.name != 'filesystem':
+        raise HTTPException(status_code=501, detail="Bulk generation needs STATE_BACKEND=filesystem")
+    
+    if not request.scenarios:
+        raise HTTPException(status_code=400, detail="At least one scenario must be selected")
+    
+    if request.num_calls < 1 or request.num_calls > BULK_MAX_CALLS:
+        raise HTTPException(status_code=400, detail=f"Number of calls must be between 1 and {BULK_MAX_CALLS}")
+    
+    if not request.save_transcripts_locally or (request.audio_settings.generate_audio and not request.audio_settings.save_audio_locally):
+        raise HTTPException(
+            status_code=400,
+            detail="Bulk generation saves artifacts to disk; save_transcripts_locally and audio_settings.save_audio_locally must be true"
         )
-        
+    
+    plan = _plan_calls(request)
+    session_id = str(uuid.uuid4())
+    return _stream_bulk(request, session_id, plan, http_request, save_checkpoint=True)
+
+def _stream_bulk(request: CallGenerationRequest, session_id: str, plan: Dict[int, str], http_request: Request,
+                 default_request_id: Optional[str] = None, save_checkpoint: bool = False) -> StreamingResponse:
+    """Check the request id and admission, then stream the generation of the planned calls of a bulk session."""
+    request_id = http_request.headers.get('x-request-id') or default_request_id or str(uuid.uuid4())
+    _check_request_id(request_id)
+    client_id = _client_id(http_request)
+    try:
+        generation_admission.check(client_id)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers={'Retry-After': str(e.retry_after)})
+    
+    if save_checkpoint:
+        _save_checkpoint(session_id, request, plan, bulk=True)
+    
+    return StreamingResponse(
+        _bulk_events(request, session_id, plan, request_id, http_request, client_id),
+        media_type='application/x-ndjson',
+        headers={'X-Request-Id': request_id}
+    )
+
+def _ndjson(event: Dict) -> bytes:
+    return json.dumps(event).encode('utf-8') + b'\n'
+
+async def _run_bulk_chunk(session_id: str, index: int, chunk: Dict[int, str], request: CallGenerationRequest,
+                          weight: float, token: CancellationToken) -> List:
+    # Runs as its own task, so the span and cancellation scope never outlive a yield of the stream
+    with tracer.span('generate_calls.chunk', kind='request', session_id=session_id, chunk=index,
+                     num_calls=len(chunk)), cancellation_scope(token):
+        return await _run_calls(session_id, chunk, request, weight)
+
+async def _bulk_events(request: CallGenerationRequest, session_id: str, plan: Dict[int, str], request_id: str,
+                       http_request: Request, client_id: str):
+    """Generate a bulk session chunk by chunk, yielding NDJSON events as each chunk finishes."""
+    try:
+        token = _register_generation(request_id)
+    except HTTPException as e:
+        yield _ndjson({'event': 'error', 'status': e.status_code, 'detail': e.detail})
+        return
+    watcher = asyncio.create_task(_watch_cancellation(request_id, http_request, token))
+    
+    weight = PRIORITY_WEIGHTS[request.priority.value]
+    planned = list(plan.items())
+    upcoming = iter(enumerate(planned[start:start + BULK_CHUNK_SIZE] for start in range(0, len(planned), BULK_CHUNK_SIZE)))
+    in_flight: Deque[asyncio.Future] = deque()
+    
+    def submit_next_chunk() -> None:
+        item = next(upcoming, None)
+        if item is not None and not token.cancelled:
+            index, chunk = item
+            in_flight.append(asyncio.ensure_future(_run_bulk_chunk(session_id, index, dict(chunk), request, weight, token)))
+    
+    try:
+        async with generation_admission.admit(client_id, weight, len(plan)) as queue_wait:
+            start_time = time.time()
+            yield _ndjson({
+                'event': 'started',
+                'session_id': session_id,
+                'request_id': request_id,
+                'total_calls': len(plan),
+                'chunk_size': BULK_CHUNK_SIZE,
+                'queue_wait_seconds': round(queue_wait, 3)
+            })
+            
+            # Keeping a second chunk queued leaves the call workers no idle gap between chunks
+            for _ in range(BULK_CHUNKS_IN_FLIGHT):
+                submit_next_chunk()
+            
+            completed = failed = 0
+            while in_flight:
+                results = await in_flight.popleft()
+                submit_next_chunk()
+                
+                new_calls = [result for result in results if isinstance(result, GeneratedCall)]
+                failed_calls = [result for result in results if isinstance(result, FailedCall)]
+                if new_calls:
+                    state_store.append_session(session_id, new_calls)
+                for generated_call in new_calls:
+                    # Kept out of the in-process index, which would hold every call of the job
+                    await _index_call(session_id, generated_call, in_process=False)
+                    yield b'{"event":"call","call":%s}\n' % generated_call.model_dump_json().encode('utf-8')
+                for failed_call in failed_calls:
+                    yield _ndjson({'event': 'failed', 'call': failed_call.model_dump()})
+                
+                completed += len(new_calls)
+                failed += len(failed_calls)
+                yield _ndjson({'event': 'progress', 'completed': completed, 'failed': failed, 'total_calls': len(plan)})
+                
+                if token.cancelled:
+                    raise GenerationCancelled(token.reason)
+                unexpected = next((result for result in results if isinstance(result, BaseException)), None)
+                if unexpected is not None:
+                    raise unexpected
+            
+            if completed == len(plan):
+                state_store.delete_blob('checkpoints', session_id)
+            
+            yield _ndjson({
+                'event': 'completed',
+                'session_id': session_id,
+                'total_calls': completed,
+                'failed_calls': failed,
+                'generation_time': round(time.time() - start_time, 2)
+            })
+    except GenerationCancelled:
+        yield _ndjson({
+            'event': 'cancelled',
+            'status': 409,
+            'detail': f"Generation cancelled: {token.reason}; resume with POST /sessions/{session_id}/resume"
+        })
+    except AdmissionRejected as e:
+        yield _ndjson({'event': 'error', 'status': e.status_code, 'detail': e.detail, 'retry_after': e.retry_after})
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating calls: {str(e)}")
+        tracer.error("Bulk generation of session %s failed: %s", session_id, e)
+        yield _ndjson({'event': 'error', 'status': 500, 'detail': f"Error generating calls: {str(e)}"})
+    finally:
+        for chunk_task in in_flight:
+            chunk_task.cancel()
+        watcher.cancel()
+        _unregister_generation(request_id)
+
+def _replay_generation(record: Dict, http_request: Request) -> Optional[Response]:
+    """Rebuild the response of a completed idempotent generation from its stored session."""
+    calls = state_store.get_session(record['session_id'])
+    if calls is None:
+        return None
+    
+    generated = {call.id for call in calls}
+    payload = CallGenerationResponse.model_construct(
+        calls=calls,
+        total_calls=len(calls),
+        generation_time=record['generation_time'],
+        session_id=record['session_id'],
+        failed_calls=[FailedCall(**failed) for failed in record['failed_calls'] if failed['id'] not in generated]
+    )
+    headers = {'Idempotent-Replayed': 'true', 'X-Request-Id': record['request_id']}
+    return json_response(http_request, payload.model_dump_json().encode('utf-8'), headers=headers)
+
+@app.post("/sessions/{session_id}/resume", response_model=CallGenerationResponse)
+async def resume_session(session_id: str, response: FastAPIResponse, http_request: Request, fast_response: bool = False):
+    """Generate the calls of a session that failed or were cancelled, keeping those already generated.
+    
+    A bulk session is resumed like `/generate-calls/bulk`: the missing calls are appended to
+    the session and streamed back as newline-delimited JSON.
+    """
+    checkpoint = _load_checkpoint(session_id)
+    if checkpoint is None:
+        raise HTTPException(status_code=404, detail="No resumable generation for this session")
+    
+    request, plan, bulk = checkpoint
+    if bulk:
+        done = state_store.session_call_ids(session_id) or set()
+        missing = {call_number: scenario for call_number, scenario in plan.items() if call_number not in done}
+        return _stream_bulk(request, session_id, missing, http_request, default_request_id=f"resume-{session_id}")
+    
+    calls = state_store.get_session(session_id) or []
+    done = {call.id for call in calls}
+    missing = {call_number: scenario for call_number, scenario in plan.items() if call_number not in done}
+    
+    return await _generate_session(request, session_id, missing, calls, response, http_request, fast_response,
+                                   default_request_id=f"resume-{session_id}")
+
+def _save_checkpoint(session_id: str, request: CallGenerationRequest, plan: Dict[int, str], bulk: bool = False) -> None:
+    """Record a session's request and call plan so missing calls can be generated later."""
+    checkpoint = {'request': request.model_dump(mode='json'), 'plan': plan, 'bulk': bulk}
+    state_store.put_blob('checkpoints', session_id, json.dumps(checkpoint))
+
+def _load_checkpoint(session_id: str) -> Optional[Tuple[CallGenerationRequest, Dict[int, str], bool]]:
+    """The request, call plan and whether it is a bulk session, if the session can be resumed."""
+    if not _REQUEST_ID.match(session_id):
+        return None
+    blob = state_store.get_blob('checkpoints', session_id)
+    if blob is None:
+        return None
+    checkpoint = json.loads(bytes(blob.content))
+    plan = {int(call_number): scenario for call_number, scenario in checkpoint['plan'].items()}
+    return CallGenerationRequest.model_validate(checkpoint['request']), plan, checkpoint.get('bulk', False)
+
+async def _generate_session(request: CallGenerationRequest, session_id: str, plan: Dict[int, str], existing_calls: List[GeneratedCall],
+                            response: FastAPIResponse, http_request: Request, fast_response: bool,
+                            default_request_id: Optional[str] = None,
+                            on_complete: Optional[Callable[[CallGenerationResponse], None]] = None):
+    """Generate the planned calls of a session under admission control and cancellation.
+    
+    Calls that still fail after their retries are reported in `failed_calls`; the session's
+    checkpoint is kept until every planned call has been generated.
+    """
+    request_id = http_request.headers.get('x-request-id') or default_request_id or str(uuid.uuid4())
+    token = _register_generation(request_id)
+    response.headers['X-Request-Id'] = request_id
+    watcher = asyncio.create_task(_watch_cancellation(request_id, http_request, token))
+    
+    try:
+        weight = PRIORITY_WEIGHTS[request.priority.value]
+        async with generation_admission.admit(_client_id(http_request), weight, len(plan)) as queue_wait:
+            response.headers['X-Queue-Wait'] = f"{queue_wait:.3f}"
+            start_time = time.time()
+            
+            try:
+                with tracer.span('generate_calls', kind='request', session_id=session_id, num_calls=len(plan),
+                                 queue_wait_ms=round(queue_wait * 1000, 1)) as request_span, cancellation_scope(token):
+                    if request_span.trace_id:
+                        response.headers['X-Trace-Id'] = request_span.trace_id
+                    
+                    results = await _run_calls(session_id, plan, request, weight)
+                    new_calls = [result for result in results if isinstance(result, GeneratedCall)]
+                    failed_calls = [result for result in results if isinstance(result, FailedCall)]
+                    for generated_call in new_calls:
+                        await _index_call(session_id, generated_call)
+                
+                generated_calls = sorted(existing_calls + new_calls, key=lambda call: call.id)
+                if generated_calls:
+                    state_store.put_session(session_id, generated_calls)
+                
+                if len(generated_calls) == len(existing_calls) + len(plan):
+                    state_store.delete_blob('checkpoints', session_id)
+                elif token.cancelled:
+                    raise GenerationCancelled(token.reason)
+                else:
+                    unexpected = next((result for result in results if isinstance(result, BaseException)), None)
+                    if unexpected is not None:
+                        raise unexpected
+                
+                # Every call failed: still answer with the failures and the session id to resume
+                status_code = 502 if not generated_calls else 200
+                response.status_code = status_code
+                generation_time = time.time() - start_time
+                
+                response_class = CallGenerationResponse.model_construct if fast_response else CallGenerationResponse
+                payload = response_class(
+                    calls=generated_calls,
+                    total_calls=len(generated_calls),
+                    generation_time=round(generation_time, 2),
+                    session_id=session_id,
+                    failed_calls=failed_calls
+                )
+                if on_complete is not None:
+                    on_complete(payload)
+                
+                if fast_response:
+                    with tracer.span('response.serialize', kind='stage', calls=len(generated_calls)):
+                        return json_response(http_request, payload.model_dump_json().encode('utf-8'), status_code=status_code,
+                                             headers=dict(response.headers))
+                
+                return payload
+            
+            except GenerationCancelled:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Generation cancelled: {token.reason}; resume with POST /sessions/{session_id}/resume"
+                )
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Error generating calls: {str(e)}")
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers={'Retry-After': str(e.retry_after)})
+    finally:
+        watcher.cancel()
+        _unregister_generation(request_id)
+
+@app.post("/generate-calls/{request_id}/cancel", status_code=202)
+async def cancel_generation(request_id: str):
+    """Cancel a running generation by the X-Request-Id it was submitted with, on whichever worker runs it.
+    
+    Queued calls are dropped, LLM streams are closed, speech synthesis stops at the next
+    segment and submitted batch syntheses are deleted.
+    """
+    token = active_generations.get(request_id)
+    if token is not None:
+        token.cancel('cancel requested')
+    elif _REQUEST_ID.match(request_id) and generation_running(state_store, request_id):
+        state_store.put_blob('cancellations', request_id, b'')  # Picked up by the worker running it
+    else:
+        raise HTTPException(status_code=404, detail="No running generation with this request id")
+    
+    return {"request_id": request_id, "status": "cancelling"}
+
+@app.get("/calls", response_model=CallSearchResponse)
+async def search_calls(
+    request: Request,
+    q: Optional[str] = None,
+    scenario: Optional[ScenarioType] = None,
+    sentiment: Optional[str] = None,
+    min_duration: Optional[int] = None,
+    max_duration: Optional[int] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None
+):
+    """Search generated calls by scenario, sentiment, duration and synthetic_data fields plus transcript text.
+    
+    synthetic_data fields are filtered with `data.<field>=<value>` query parameters,
+    e.g. `/calls?sentiment=negative&scenario=caregiver_inquiry&q=Metformin`.
+    """
+    if limit < 1 or limit > 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+    
+    filters = {}
+    if scenario:
+        filters['scenario'] = scenario.value
+    if sentiment:
+        filters['sentiment'] = sentiment
+    for key, value in request.query_params.items():
+        if key.startswith('data.'):
+            filters[key[len('data.'):]] = value
+    
+    try:
+        if call_catalog.enabled:
+            results, next_cursor = await call_catalog.search(q, filters, min_duration, max_duration, limit, cursor)
+        else:
+            results, next_cursor = call_search_index.search(q, filters, min_duration, max_duration, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return CallSearchResponse(results=results, next_cursor=next_cursor)
 
 @app.get("/audio/{audio_id}")
-async def get_audio_file(audio_id: str):
-    """Retrieve generated audio file from disk or memory."""
-    from fastapi.responses import FileResponse
-    import os
-    
-    audio_dir = os.path.join(os.path.dirname(__file__), '..', 'generated_audio')
-    file_path = os.path.join(audio_dir, f"{audio_id}.wav")
-    
-    if os.path.exists(file_path):
-        return FileResponse(
-            path=file_path,
-            media_type="audio/wav",
-            filename=f"{audio_id}.wav"
-        )
+async def get_audio_file(audio_id: str, request: Request, format: str = "wav"):
+    """Retrieve generated audio from disk or memory, honouring Range and conditional headers.
     
-    if audio_id in in_memory_audio:
-        return Response(
-            content=in_memory_audio[audio_id],
-            media_type="audio/wav",
-            headers={"Content-Disposition": f"attachment; filename={audio_id}.wav"}
-        )
+    Non-WAV formats are transcoded on first request and cached next to the original.
+    """
+    if format not in DELIVERY_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported audio format: {format}")
+    
+    media_type = DELIVERY_FORMATS[format]['media_type']
+    filename = variant_filename(audio_id, format)
+    
+    record = artifact_catalog.lookup(audio_id, 'audio', format)
+    
+    try:
+        if record is None and format != "wav":
+            source = artifact_catalog.lookup(audio_id, 'audio', 'wav')
+            if source is not None:
+                record = await _transcode_variant(source, format)
+        
+        if record is not None:
+            return _serve_record(request, record, media_type, filename)
+    except (FileNotFoundError, KeyError):
+        pass  # Catalogued artifact was removed out of band
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error transcoding audio to {format}: {str(e)}")
     
     raise HTTPException(status_code=404, detail="Audio file not found")
 
+async def _transcode_variant(source: ArtifactRecord, format: str) -> ArtifactRecord:
+    """Produce a delivery variant of a catalogued WAV and record it alongside the original."""
+    if source.path is not None:
+        variant_path = await audio_transcoder.variant_file(source.path, format)
+        return artifact_catalog.record(source.artifact_id, 'audio', format, os.path.getsize(variant_path),
+                                       path=variant_path, session_id=source.session_id, call_id=source.call_id)
+    
+    encoded = await audio_transcoder.variant_bytes(source.artifact_id, bytes(_memory_blob(source).content), format)
+    _store_in_memory('audio', variant_filename(source.artifact_id, format), encoded)
+    return artifact_catalog.record(source.artifact_id, 'audio', format, len(encoded),
+                                   session_id=source.session_id, call_id=source.call_id)
+
 @app.get("/transcript/{transcript_id}")
-async def get_transcript_file(transcript_id: str):
-    """Retrieve generated transcript file from disk or memory."""
-    from fastapi.responses import FileResponse
-    import os
-    
-    transcript_dir = os.path.join(os.path.dirname(__file__), '..', 'generated_transcripts')
-    file_path = os.path.join(transcript_dir, f"{transcript_id}.txt")
-    
-    if os.path.exists(file_path):
-        return FileResponse(
-            path=file_path,
-            media_type="text/plain",
-            filename=f"{transcript_id}.txt"
-        )
+async def get_transcript_file(transcript_id: str, request: Request):
+    """Retrieve generated transcript file from disk or memory, honouring Range and conditional headers."""
+    record = artifact_catalog.lookup(transcript_id, 'transcript', 'txt')
     
-    if transcript_id in in_memory_transcripts:
-        return Response(
-            content=in_memory_transcripts[transcript_id],
-            media_type="text/plain",
-            headers={"Content-Disposition": f"attachment; filename={transcript_id}.txt"}
-        )
+    if record is not None:
+        try:
+            return _serve_record(request, record, "text/plain", f"{transcript_id}.txt")
+        except (FileNotFoundError, KeyError):
+            pass  # Catalogued artifact was removed out of band
     
     raise HTTPException(status_code=404, detail="Transcript file not found")
 
+def _session_archive_entries(session_id: str, include_audio: bool, include_transcripts: bool):
+    """Yield archive entries for a session's original artifacts, followed by a JSON manifest."""
+    for record in artifact_catalog.session_artifacts(session_id):
+        if record.kind == 'transcript' and record.format == 'txt' and include_transcripts:
+            name = f"transcripts/{record.artifact_id}.txt"
+        elif record.kind == 'audio' and record.format == 'wav' and include_audio:
+            name = f"audio/{record.artifact_id}.wav"
+        else:
+            continue
+        
+        if record.path is not None:
+            yield ArchiveEntry(name=name, path=record.path)
+        else:
+            blob = _memory_blob(record)
+            yield ArchiveEntry(name=name, content=blob.content, modified=blob.created_at)
+    
+    # Written call by call to a temporary file, so a bulk session's manifest is never held in memory
+    with tempfile.NamedTemporaryFile(prefix='manifest-', suffix='.json') as manifest:
+        total_calls = 0
+        manifest.write(b'{"calls":[')
+        for call in state_store.iter_session(session_id) or ():
+            manifest.write((b',' if total_calls else b'') + call.model_dump_json().encode('utf-8'))
+            total_calls += 1
+        manifest.write(b'],"total_calls":%d,"generation_time":0.0,"session_id":%s,"failed_calls":[]}'
+                       % (total_calls, json.dumps(session_id).encode('utf-8')))
+        manifest.flush()
+        yield ArchiveEntry(name="manifest.json", path=manifest.name)
+
+def _field_projection(spec: Optional[str]) -> Optional[Dict]:
+    """Turn 'id,transcript_data.sentiment' into a pydantic include/exclude mapping, validating names."""
+    if not spec:
+        return None
+    
+    projection: Dict = {}
+    for path in (part.strip() for part in spec.split(',')):
+        if not path:
+            continue
+        top, _, nested = path.partition('.')
+        if top not in GeneratedCall.model_fields:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {path}")
+        if not nested:
+            projection[top] = True
+            continue
+        if top != 'transcript_data' or nested not in TranscriptData.model_fields:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {path}")
+        if projection.get(top) is not True:
+            projection.setdefault(top, {})[nested] = True
+    return projection
+
+@app.get("/sessions/{session_id}/calls", response_model=SessionCallsResponse)
+async def get_session_calls(
+    session_id: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    exclude: Optional[str] = None
+):
+    """Page through a session's generated calls, optionally projecting fields.
+    
+    `fields` and `exclude` take comma-separated names, with `transcript_data.<field>` for
+    nested ones, e.g. `exclude=transcript_data.transcript,transcript_data.synthetic_data`.
+    """
+    total_calls = state_store.count_session(session_id)
+    if total_calls is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    if limit < 1 or limit > 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+    
+    include_fields = _field_projection(fields)
+    exclude_fields = _field_projection(exclude)
+    
+    try:
+        position = decode_cursor(cursor, {'after': int})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Only the page (and one call past it) is read, however large the session
+    calls = state_store.iter_session(session_id, position['after'] if position else None) or iter(())
+    page = list(islice(calls, limit + 1))
+    
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor({'after': page[-1].id})
+    
+    return SessionCallsResponse(
+        session_id=session_id,
+        calls=[call.model_dump(include=include_fields, exclude=exclude_fields) for call in page],
+        total_calls=total_calls,
+        next_cursor=next_cursor
+    )
+
+@app.get("/sessions/{session_id}/export")
+async def export_session(session_id: str, archive: str = "zip", include_audio: bool = True, include_transcripts: bool = True):
+    """Stream every artifact of a session as a ZIP (WAV stored, text deflated) or tar archive.
+    
+    Members are read and written in fixed-size chunks, so memory use does not grow with the session.
+    """
+    if archive not in ARCHIVE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported archive format: {archive}")
+    
+    if state_store.count_session(session_id) is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    spec = ARCHIVE_FORMATS[archive]
+    entries = _session_archive_entries(session_id, include_audio, include_transcripts)
+    return StreamingResponse(
+        stream_archive(archive, entries),
+        media_type=spec['media_type'],
+        headers={"Content-Disposition": f"attachment; filename=contoso_session_{session_id}.{spec['extension']}"}
+    )
+
 @app.get("/scenarios")
 async def get_available_scenarios():
     """Get list of available call scenarios."""
@@ -255,6 +1104,16 @@ async def get_audio_settings():
             {"value": 1, "name": "Mono (Recommended)"},
             {"value": 2, "name": "Stereo"}
         ],
+        "delivery_formats": [
+            {"value": key, "name": spec['name'], "media_type": spec['media_type']}
+            for key, spec in DELIVERY_FORMATS.items()
+        ],
+        "channel_simulation": {
+            "band_hz": [300, 3400],
+            "companding": [law.value for law in CompandingType],
+            "packet_loss": "0.0-1.0",
+            "jitter": "0.0-1.0"
+        },
         "specifications": {
             "format": "WAV (Microsoft PCM)",
             "bit_depth": "16-bit",
@@ -266,53 +1125,42 @@ async def get_audio_settings():
 
 @app.delete("/cleanup/{session_id}")
 async def cleanup_session(session_id: str):
-    """Clean up stored data for a session."""
-    import os
-    import glob
+    """Clean up stored data and artifacts for a session."""
+    state_store.delete_session(session_id)
+    state_store.delete_blob('checkpoints', session_id)
     
-    if session_id in generated_calls_storage:
-        del generated_calls_storage[session_id]
+    call_search_index.remove_session(session_id)
+    await call_catalog.delete_session(session_id)
     
-    audio_dir = os.path.join(os.path.dirname(__file__), '..', 'generated_audio')
-    audio_files = glob.glob(os.path.join(audio_dir, f"{session_id}_*.wav"))
-    for file_path in audio_files:
-        try:
-            os.remove(file_path)
-        except OSError:
-            pass  # File already deleted or doesn't exist
-    
-    transcript_dir = os.path.join(os.path.dirname(__file__), '..', 'generated_transcripts')
-    transcript_files = glob.glob(os.path.join(transcript_dir, f"contoso_call_*_call_*.txt"))
-    for file_path in transcript_files:
-        try:
-            os.remove(file_path)
-        except OSError:
-            pass  # File already deleted or doesn't exist
+    for record in artifact_catalog.remove_session(session_id):
+        if record.path is not None:
+            try:
+                os.remove(record.path)
+            except OSError:
+                pass  # File already deleted or doesn't exist
+        else:
+            state_store.delete_blob(record.kind, _memory_key(record))
     
     return {"message": f"Session {session_id} cleaned up successfully"}
 
 @app.get("/stats")
 async def get_stats():
     """Get API usage statistics."""
-    import os
-    import glob
+    total_sessions, total_calls = state_store.session_stats()
     
-    total_sessions = len(generated_calls_storage)
-    total_calls = sum(len(calls) for calls in generated_calls_storage.values())
-    
-    audio_dir = os.path.join(os.path.dirname(__file__), '..', 'generated_audio')
-    audio_files = glob.glob(os.path.join(audio_dir, "*.wav")) if os.path.exists(audio_dir) else []
-    total_audio_files = len(audio_files)
-    
-    transcript_dir = os.path.join(os.path.dirname(__file__), '..', 'generated_transcripts')
-    transcript_files = glob.glob(os.path.join(transcript_dir, "*.txt")) if os.path.exists(transcript_dir) else []
-    total_transcript_files = len(transcript_files)
+    counts = artifact_catalog.counts()
     
     return {
         "total_sessions": total_sessions,
         "total_calls_generated": total_calls,
-        "total_audio_files": total_audio_files,
-        "total_transcript_files": total_transcript_files,
-        "audio_directory": audio_dir,
-        "transcript_directory": transcript_dir
+        "total_audio_files": counts.get('audio', {}).get('wav', {}).get('files', 0),
+        "total_transcript_files": counts.get('transcript', {}).get('txt', {}).get('files', 0),
+        "audio_directory": AUDIO_DIR,
+        "transcript_directory": TRANSCRIPT_DIR,
+        "state_backend": state_store.name,
+        "admission": generation_admission.stats(),
+        "call_scheduler": call_scheduler.stats(),
+        "stage_limits": stage_limits.stats()
     }
+
+APP_IMPORT_READY = time.perf_counter()
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional, Dict, Any
 from enum import Enum
 
@@ -18,11 +18,43 @@ class DurationType(str, Enum):
     MEDIUM = "medium"
     LONG = "long"
 
+class PriorityType(str, Enum):
+    HIGH = "high"
+    NORMAL = "normal"
+    LOW = "low"
+
+class CompandingType(str, Enum):
+    MULAW = "mulaw"
+    ALAW = "alaw"
+    NONE = "none"
+
+class ChannelSimulation(BaseModel):
+    band_low_hz: float = 300.0
+    band_high_hz: float = 3400.0
+    compression: bool = True
+    companding: CompandingType = CompandingType.MULAW
+    packet_loss: float = Field(0.0, ge=0.0, le=1.0)  # Fraction of 20 ms packets lost
+    jitter: float = Field(0.0, ge=0.0, le=1.0)  # Fraction of packets arriving too late, replaced by the previous one
+    seed: Optional[int] = None  # Fixes the packet loss and jitter pattern
+
+    @model_validator(mode='after')
+    def _check_band(self) -> 'ChannelSimulation':
+        if not 0 < self.band_low_hz < self.band_high_hz:
+            raise ValueError("band_low_hz must be above 0 and below band_high_hz")
+        return self
+
 class AudioSettings(BaseModel):
     sampling_rate: int = 16000  # 8000, 16000, 32000, 48000
     channels: int = 1  # 1 for mono, 2 for stereo
     generate_audio: bool = True
     save_audio_locally: bool = True
+    channel_simulation: Optional[ChannelSimulation] = None  # Telephone line post-processing, off when not set
+
+    @model_validator(mode='after')
+    def _check_channel_band(self) -> 'AudioSettings':
+        if self.channel_simulation and self.channel_simulation.band_high_hz >= self.sampling_rate / 2:
+            raise ValueError(f"channel_simulation.band_high_hz must be below half the sampling rate ({self.sampling_rate / 2:g} Hz)")
+        return self
 
 class CallGenerationRequest(BaseModel):
     scenarios: List[ScenarioType]
@@ -31,6 +63,7 @@ class CallGenerationRequest(BaseModel):
     num_calls: int = 5
     audio_settings: AudioSettings = AudioSettings()
     save_transcripts_locally: bool = True
+    priority: PriorityType = PriorityType.NORMAL
 
 class TranscriptData(BaseModel):
     transcript: str
@@ -48,7 +81,36 @@ class GeneratedCall(BaseModel):
     audio_file_url: Optional[str] = None
     transcript_file_url: Optional[str] = None
 
+class FailedCall(BaseModel):
+    id: int
+    scenario: str
+    error: str
+    attempts: int
+
+class CallSearchResult(BaseModel):
+    session_id: str
+    call_id: int
+    scenario: str
+    sentiment: str
+    duration_minutes: Optional[int] = None
+    participants: List[str]
+    synthetic_data: Dict[str, Any]
+    transcript_file_url: Optional[str] = None
+    audio_file_url: Optional[str] = None
+
+class CallSearchResponse(BaseModel):
+    results: List[CallSearchResult]
+    next_cursor: Optional[str] = None
+
+class SessionCallsResponse(BaseModel):
+    session_id: str
+    calls: List[Dict[str, Any]]
+    total_calls: int
+    next_cursor: Optional[str] = None
+
 class CallGenerationResponse(BaseModel):
     calls: List[GeneratedCall]
     total_calls: int
     generation_time: float
+    session_id: Optional[str] = None
+    failed_calls: List[FailedCall] = []
@@ -0,0 +1,237 @@
+import os
+import re
+import gzip
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+try:
+    import brotli
+except ImportError:  # Optional ('brotli' extra): responses fall back to gzip
+    brotli = None
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+COMPRESSION_MIN_BYTES = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 5
+
+_BYTE_RANGE_SPEC = re.compile(r'\s*([0-9]*)\s*-\s*([0-9]*)\s*$')
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range header cannot be satisfied for the artifact size."""
+
+
+def bytes_etag(content: Union[bytes, memoryview]) -> str:
+    """Strong ETag for in-memory content, derived from its bytes."""
+    return f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+
+def file_validators(path: str) -> Tuple[str, float, int]:
+    """Return (strong ETag, mtime, size) for a file on disk from a single stat call."""
+    stat = os.stat(path)
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}-{stat.st_ino:x}"'
+    return etag, stat.st_mtime, stat.st_size
+
+
+def parse_range_header(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single byte range into inclusive (start, end) offsets.
+
+    Returns None when the whole representation should be sent (no header, an
+    unsupported unit, a multi-range request or a syntactically invalid range, which
+    RFC 9110 says to ignore). Raises RangeNotSatisfiable for a valid range that starts
+    beyond the end of the representation, or a zero-length suffix.
+    """
+    if not range_header:
+        return None
+
+    unit, _, ranges = range_header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in ranges:
+        return None
+
+    match = _BYTE_RANGE_SPEC.match(ranges)
+    if not match or not any(match.groups()):
+        return None
+    start_text, end_text = match.groups()
+
+    if start_text == '':
+        suffix = int(end_text)
+        if suffix == 0:
+            raise RangeNotSatisfiable(range_header)
+        start = max(size - suffix, 0)
+        end = size - 1
+    else:
+        start = int(start_text)
+        if end_text:
+            end = int(end_text)
+            if end < start:
+                return None  # Invalid byte-range-spec, e.g. bytes=100-50
+            end = min(end, size - 1)
+        else:
+            end = size - 1
+
+    if start >= size:
+        raise RangeNotSatisfiable(range_header)
+
+    return start, end
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == '*':
+        return True
+    candidates = [candidate.strip() for candidate in header.split(',')]
+    bare_etag = etag[2:] if etag.startswith('W/') else etag
+    return any((candidate[2:] if candidate.startswith('W/') else candidate) == bare_etag for candidate in candidates)
+
+
+def _not_modified(request: Request, etag: str, last_modified: float) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(last_modified) <= since
+
+    return False
+
+
+def _range_allowed(request: Request, etag: str) -> bool:
+    """Honour If-Range: only serve a partial response if the validator still matches."""
+    if_range = request.headers.get('if-range')
+    if if_range is None:
+        return True
+    return if_range.strip() == etag
+
+
+def _iter_file(path: str, start: int, length: int) -> Iterator[bytes]:
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def artifact_response(
+    request: Request,
+    media_type: str,
+    filename: str,
+    path: Optional[str] = None,
+    content: Optional[bytes] = None,
+    etag: Optional[str] = None,
+    last_modified: Optional[float] = None
+) -> Response:
+    """Serve an artifact from disk or memory with ETag, conditional GET and byte-range support.
+
+    In-memory content is sliced through a memoryview so partial responses never copy
+    the underlying buffer; files are streamed from the requested offset.
+    """
+    if path is not None:
+        file_etag, file_mtime, size = file_validators(path)
+        etag = etag or file_etag
+        last_modified = last_modified if last_modified is not None else file_mtime
+    else:
+        size = len(content)
+        etag = etag or bytes_etag(content)
+        last_modified = last_modified if last_modified is not None else 0.0
+
+    headers = {
+        'Accept-Ranges': 'bytes',
+        'ETag': etag,
+        'Last-Modified': formatdate(last_modified, usegmt=True),
+        'Content-Disposition': f'attachment; filename={filename}'
+    }
+
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if _range_allowed(request, etag):
+        try:
+            byte_range = parse_range_header(request.headers.get('range'), size)
+        except RangeNotSatisfiable:
+            headers['Content-Range'] = f'bytes */{size}'
+            return Response(status_code=416, headers=headers)
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    length = end - start + 1 if size else 0
+
+    if path is None:
+        return Response(
+            content=memoryview(content)[start:start + length],
+            status_code=status_code,
+            media_type=media_type,
+            headers=headers
+        )
+
+    headers['Content-Length'] = str(length)
+    return StreamingResponse(
+        _iter_file(path, start, length),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers
+    )
+
+
+def _accepted_encodings(accept_encoding: Optional[str]) -> Dict[str, float]:
+    encodings = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        encodings[name.strip().lower()] = quality
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick 'br' or 'gzip' from an Accept-Encoding header, preferring brotli on equal weight."""
+    accepted = _accepted_encodings(accept_encoding)
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def json_response(request: Request, body: bytes, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Return pre-serialized JSON, compressed with brotli or gzip when the client accepts it."""
+    headers = dict(headers or {})
+    headers['Vary'] = 'Accept-Encoding'
+
+    encoding = negotiate_encoding(request.headers.get('accept-encoding')) if len(body) >= COMPRESSION_MIN_BYTES else None
+    if encoding == 'br':
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+        headers['Content-Encoding'] = 'br'
+    elif encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        headers['Content-Encoding'] = 'gzip'
+
+    return Response(content=body, status_code=status_code, media_type='application/json', headers=headers)
@@ -1,7 +1,21 @@
-from .data_generator import SyntheticDataGenerator
-from .transcript_generator import TranscriptGenerator
-from .audio_generator import AudioGenerator
-from .azure_batch_audio_generator import AzureBatchAudioGenerator
-from .azure_openai_generator import AzureOpenAITranscriptGenerator
+import importlib
+
+# Backends pull in the Azure SDKs, pydub and Faker; import them only when first requested
+_EXPORTS = {
+    "SyntheticDataGenerator": ".data_generator",
+    "TranscriptGenerator": ".transcript_generator",
+    "AudioGenerator": ".audio_generator",
+    "AzureBatchAudioGenerator": ".azure_batch_audio_generator",
+    "AzureOpenAITranscriptGenerator": ".azure_openai_generator",
+}
 
 __all__ = ["SyntheticDataGenerator", "TranscriptGenerator", "AudioGenerator", "AzureBatchAudioGenerator", "AzureOpenAITranscriptGenerator"]
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,137 @@
+import io
+import os
+import time
+import tarfile
+import zipfile
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+ARCHIVE_CHUNK_SIZE = 64 * 1024
+
+ARCHIVE_FORMATS = {
+    'zip': {'extension': 'zip', 'media_type': 'application/zip'},
+    'tar': {'extension': 'tar', 'media_type': 'application/x-tar'}
+}
+
+# Extensions that are already compressed or incompressible PCM are stored, not deflated.
+STORED_EXTENSIONS = ('.wav', '.flac', '.ogg')
+
+
+class ArchiveEntry(NamedTuple):
+    """A file to include in an archive, backed either by a path on disk or by in-memory bytes."""
+    name: str
+    path: Optional[str] = None
+    content: Optional[bytes] = None
+    modified: Optional[float] = None
+
+
+class _StreamSink(io.RawIOBase):
+    """Unseekable write target that hands written bytes back to the generator."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _entry_size(entry: ArchiveEntry) -> int:
+    return os.path.getsize(entry.path) if entry.path is not None else len(entry.content)
+
+
+def _entry_modified(entry: ArchiveEntry) -> float:
+    if entry.modified is not None:
+        return entry.modified
+    if entry.path is not None:
+        return os.path.getmtime(entry.path)
+    return time.time()
+
+
+def _iter_entry_chunks(entry: ArchiveEntry) -> Iterator[memoryview]:
+    if entry.path is not None:
+        with open(entry.path, 'rb') as f:
+            while True:
+                chunk = f.read(ARCHIVE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield memoryview(chunk)
+    else:
+        view = memoryview(entry.content)
+        for offset in range(0, len(view), ARCHIVE_CHUNK_SIZE):
+            yield view[offset:offset + ARCHIVE_CHUNK_SIZE]
+
+
+def stream_zip(entries: Iterable[ArchiveEntry]) -> Iterator[bytes]:
+    """Yield a ZIP archive chunk by chunk without buffering whole members.
+
+    WAV and already-compressed audio are stored; text is deflated.
+    """
+    sink = _StreamSink()
+    with zipfile.ZipFile(sink, mode='w', allowZip64=True) as archive:
+        for entry in entries:
+            info = zipfile.ZipInfo(entry.name, date_time=time.localtime(_entry_modified(entry))[:6])
+            if entry.name.lower().endswith(STORED_EXTENSIONS):
+                info.compress_type = zipfile.ZIP_STORED
+            else:
+                info.compress_type = zipfile.ZIP_DEFLATED
+
+            with archive.open(info, mode='w', force_zip64=True) as member:
+                for chunk in _iter_entry_chunks(entry):
+                    member.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    data = sink.drain()
+    if data:
+        yield data
+
+
+def stream_tar(entries: Iterable[ArchiveEntry]) -> Iterator[bytes]:
+    """Yield an uncompressed POSIX tar archive, writing headers and member data as they are read."""
+    written = 0
+    for entry in entries:
+        info = tarfile.TarInfo(entry.name)
+        info.size = _entry_size(entry)
+        info.mtime = int(_entry_modified(entry))
+        info.mode = 0o644
+
+        header = info.tobuf(format=tarfile.PAX_FORMAT)
+        written += len(header)
+        yield header
+
+        for chunk in _iter_entry_chunks(entry):
+            written += len(chunk)
+            yield bytes(chunk)
+
+        remainder = info.size % tarfile.BLOCKSIZE
+        if remainder:
+            padding = tarfile.BLOCKSIZE - remainder
+            written += padding
+            yield tarfile.NUL * padding
+
+    end_of_archive = tarfile.NUL * (tarfile.BLOCKSIZE * 2)
+    written += len(end_of_archive)
+    record_padding = (tarfile.RECORDSIZE - written % tarfile.RECORDSIZE) % tarfile.RECORDSIZE
+    yield end_of_archive + tarfile.NUL * record_padding
+
+
+def stream_archive(archive_format: str, entries: Iterable[ArchiveEntry]) -> Iterator[bytes]:
+    if archive_format == 'zip':
+        return stream_zip(entries)
+    if archive_format == 'tar':
+        return stream_tar(entries)
+    raise ValueError(f"Unsupported archive format: {archive_format}")
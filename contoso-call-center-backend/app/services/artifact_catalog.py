@@ -0,0 +1,176 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'artifact_catalog.sqlite3')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    artifact_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    format TEXT NOT NULL,
+    session_id TEXT,
+    call_id INTEGER,
+    path TEXT,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (artifact_id, kind, format)
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_session ON artifacts (session_id, call_id);
+
+CREATE TABLE IF NOT EXISTS artifact_counts (
+    kind TEXT NOT NULL,
+    format TEXT NOT NULL,
+    files INTEGER NOT NULL DEFAULT 0,
+    in_memory INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (kind, format)
+);
+
+CREATE TRIGGER IF NOT EXISTS artifacts_count_insert AFTER INSERT ON artifacts
+BEGIN
+    INSERT OR IGNORE INTO artifact_counts (kind, format) VALUES (NEW.kind, NEW.format);
+    UPDATE artifact_counts
+       SET files = files + (NEW.path IS NOT NULL), in_memory = in_memory + (NEW.path IS NULL)
+     WHERE kind = NEW.kind AND format = NEW.format;
+END;
+
+CREATE TRIGGER IF NOT EXISTS artifacts_count_delete AFTER DELETE ON artifacts
+BEGIN
+    UPDATE artifact_counts
+       SET files = files - (OLD.path IS NOT NULL), in_memory = in_memory - (OLD.path IS NULL)
+     WHERE kind = OLD.kind AND format = OLD.format;
+END;
+"""
+
+SCHEMA_VERSION = 2
+
+# Version 1 counted artifacts per kind only, so every delivery variant counted as another audio file
+MIGRATE_COUNTS_BY_FORMAT = """
+DROP TRIGGER IF EXISTS artifacts_count_insert;
+DROP TRIGGER IF EXISTS artifacts_count_delete;
+DROP TABLE IF EXISTS artifact_counts;
+"""
+
+REBUILD_COUNTS = """
+INSERT INTO artifact_counts (kind, format, files, in_memory)
+SELECT kind, format, SUM(path IS NOT NULL), SUM(path IS NULL) FROM artifacts GROUP BY kind, format
+"""
+
+
+class ArtifactRecord(NamedTuple):
+    artifact_id: str
+    kind: str
+    format: str
+    session_id: Optional[str]
+    call_id: Optional[int]
+    path: Optional[str]
+    size: int
+    created_at: float
+
+
+class ArtifactCatalog:
+    """Persistent index of generated artifacts: session -> call -> artifact paths, sizes and formats.
+
+    Backed by SQLite so lookups, per-session listings and counters do not touch the
+    artifact directories. Artifacts kept in memory are recorded with a null path.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.environ.get('ARTIFACT_CATALOG_PATH') or DEFAULT_CATALOG_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            self._conn.executescript(
+                f"BEGIN IMMEDIATE; {MIGRATE_COUNTS_BY_FORMAT} {SCHEMA} {REBUILD_COUNTS}; "
+                f"PRAGMA user_version = {SCHEMA_VERSION}; COMMIT;"
+            )
+        else:
+            self._conn.executescript(SCHEMA)
+
+    def record(self, artifact_id: str, kind: str, format: str, size: int, path: Optional[str] = None,
+               session_id: Optional[str] = None, call_id: Optional[int] = None) -> ArtifactRecord:
+        """Add or replace an artifact entry. Call after the artifact has been written."""
+        record = ArtifactRecord(artifact_id, kind, format, session_id, call_id,
+                                os.path.abspath(path) if path else None, size, time.time())
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "DELETE FROM artifacts WHERE artifact_id = ? AND kind = ? AND format = ?",
+                (artifact_id, kind, format)
+            )
+            self._conn.execute("INSERT INTO artifacts VALUES (?, ?, ?, ?, ?, ?, ?, ?)", record)
+            self._conn.execute("COMMIT")
+        return record
+
+    def lookup(self, artifact_id: str, kind: str, format: str) -> Optional[ArtifactRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM artifacts WHERE artifact_id = ? AND kind = ? AND format = ?",
+                (artifact_id, kind, format)
+            ).fetchone()
+        return ArtifactRecord(*row) if row else None
+
+    def session_artifacts(self, session_id: str) -> List[ArtifactRecord]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM artifacts WHERE session_id = ? ORDER BY call_id, kind, format",
+                (session_id,)
+            ).fetchall()
+        return [ArtifactRecord(*row) for row in rows]
+
+    def remove(self, records: List[ArtifactRecord]) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "DELETE FROM artifacts WHERE artifact_id = ? AND kind = ? AND format = ?",
+                [(r.artifact_id, r.kind, r.format) for r in records]
+            )
+            self._conn.execute("COMMIT")
+
+    def remove_session(self, session_id: str) -> List[ArtifactRecord]:
+        """Drop a session's entries and return them so the caller can delete the artifacts."""
+        records = self.session_artifacts(session_id)
+        self.remove(records)
+        return records
+
+    def counts(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Counts of on-disk and in-memory artifacts by kind and format, maintained on write."""
+        with self._lock:
+            rows = self._conn.execute("SELECT kind, format, files, in_memory FROM artifact_counts").fetchall()
+        counts: Dict[str, Dict[str, Dict[str, int]]] = {}
+        for kind, format, files, in_memory in rows:
+            counts.setdefault(kind, {})[format] = {'files': files, 'in_memory': in_memory}
+        return counts
+
+    def update_path(self, record: ArtifactRecord, path: str) -> None:
+        """Point an existing entry at a relocated file (used by the layout migration)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE artifacts SET path = ? WHERE artifact_id = ? AND kind = ? AND format = ?",
+                (os.path.abspath(path), record.artifact_id, record.kind, record.format)
+            )
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM artifacts LIMIT 1").fetchone() is None
+
+    def import_directory(self, directory: str, kind: str, format: str, extension: str) -> int:
+        """One-off backfill of files written before the catalog existed (no session association).
+
+        Walks the whole tree, so files in any sharded layout (or left flat) are found.
+        """
+        count = 0
+        for dir_path, _, file_names in os.walk(directory):
+            for file_name in file_names:
+                artifact_id, _, file_extension = file_name.partition('.')
+                if file_extension != extension:
+                    continue  # Also skips temp files and cached delivery variants such as <id>.mulaw.wav
+                file_path = os.path.join(dir_path, file_name)
+                self.record(artifact_id, kind, format, os.path.getsize(file_path), path=file_path)
+                count += 1
+        return count
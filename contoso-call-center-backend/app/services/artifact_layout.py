@@ -0,0 +1,105 @@
+import os
+import re
+import uuid
+import hashlib
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, Optional, Union
+
+ARTIFACT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+ARTIFACT_DIRECTORIES = {
+    'audio': 'generated_audio',
+    'transcript': 'generated_transcripts'
+}
+
+ARTIFACT_LAYOUTS = ('flat', 'date', 'session', 'hash')
+
+_LEGACY_TIMESTAMP = re.compile(r'contoso_call_(\d{8})_\d{6}')
+
+
+def new_artifact_id(call_number: int, now: Optional[datetime] = None) -> str:
+    """Collision-free artifact id that keeps the familiar contoso_call_<timestamp>_..._call_<n> shape."""
+    now = now or datetime.now()
+    return f"contoso_call_{now.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:12]}_call_{call_number}"
+
+
+@contextmanager
+def atomic_path(path: str) -> Iterator[str]:
+    """Yield a temporary sibling path and rename it over `path` once the write succeeds.
+
+    Readers never observe a partially written artifact; a failed write leaves no file behind.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        yield temp_path
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def atomic_write(path: str, content: Union[bytes, str]) -> str:
+    """Write bytes or UTF-8 text to `path` via write-then-rename."""
+    with atomic_path(path) as temp_path:
+        if isinstance(content, str):
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        else:
+            with open(temp_path, 'wb') as f:
+                f.write(content)
+    return path
+
+
+class ArtifactLayout:
+    """Maps artifacts to sharded directories so no single directory grows unbounded.
+
+    Configured with ARTIFACT_LAYOUT:
+    - flat: generated_audio/<id>.wav (original behaviour)
+    - date: generated_audio/YYYY/MM/DD/<id>.wav (default)
+    - session: generated_audio/<session prefix>/<session id>/<id>.wav
+    - hash: generated_audio/<h0h1>/<h2h3>/<id>.wav, from a hash of the artifact id
+    """
+
+    def __init__(self, scheme: Optional[str] = None, root: Optional[str] = None):
+        scheme = (scheme or os.environ.get('ARTIFACT_LAYOUT', 'date')).lower()
+        if scheme not in ARTIFACT_LAYOUTS:
+            raise ValueError(f"Unknown artifact layout '{scheme}', expected one of {', '.join(ARTIFACT_LAYOUTS)}")
+        self.scheme = scheme
+        self.root = root or os.environ.get('ARTIFACT_ROOT') or ARTIFACT_ROOT
+
+    def base_directory(self, kind: str) -> str:
+        return os.path.join(self.root, ARTIFACT_DIRECTORIES[kind])
+
+    def directory_for(self, kind: str, artifact_id: str, session_id: Optional[str] = None,
+                      created: Optional[datetime] = None) -> str:
+        base = self.base_directory(kind)
+
+        if self.scheme == 'flat':
+            return base
+        if self.scheme == 'date':
+            created = created or datetime.now()
+            return os.path.join(base, created.strftime('%Y'), created.strftime('%m'), created.strftime('%d'))
+        if self.scheme == 'session':
+            session = session_id or 'unassigned'
+            return os.path.join(base, session[:2], session)
+
+        digest = hashlib.blake2b(artifact_id.encode('utf-8'), digest_size=4).hexdigest()
+        return os.path.join(base, digest[:2], digest[2:4])
+
+    def path_for(self, kind: str, artifact_id: str, extension: str, session_id: Optional[str] = None,
+                 created: Optional[datetime] = None) -> str:
+        return os.path.join(self.directory_for(kind, artifact_id, session_id, created), f"{artifact_id}.{extension}")
+
+
+def legacy_created_at(artifact_id: str, file_path: str) -> datetime:
+    """Creation date of a pre-existing artifact, from its id timestamp or else the file mtime."""
+    match = _LEGACY_TIMESTAMP.match(artifact_id)
+    if match:
+        return datetime.strptime(match.group(1), '%Y%m%d')
+    return datetime.fromtimestamp(os.path.getmtime(file_path))
+
+
+artifact_layout = ArtifactLayout()
@@ -6,9 +6,18 @@ from pydub import AudioSegment
 from pydub.generators import Sine
 import tempfile
 import os
-from typing import Dict, Optional, Tuple, Union
+import time
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, Optional, Union
 import base64
-import gender_guesser.detector as gender
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from .tracing import tracer
+from .artifact_layout import artifact_layout, atomic_path
+from .parsed_transcript import ParsedTranscript, Segment, gender_detector, parse_transcript
+from .cancellation import GenerationCancelled, check_cancelled
+from .channel_simulator import simulate_phone_line
 
 class AudioGenerator:
     def __init__(self):
@@ -22,10 +31,12 @@ class AudioGenerator:
                 'female': {'voice_name': 'en-GB-SoniaNeural'}   # UK English, professional female voice
             }
         }
+        self._stream_executor: Optional[ThreadPoolExecutor] = None
+        self._stream_lock = threading.Lock()
 
     def _detect_gender_from_name(self, name: str) -> str:
         """Detect gender from a given name. Returns 'male' or 'female'."""
-        d = gender.Detector()
+        d = gender_detector()
 
         first_name = name.split()[0] if ' ' in name else name
 
@@ -40,70 +51,87 @@ class AudioGenerator:
         else:
             return 'female'
 
-    def generate_audio(self, transcript: str, audio_settings: Dict, audio_id: Optional[str] = None, save_locally: bool = True) -> Optional[Union[str, bytes]]:
+    def open_stream(self, slot: Optional[Callable[[], ContextManager]] = None) -> 'TranscriptAudioStream':
+        """Start synthesizing a transcript line by line as it is generated.
+
+        `slot`, if given, is entered around each line's synthesis, e.g. to hold a TTS stage slot.
+        """
+        with self._stream_lock:
+            if self._stream_executor is None:
+                self._stream_executor = ThreadPoolExecutor(
+                    max_workers=int(os.environ.get('TTS_STREAM_WORKERS', '4')),
+                    thread_name_prefix='tts-stream'
+                )
+        return TranscriptAudioStream(self, self._stream_executor, slot)
+
+    def _synthesize_segment(self, segment: Segment) -> Optional[AudioSegment]:
+        """Synthesize one speaker line with the voice resolved for that speaker."""
+        check_cancelled()
+        with tracer.span('tts.segment', kind='segment', index=segment.index, speaker=segment.speaker, characters=len(segment.text)):
+            segment_audio = self._text_to_speech(segment.text, segment.voice)
+
+            if segment_audio:
+                segment_audio = self._apply_voice_characteristics(segment_audio, segment.speaker)
+            return segment_audio
+
+    def generate_audio(self, transcript: Union[str, ParsedTranscript], audio_settings: Dict, audio_id: Optional[str] = None, save_locally: bool = True, session_id: Optional[str] = None) -> Optional[Union[str, bytes]]:
         """Generate audio file from transcript. Returns file path if saving locally and audio_id provided, otherwise bytes."""
         try:
-            segments = self._parse_transcript(transcript)
+            parsed = parse_transcript(transcript) if isinstance(transcript, str) else transcript
+            segments = parsed.with_voices(self._get_voice_config)
 
             audio_segments = []
 
-            for i, (speaker, text) in enumerate(segments):
-                speaker_name = self._extract_name_from_speaker(speaker, transcript)
-                voice_config = self._get_voice_config(speaker, speaker_name)
+            with tracer.span('tts.synthesize', kind='stage', segments=len(segments)):
+                for i, segment in enumerate(segments):
+                    segment_audio = self._synthesize_segment(segment)
 
+                    if segment_audio:
+                        audio_segments.append(segment_audio)
 
-                segment_audio = self._text_to_speech(text, voice_config)
+                        if i < len(segments) - 1:
+                            pause = AudioSegment.silent(duration=500)  # 0.5 second pause
+                            audio_segments.append(pause)
 
-                if segment_audio:
-                    segment_audio = self._apply_voice_characteristics(segment_audio, speaker)
-                    audio_segments.append(segment_audio)
+            return self._finish_audio(audio_segments, audio_settings, audio_id, save_locally, session_id)
 
-                    if i < len(segments) - 1:
-                        pause = AudioSegment.silent(duration=500)  # 0.5 second pause
-                        audio_segments.append(pause)
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            print(f"Error generating audio: {e}")
+            import traceback
+            print(f"Full traceback: {traceback.format_exc()}")
+            return None
 
-            if not audio_segments:
-                return None
+    def _finish_audio(self, audio_segments: list, audio_settings: Dict, audio_id: Optional[str], save_locally: bool,
+                      session_id: Optional[str]) -> Optional[Union[str, bytes]]:
+        """Combine synthesized segments, apply the audio settings and save or return the WAV."""
+        if not audio_segments:
+            return None
 
-            print(f"Debug: About to combine {len(audio_segments)} audio segments")
+        if tracer.debug_enabled:
+            tracer.debug("About to combine %d audio segments", len(audio_segments))
             for i, segment in enumerate(audio_segments):
-                print(f"Debug: Segment {i}: type={type(segment)}, length={len(segment)}ms, channels={segment.channels}")
+                tracer.debug("Segment %d: length=%dms, channels=%d", i, len(segment), segment.channels)
 
+        with tracer.span('audio.combine', kind='stage'):
             combined_audio = self._combine_audio_segments(audio_segments)
 
             final_audio = self._apply_audio_settings(combined_audio, audio_settings)
-            print(f"Debug: Audio settings applied - Final length: {len(final_audio)}ms")
+        tracer.debug("Audio settings applied - Final length: %dms", len(final_audio))
+
+        if audio_settings.get('channel_simulation'):
+            with tracer.span('audio.channel', kind='stage', companding=audio_settings['channel_simulation'].get('companding')):
+                final_audio = self.simulate_phone_quality(final_audio, audio_settings['channel_simulation'])
 
+        with tracer.span('audio.export', kind='stage', save_locally=bool(audio_id and save_locally)):
             if audio_id and save_locally:
-                result = self._save_to_file(final_audio, audio_settings, audio_id)
-                print(f"Debug: File saved to: {result}")
+                result = self._save_to_file(final_audio, audio_settings, audio_id, session_id)
+                tracer.debug("File saved to: %s", result)
                 return result
             else:
                 return self._to_wav_bytes(final_audio, audio_settings)
 
-        except Exception as e:
-            print(f"Error generating audio: {e}")
-            import traceback
-            print(f"Full traceback: {traceback.format_exc()}")
-            return None
-
-    def _parse_transcript(self, transcript: str) -> list:
-        """Parse transcript into speaker segments."""
-        segments = []
-        lines = transcript.split('\n')
-
-        for line in lines:
-            line = line.strip()
-            if ':' in line and line:
-                parts = line.split(':', 1)
-                if len(parts) == 2:
-                    speaker = parts[0].strip()
-                    text = parts[1].strip()
-                    if text:  # Only add non-empty text
-                        segments.append((speaker, text))
-
-        return segments
-
     def _get_voice_config(self, speaker: str, speaker_name: Optional[str] = None) -> Dict:
         """Get voice configuration based on speaker type and name gender."""
         speaker_type = 'agent' if 'agent' in speaker.lower() else 'caller'
@@ -114,25 +142,6 @@ class AudioGenerator:
         else:
             return self.voice_settings[speaker_type]['female']
 
-    def _extract_name_from_speaker(self, speaker: str, transcript_text: Optional[str] = None) -> str:
-        """Extract the actual name from speaker label or transcript context."""
-        if 'Agent' in speaker and transcript_text:
-            import re
-            agent_intro_pattern = r'this is (\w+)'
-            match = re.search(agent_intro_pattern, transcript_text, re.IGNORECASE)
-            if match:
-                return match.group(1)
-
-        if 'Agent' in speaker:
-            parts = speaker.split()
-            if len(parts) > 1:
-                return ' '.join(parts[1:])  # Return everything after "Agent"
-            else:
-                return speaker  # Fallback to full speaker label
-        else:
-            name = speaker.replace('Dr.', '').replace('Mr.', '').replace('Ms.', '').replace('Mrs.', '').strip()
-            return name if name else speaker
-
     def _apply_voice_characteristics(self, audio: AudioSegment, speaker: str) -> AudioSegment:
         """Apply voice characteristics to differentiate speakers."""
         if 'agent' in speaker.lower():
@@ -169,7 +178,7 @@ class AudioGenerator:
             temp_filename = os.path.normpath(temp_filename)
             
             normalized_path = temp_filename.replace('\\', '/')
-            print(f"Debug: Azure SDK will create file at: {normalized_path}")
+            tracer.debug("Azure SDK will create file at: %s", normalized_path)
             audio_config = speechsdk.audio.AudioOutputConfig(filename=normalized_path)
             speech_synthesizer = speechsdk.SpeechSynthesizer(
                 speech_config=speech_config,
@@ -247,12 +256,12 @@ class AudioGenerator:
         wav_buffer = io.BytesIO()
 
         try:
-            print("Debug: Attempting direct WAV export to bytes (no ffmpeg dependency)...")
+            tracer.debug("Attempting direct WAV export to bytes (no ffmpeg dependency)...")
             audio.export(wav_buffer, format="wav")
-            print("Debug: Direct WAV export to bytes successful")
+            tracer.debug("Direct WAV export to bytes successful")
         except Exception as direct_error:
-            print(f"Debug: Direct WAV export to bytes failed: {direct_error}")
-            print("Debug: Trying WAV export to bytes with explicit parameters (requires ffmpeg)...")
+            tracer.debug("Direct WAV export to bytes failed: %s", direct_error)
+            tracer.debug("Trying WAV export to bytes with explicit parameters (requires ffmpeg)...")
             
             wav_buffer = io.BytesIO()  # Reset buffer
             audio.export(
@@ -264,54 +273,52 @@ class AudioGenerator:
                     "-ac", str(settings.get('channels', 1))  # Channels
                 ]
             )
-            print("Debug: Parametric WAV export to bytes successful")
+            tracer.debug("Parametric WAV export to bytes successful")
 
         wav_buffer.seek(0)
         return wav_buffer.getvalue()
 
-    def _save_to_file(self, audio: AudioSegment, settings: Dict, audio_id: str) -> str:
-        """Save AudioSegment to WAV file and return file path."""
+    def _save_to_file(self, audio: AudioSegment, settings: Dict, audio_id: str, session_id: Optional[str] = None) -> str:
+        """Save AudioSegment to WAV file (write-then-rename) in the configured layout and return file path."""
         import os
 
-        print(f"Debug: Saving audio - Length: {len(audio)}ms, Channels: {audio.channels}, Frame rate: {audio.frame_rate}")
-
-        audio_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'generated_audio')
-        os.makedirs(audio_dir, exist_ok=True)
+        tracer.debug("Saving audio - Length: %dms, Channels: %d, Frame rate: %d", len(audio), audio.channels, audio.frame_rate)
 
-        file_path = os.path.join(audio_dir, f"{audio_id}.wav")
-        print(f"Debug: Saving to file path: {file_path}")
+        file_path = artifact_layout.path_for('audio', audio_id, 'wav', session_id=session_id)
+        tracer.debug("Saving to file path: %s", file_path)
 
         try:
-            try:
-                print("Debug: Attempting direct WAV export (no ffmpeg dependency)...")
-                audio.export(file_path, format="wav")
-                print("Debug: Direct WAV export successful")
-            except Exception as direct_error:
-                print(f"Debug: Direct WAV export failed: {direct_error}")
-                print("Debug: Trying WAV export with explicit parameters (requires ffmpeg)...")
-                
-                audio.export(
-                    file_path,
-                    format="wav",
-                    parameters=[
-                        "-acodec", "pcm_s16le",  # 16-bit PCM
-                        "-ar", str(settings.get('sampling_rate', 16000)),  # Sample rate
-                        "-ac", str(settings.get('channels', 1))  # Channels
-                    ]
-                )
-                print("Debug: Parametric WAV export successful")
+            with atomic_path(file_path) as temp_path:
+                try:
+                    tracer.debug("Attempting direct WAV export (no ffmpeg dependency)...")
+                    audio.export(temp_path, format="wav")
+                    tracer.debug("Direct WAV export successful")
+                except Exception as direct_error:
+                    tracer.debug("Direct WAV export failed: %s", direct_error)
+                    tracer.debug("Trying WAV export with explicit parameters (requires ffmpeg)...")
+                    
+                    audio.export(
+                        temp_path,
+                        format="wav",
+                        parameters=[
+                            "-acodec", "pcm_s16le",  # 16-bit PCM
+                            "-ar", str(settings.get('sampling_rate', 16000)),  # Sample rate
+                            "-ac", str(settings.get('channels', 1))  # Channels
+                        ]
+                    )
+                    tracer.debug("Parametric WAV export successful")
             
             if os.path.exists(file_path):
                 file_size = os.path.getsize(file_path)
-                print(f"Debug: File created successfully - Size: {file_size} bytes")
+                tracer.debug("File created successfully - Size: %d bytes", file_size)
                 if file_size == 0:
-                    print("Debug: WARNING - File has 0 bytes!")
+                    tracer.debug("WARNING - File has 0 bytes!")
                 return file_path
             else:
                 raise FileNotFoundError(f"File was not created: {file_path}")
                 
         except Exception as e:
-            print(f"Debug: Error during audio export: {e}")
+            tracer.debug("Error during audio export: %s", e)
             import traceback
             print(f"Full export traceback: {traceback.format_exc()}")
             raise
@@ -326,24 +333,24 @@ class AudioGenerator:
         if len(audio_segments) == 1:
             return audio_segments[0]
         
-        print(f"Debug: Combining {len(audio_segments)} audio segments")
+        tracer.debug("Combining %d audio segments", len(audio_segments))
         
         try:
             combined_audio = sum(audio_segments)
-            print("Debug: sum() method successful")
+            tracer.debug("sum() method successful")
             return combined_audio
         except Exception as e:
-            print(f"Debug: sum() method failed: {e}, trying alternative...")
+            tracer.debug("sum() method failed: %s, trying alternative...", e)
             
             try:
                 combined_audio = audio_segments[0]
                 for i, segment in enumerate(audio_segments[1:], 1):
-                    print(f"Debug: Adding segment {i}")
+                    tracer.debug("Adding segment %d", i)
                     combined_audio = combined_audio + segment
-                print("Debug: Manual combination successful")
+                tracer.debug("Manual combination successful")
                 return combined_audio
             except Exception as e2:
-                print(f"Debug: Manual combination also failed: {e2}")
+                tracer.debug("Manual combination also failed: %s", e2)
                 raise Exception(f"Both combination methods failed: sum() error: {e}, manual error: {e2}")
 
     def _safe_delete_temp_file(self, temp_filename: str) -> None:
@@ -364,14 +371,83 @@ class AudioGenerator:
                 else:
                     print(f"Warning: Could not delete temporary file {temp_filename}: {e}")
 
-    def simulate_phone_quality(self, audio: AudioSegment) -> AudioSegment:
-        """Apply phone-like audio filtering."""
-
-
-        audio = audio.low_pass_filter(3400)
+    def simulate_phone_quality(self, audio: AudioSegment, settings: Optional[Dict] = None) -> AudioSegment:
+        """Apply a telephone channel (band-pass, compression, companding, packet artifacts); see channel_simulator."""
+        return simulate_phone_line(audio, settings)
+
+
+class TranscriptAudioStream:
+    """Synthesizes transcript lines as soon as they are generated.
+
+    Each complete 'Speaker: text' line passed to `submit` is dispatched to the shared TTS
+    worker pool immediately; `finish` waits for the outstanding segments and assembles them
+    in transcript order, so synthesis overlaps with the rest of the LLM completion.
+    Each line holds a `slot` while it is synthesized, so streamed calls share the same
+    TTS concurrency limit as whole-transcript synthesis.
+    """
+
+    def __init__(self, generator: AudioGenerator, executor: ThreadPoolExecutor,
+                 slot: Optional[Callable[[], ContextManager]] = None):
+        self._generator = generator
+        self._executor = executor
+        self._slot = slot or nullcontext
+        self._cancelled = False
+        self._parsed = ParsedTranscript()
+        self._voices: Dict[tuple, Dict] = {}
+        self._futures: list = []
+        self._started = time.time()
+        self.first_segment_seconds: Optional[float] = None
+
+    def submit(self, line: str) -> None:
+        segment = self._parsed.add_line(line)
+        if segment is None:
+            return
+
+        key = (segment.speaker, segment.name)
+        if key not in self._voices:
+            self._voices[key] = self._generator._get_voice_config(segment.speaker, segment.name)
+        segment = segment._replace(voice=self._voices[key])
+
+        context = contextvars.copy_context()
+        future = self._executor.submit(context.run, self._synthesize_segment, segment)
+        future.add_done_callback(self._segment_done)
+        self._futures.append(future)
+
+    def _synthesize_segment(self, segment: Segment) -> Optional[AudioSegment]:
+        with self._slot():
+            if self._cancelled:  # Cancelled while waiting for the slot
+                return None
+            return self._generator._synthesize_segment(segment)
 
-        audio = audio.high_pass_filter(300)
+    def _segment_done(self, future: Future) -> None:
+        if self.first_segment_seconds is None and not future.cancelled():
+            self.first_segment_seconds = time.time() - self._started
 
-        audio = audio.compress_dynamic_range()
+    def cancel(self) -> None:
+        self._cancelled = True
+        for future in self._futures:
+            future.cancel()
 
-        return audio
+    def finish(self, audio_settings: Dict, audio_id: Optional[str] = None, save_locally: bool = True,
+               session_id: Optional[str] = None) -> Optional[Union[str, bytes]]:
+        """Wait for every submitted line and combine them like AudioGenerator.generate_audio."""
+        try:
+            with tracer.span('tts.synthesize', kind='stage', segments=len(self._futures), streamed=True) as span:
+                audio_segments = []
+                for i, future in enumerate(self._futures):
+                    segment_audio = future.result()
+                    if segment_audio:
+                        audio_segments.append(segment_audio)
+                        if i < len(self._futures) - 1:
+                            audio_segments.append(AudioSegment.silent(duration=500))
+                span.set_attribute('first_segment_seconds', self.first_segment_seconds)
+
+            return self._generator._finish_audio(audio_segments, audio_settings, audio_id, save_locally, session_id)
+
+        except GenerationCancelled:
+            self.cancel()
+            raise
+        except Exception as e:
+            print(f"Error generating streamed audio: {e}")
+            self.cancel()
+            return None
@@ -0,0 +1,165 @@
+import io
+import os
+import struct
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from math import gcd
+from typing import TYPE_CHECKING, Dict, Optional
+
+from .tracing import tracer
+from .artifact_layout import atomic_write
+
+if TYPE_CHECKING:
+    import numpy as np
+    from pydub import AudioSegment
+
+DELIVERY_FORMATS = {
+    'wav': {
+        'name': 'WAV (Microsoft PCM, 16-bit)',
+        'extension': 'wav',
+        'media_type': 'audio/wav'
+    },
+    'flac': {
+        'name': 'FLAC (lossless)',
+        'extension': 'flac',
+        'media_type': 'audio/flac'
+    },
+    'opus': {
+        'name': 'Opus in Ogg (24 kbps)',
+        'extension': 'ogg',
+        'media_type': 'audio/ogg'
+    },
+    'mulaw': {
+        'name': 'G.711 mu-law WAV (8 kHz mono, telephony)',
+        'extension': 'mulaw.wav',
+        'media_type': 'audio/wav'
+    }
+}
+
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+OPUS_BITRATE = '24k'
+MULAW_SAMPLE_RATE = 8000
+WAVE_FORMAT_MULAW = 7
+
+
+def variant_filename(audio_id: str, audio_format: str) -> str:
+    """File name of a delivery variant, stored alongside the original WAV."""
+    return f"{audio_id}.{DELIVERY_FORMATS[audio_format]['extension']}"
+
+
+def _mulaw_encode(samples: 'np.ndarray') -> bytes:
+    """Encode 16-bit PCM samples as G.711 mu-law bytes."""
+    import numpy as np
+
+    bias = 0x84
+    clip = 32635
+
+    pcm = samples.astype(np.int32)
+    sign = np.where(pcm < 0, 0x80, 0x00)
+    magnitude = np.minimum(np.abs(pcm), clip) + bias
+
+    exponent = np.floor(np.log2(magnitude)).astype(np.int32) - 7
+    exponent = np.clip(exponent, 0, 7)
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+
+    encoded = ~(sign | (exponent << 4) | mantissa) & 0xFF
+    return encoded.astype(np.uint8).tobytes()
+
+
+def _mulaw_wav(payload: bytes, sample_rate: int) -> bytes:
+    """Wrap mu-law bytes in a RIFF/WAVE container (format tag 7)."""
+    fmt_chunk = struct.pack('<4sIHHIIHHH', b'fmt ', 18, WAVE_FORMAT_MULAW, 1, sample_rate, sample_rate, 1, 8, 0)
+    fact_chunk = struct.pack('<4sII', b'fact', 4, len(payload))
+    data_header = struct.pack('<4sI', b'data', len(payload))
+    padding = b'\x00' if len(payload) % 2 else b''
+    riff_size = 4 + len(fmt_chunk) + len(fact_chunk) + len(data_header) + len(payload) + len(padding)
+    return b''.join([struct.pack('<4sI4s', b'RIFF', riff_size, b'WAVE'), fmt_chunk, fact_chunk, data_header, payload, padding])
+
+
+class AudioTranscoder:
+    """Transcodes generated WAV audio into compressed delivery formats in a worker pool.
+
+    Each variant is produced at most once: concurrent first requests for the same
+    variant share a single transcode job, and results are cached by the caller's store.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        if max_workers is None:
+            max_workers = int(os.environ.get('AUDIO_TRANSCODE_WORKERS', '2'))
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='transcode')
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def transcode(self, wav_bytes: bytes, audio_format: str) -> bytes:
+        """Transcode WAV bytes to the requested delivery format."""
+        if audio_format not in DELIVERY_FORMATS:
+            raise ValueError(f"Unsupported audio format: {audio_format}")
+        if audio_format == 'wav':
+            return wav_bytes
+
+        from pydub import AudioSegment
+
+        with tracer.span('audio.transcode', kind='stage', format=audio_format, source_bytes=len(wav_bytes)):
+            audio = AudioSegment.from_wav(io.BytesIO(wav_bytes))
+
+            if audio_format == 'mulaw':
+                return self._to_mulaw(audio)
+
+            buffer = io.BytesIO()
+            if audio_format == 'flac':
+                audio.export(buffer, format='flac')
+            else:
+                parameters = [] if audio.frame_rate in OPUS_SAMPLE_RATES else ['-ar', '48000']
+                audio.export(buffer, format='ogg', codec='libopus', bitrate=OPUS_BITRATE, parameters=parameters)
+            return buffer.getvalue()
+
+    def _to_mulaw(self, audio: 'AudioSegment') -> bytes:
+        import numpy as np
+        from scipy.signal import resample_poly
+
+        audio = audio.set_channels(1).set_sample_width(2)
+        samples = np.frombuffer(audio.raw_data, dtype=np.int16).astype(np.float64)
+
+        if audio.frame_rate != MULAW_SAMPLE_RATE:
+            divisor = gcd(audio.frame_rate, MULAW_SAMPLE_RATE)
+            samples = resample_poly(samples, MULAW_SAMPLE_RATE // divisor, audio.frame_rate // divisor)
+
+        samples = np.clip(np.round(samples), -32768, 32767).astype(np.int16)
+        return _mulaw_wav(_mulaw_encode(samples), MULAW_SAMPLE_RATE)
+
+    def _transcode_file(self, source_path: str, audio_format: str) -> str:
+        target_path = os.path.join(
+            os.path.dirname(source_path),
+            variant_filename(os.path.splitext(os.path.basename(source_path))[0], audio_format)
+        )
+        if os.path.exists(target_path):
+            return target_path
+
+        with open(source_path, 'rb') as f:
+            encoded = self.transcode(f.read(), audio_format)
+
+        return atomic_write(target_path, encoded)
+
+    def _submit_once(self, key: str, fn, *args) -> Future:
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._executor.submit(fn, *args)
+                self._inflight[key] = future
+                future.add_done_callback(lambda _: self._release(key))
+            return future
+
+    def _release(self, key: str) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    async def variant_file(self, source_path: str, audio_format: str) -> str:
+        """Return the path of the on-disk variant, transcoding it on first request."""
+        future = self._submit_once(f"file:{source_path}:{audio_format}", self._transcode_file, source_path, audio_format)
+        return await asyncio.wrap_future(future)
+
+    async def variant_bytes(self, key: str, wav_bytes: bytes, audio_format: str) -> bytes:
+        """Transcode in-memory audio in the worker pool; callers cache the result."""
+        future = self._submit_once(f"memory:{key}:{audio_format}", self.transcode, wav_bytes, audio_format)
+        return await asyncio.wrap_future(future)
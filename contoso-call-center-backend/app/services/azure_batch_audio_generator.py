@@ -2,13 +2,17 @@ import json
 import time
 import requests
 import os
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, Optional, Union
 import uuid
 from datetime import datetime
-import gender_guesser.detector as gender
 import zipfile
 import io
 from pydub import AudioSegment
+from .tracing import tracer
+from .artifact_layout import artifact_layout, atomic_write
+from .parsed_transcript import ParsedTranscript, gender_detector, parse_transcript
+from .cancellation import GenerationCancelled, cancellable_sleep, check_cancelled
+from .channel_simulator import simulate_wav
 
 
 class AzureBatchAudioGenerator:
@@ -30,7 +34,7 @@ class AzureBatchAudioGenerator:
 
     def _detect_gender_from_name(self, name: str) -> str:
         """Detect gender from a given name. Returns 'male' or 'female'."""
-        d = gender.Detector()
+        d = gender_detector()
         first_name = name.split()[0] if ' ' in name else name
         first_name = first_name.replace('Dr.', '').replace('Mr.', '').replace('Ms.', '').replace('Mrs.', '').strip()
         
@@ -43,25 +47,6 @@ class AzureBatchAudioGenerator:
         else:
             return 'female'
 
-    def _extract_name_from_speaker(self, speaker: str, transcript_text: Optional[str] = None) -> str:
-        """Extract the actual name from speaker label or transcript context."""
-        if 'Agent' in speaker and transcript_text:
-            import re
-            agent_intro_pattern = r'this is (\w+)'
-            match = re.search(agent_intro_pattern, transcript_text, re.IGNORECASE)
-            if match:
-                return match.group(1)
-
-        if 'Agent' in speaker:
-            parts = speaker.split()
-            if len(parts) > 1:
-                return ' '.join(parts[1:])
-            else:
-                return speaker
-        else:
-            name = speaker.replace('Dr.', '').replace('Mr.', '').replace('Ms.', '').replace('Mrs.', '').strip()
-            return name if name else speaker
-
     def _get_voice_config(self, speaker: str, speaker_name: Optional[str] = None) -> Dict:
         """Get voice configuration based on speaker type and name gender."""
         speaker_type = 'agent' if 'agent' in speaker.lower() else 'caller'
@@ -72,35 +57,18 @@ class AzureBatchAudioGenerator:
         else:
             return self.voice_settings[speaker_type]['female']
 
-    def _parse_transcript(self, transcript: str) -> List[Tuple[str, str]]:
-        """Parse transcript into speaker segments."""
-        segments = []
-        lines = transcript.split('\n')
-
-        for line in lines:
-            line = line.strip()
-            if ':' in line and line:
-                parts = line.split(':', 1)
-                if len(parts) == 2:
-                    speaker = parts[0].strip()
-                    text = parts[1].strip()
-                    if text:
-                        segments.append((speaker, text))
-
-        return segments
-
-    def _create_ssml_document(self, transcript: str) -> str:
+    def _create_ssml_document(self, transcript: Union[str, ParsedTranscript]) -> str:
         """Create SSML document from transcript with multiple speakers and pauses."""
-        segments = self._parse_transcript(transcript)
+        parsed = parse_transcript(transcript) if isinstance(transcript, str) else transcript
+        segments = parsed.with_voices(self._get_voice_config)
         
         ssml_parts = ['<speak version="1.0" xml:lang="en-US">']
         
-        for i, (speaker, text) in enumerate(segments):
-            speaker_name = self._extract_name_from_speaker(speaker, transcript)
-            voice_config = self._get_voice_config(speaker, speaker_name)
-            voice_name = voice_config['voice_name']
+        for i, segment in enumerate(segments):
+            voice_name = segment.voice['voice_name']
+            text = segment.text
             
-            if 'agent' in speaker.lower():
+            if segment.role == 'agent':
                 rate = "1.05"
                 volume = "+2dB"
             else:
@@ -148,18 +116,22 @@ class AzureBatchAudioGenerator:
             }
         }
         
-        print(f"Debug: Speech key length: {len(self.speech_key) if self.speech_key else 'None'}")
-        print(f"Debug: Speech region: {self.speech_region}")
-        print(f"Debug: Submitting to URL: {url}")
-        print(f"Debug: Headers: {headers}")
-        print(f"Debug: SSML content length: {len(ssml_content)}")
-        print(f"Debug: Payload: {json.dumps(payload, indent=2)}")
+        tracer.set_attribute('batch.synthesis_id', synthesis_id)
+        if tracer.debug_enabled:
+            tracer.debug("Speech key configured: %s", bool(self.speech_key))
+            tracer.debug("Speech region: %s", self.speech_region)
+            tracer.debug("Submitting to URL: %s", url)
+            tracer.debug("SSML content length: %d", len(ssml_content))
+            tracer.debug("Payload: %s", json.dumps(payload, indent=2))
         
-        response = requests.put(url, headers=headers, json=payload)
+        with tracer.span('batch.submit', kind='stage', synthesis_id=synthesis_id, ssml_characters=len(ssml_content)) as span:
+            response = requests.put(url, headers=headers, json=payload)
+            span.set_attribute('http.status_code', response.status_code)
         
-        print(f"Debug: Response status: {response.status_code}")
-        print(f"Debug: Response headers: {dict(response.headers)}")
-        print(f"Debug: Response text: {response.text}")
+        if tracer.debug_enabled:
+            tracer.debug("Response status: %d", response.status_code)
+            tracer.debug("Response headers: %s", dict(response.headers))
+            tracer.debug("Response text: %s", response.text)
         
         if response.status_code == 201:
             job_data = response.json()
@@ -200,14 +172,14 @@ class AzureBatchAudioGenerator:
                 job_data = response.json()
                 status = job_data.get('status')
                 
-                print(f"Debug: Batch job {job_id} status: {status}")
+                tracer.debug("Batch job %s status: %s", job_id, status)
                 
                 if status == 'Succeeded':
                     return job_data
                 elif status == 'Failed':
                     raise Exception(f"Batch synthesis job failed: {job_data.get('properties', {}).get('error', 'Unknown error')}")
                 elif status in ['NotStarted', 'Running']:
-                    time.sleep(5)  # Wait 5 seconds before next poll
+                    cancellable_sleep(5)  # Wait 5 seconds before next poll
                     continue
                 else:
                     raise Exception(f"Unknown job status: {status}")
@@ -216,6 +188,17 @@ class AzureBatchAudioGenerator:
         
         raise Exception(f"Job {job_id} timed out after {timeout} seconds")
 
+    def _delete_batch_job(self, job_id: str) -> None:
+        """Delete a batch synthesis; stops it if still running and removes its results."""
+        url = f"{self.base_url}/texttospeech/batchsyntheses/{job_id}?api-version=2024-04-01"
+        
+        with tracer.span('batch.delete', kind='stage', synthesis_id=job_id) as span:
+            try:
+                response = requests.delete(url, headers={'Ocp-Apim-Subscription-Key': self.speech_key})
+                span.set_attribute('http.status_code', response.status_code)
+            except requests.RequestException as e:
+                tracer.error("Failed to delete batch synthesis %s: %s", job_id, e)
+
     def _download_audio_result(self, job_data: Dict) -> bytes:
         """Download the synthesized audio from the job results."""
         outputs = job_data.get('outputs', {})
@@ -224,7 +207,7 @@ class AzureBatchAudioGenerator:
         if not result_url:
             raise Exception("No result URL found in job data")
         
-        print(f"Debug: Downloading audio from: {result_url}")
+        tracer.debug("Downloading audio from: %s", result_url)
         
         response = requests.get(result_url)
         
@@ -238,29 +221,44 @@ class AzureBatchAudioGenerator:
         else:
             raise Exception(f"Failed to download audio: {response.status_code} - {response.text}")
 
-    def generate_audio(self, transcript: str, audio_settings: Dict, audio_id: Optional[str] = None, save_locally: bool = True) -> Optional[Union[str, bytes]]:
+    def generate_audio(self, transcript: Union[str, ParsedTranscript], audio_settings: Dict, audio_id: Optional[str] = None, save_locally: bool = True, session_id: Optional[str] = None) -> Optional[Union[str, bytes]]:
         """Generate audio using Azure Batch Synthesis API."""
         try:
-            print(f"Debug: Starting batch synthesis for audio_id: {audio_id}")
+            tracer.debug("Starting batch synthesis for audio_id: %s", audio_id)
             
-            ssml_content = self._create_ssml_document(transcript)
-            print(f"Debug: Generated SSML length: {len(ssml_content)} characters")
+            with tracer.span('batch.ssml', kind='stage'):
+                ssml_content = self._create_ssml_document(transcript)
+            tracer.debug("Generated SSML length: %d characters", len(ssml_content))
             
             job_name = audio_id or f"batch_job_{int(time.time())}"
+            check_cancelled()
             job_id = self._submit_batch_job(ssml_content, audio_settings, job_name)
-            print(f"Debug: Submitted batch job with ID: {job_id}")
+            tracer.debug("Submitted batch job with ID: %s", job_id)
             
-            job_data = self._poll_job_status(job_id)
-            print(f"Debug: Job completed successfully")
+            try:
+                with tracer.span('batch.poll', kind='stage', synthesis_id=job_id):
+                    job_data = self._poll_job_status(job_id)
+            except GenerationCancelled:
+                self._delete_batch_job(job_id)
+                raise
+            tracer.debug("Job completed successfully")
             
-            audio_bytes = self._download_audio_result(job_data)
-            print(f"Debug: Downloaded audio, size: {len(audio_bytes)} bytes")
+            with tracer.span('batch.download', kind='stage', synthesis_id=job_id) as span:
+                audio_bytes = self._download_audio_result(job_data)
+                span.set_attribute('bytes', len(audio_bytes))
+            tracer.debug("Downloaded audio, size: %d bytes", len(audio_bytes))
+            
+            if audio_settings.get('channel_simulation'):
+                with tracer.span('audio.channel', kind='stage', companding=audio_settings['channel_simulation'].get('companding')):
+                    audio_bytes = simulate_wav(audio_bytes, audio_settings['channel_simulation'])
             
             if audio_id and save_locally:
-                return self._save_audio_to_file(audio_bytes, audio_id)
+                return self._save_audio_to_file(audio_bytes, audio_id, session_id)
             else:
                 return audio_bytes
                 
+        except GenerationCancelled:
+            raise
         except Exception as e:
             print(f"Error in batch audio generation: {e}")
             import traceback
@@ -269,7 +267,7 @@ class AzureBatchAudioGenerator:
 
     def _handle_zip_audio_result(self, zip_content: bytes) -> bytes:
         """Handle ZIP archive containing multiple audio files and concatenate them."""
-        print("Debug: Processing ZIP archive with multiple audio files")
+        tracer.debug("Processing ZIP archive with multiple audio files")
         
         try:
             with zipfile.ZipFile(io.BytesIO(zip_content), 'r') as zip_file:
@@ -279,7 +277,7 @@ class AzureBatchAudioGenerator:
                 if not audio_files:
                     raise Exception("No audio files found in ZIP archive")
                 
-                print(f"Debug: Found {len(audio_files)} audio files in ZIP: {audio_files}")
+                tracer.debug("Found %d audio files in ZIP: %s", len(audio_files), audio_files)
                 
                 combined_audio = None
                 
@@ -298,22 +296,17 @@ class AzureBatchAudioGenerator:
                 output_buffer = io.BytesIO()
                 combined_audio.export(output_buffer, format="wav")
                 
-                print(f"Debug: Successfully concatenated {len(audio_files)} audio files")
+                tracer.debug("Successfully concatenated %d audio files", len(audio_files))
                 return output_buffer.getvalue()
                 
         except Exception as e:
             print(f"Error processing ZIP audio result: {e}")
             raise Exception(f"Failed to process ZIP audio result: {e}")
 
-    def _save_audio_to_file(self, audio_bytes: bytes, audio_id: str) -> str:
-        """Save audio bytes to file and return file path."""
-        audio_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'generated_audio')
-        os.makedirs(audio_dir, exist_ok=True)
-        
-        file_path = os.path.join(audio_dir, f"{audio_id}.wav")
-        
-        with open(file_path, 'wb') as f:
-            f.write(audio_bytes)
+    def _save_audio_to_file(self, audio_bytes: bytes, audio_id: str, session_id: Optional[str] = None) -> str:
+        """Save audio bytes to file (write-then-rename) in the configured layout and return file path."""
+        file_path = artifact_layout.path_for('audio', audio_id, 'wav', session_id=session_id)
+        atomic_write(file_path, audio_bytes)
         
-        print(f"Debug: Saved audio to: {file_path}")
+        tracer.debug("Saved audio to: %s", file_path)
         return file_path
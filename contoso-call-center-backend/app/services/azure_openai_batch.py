@@ -0,0 +1,308 @@
+import os
+import json
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .tracing import tracer
+from .artifact_layout import ARTIFACT_ROOT, atomic_write
+from .azure_openai_generator import AzureOpenAITranscriptGenerator, TEMPERATURE, max_tokens_for
+
+BATCH_ENDPOINT = "/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_TERMINAL_STATES = ('completed', 'failed', 'expired', 'cancelled')
+BATCH_JOB_ROOT = os.environ.get('TRANSCRIPT_BATCH_DIR', os.path.join(ARTIFACT_ROOT, 'generated_batches'))
+
+
+class BatchStatus(NamedTuple):
+    batch_id: str
+    status: str
+    output_file_id: Optional[str]
+    error_file_id: Optional[str]
+    completed: int
+    failed: int
+    total: int
+
+
+class AzureOpenAIBatchBackend:
+    """Submits JSONL request files through the Azure OpenAI Batch API.
+
+    Requires a Global Batch deployment (AZURE_OPENAI_BATCH_DEPLOYMENT_NAME, falling back to
+    AZURE_OPENAI_DEPLOYMENT_NAME) and an API version that exposes /batches.
+    """
+
+    name = 'azure_openai_batch'
+
+    def __init__(self, client=None):
+        if client is None:
+            from openai import AzureOpenAI
+            client = AzureOpenAI(
+                api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+                api_version=os.getenv("AZURE_OPENAI_BATCH_API_VERSION", "2024-10-21"),
+                azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
+            )
+        self.client = client
+        self.deployment_name = os.getenv("AZURE_OPENAI_BATCH_DEPLOYMENT_NAME") or os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+
+    def upload(self, path: str) -> str:
+        with open(path, 'rb') as f:
+            return self.client.files.create(file=f, purpose="batch").id
+
+    def create(self, input_file_id: str) -> str:
+        batch = self.client.batches.create(
+            input_file_id=input_file_id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=BATCH_COMPLETION_WINDOW
+        )
+        return batch.id
+
+    def retrieve(self, batch_id: str) -> BatchStatus:
+        batch = self.client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        return BatchStatus(
+            batch.id,
+            batch.status,
+            batch.output_file_id,
+            batch.error_file_id,
+            getattr(counts, 'completed', 0) or 0,
+            getattr(counts, 'failed', 0) or 0,
+            getattr(counts, 'total', 0) or 0
+        )
+
+    def iter_lines(self, file_id: str) -> Iterator[str]:
+        """Stream a result file line by line instead of downloading it into memory."""
+        with self.client.files.with_streaming_response.content(file_id) as response:
+            for line in response.iter_lines():
+                if line:
+                    yield line
+
+    def cancel(self, batch_id: str) -> None:
+        self.client.batches.cancel(batch_id)
+
+
+def _local_transcript(body: Dict[str, Any]) -> str:
+    prompt = body['messages'][-1]['content']
+    agent = next((line.split(':', 1)[1].strip() for line in prompt.splitlines() if line.startswith('- Agent Name:')), 'Agent')
+    return (
+        f"Agent: Thank you for calling Contoso Health, this is {agent}. How can I help you today?\n"
+        "Caller: Hi, I'm calling with a question about a recent visit.\n"
+        "Agent: I'd be happy to help. Can I verify some details first?\n"
+        "Caller: Of course.\n"
+        "Agent: Thank you. Is there anything else I can help you with today?\n"
+        "Caller: No, that's everything. Thanks for your help."
+    )
+
+
+class LocalBatchBackend:
+    """Stand-in for the Batch API that completes jobs on disk, for tests and offline runs.
+
+    `responder` turns a request body into completion text, and a request it raises for is
+    failed into the error file; `polls_until_complete` controls how many status checks report
+    the job as in progress before it completes.
+    """
+
+    name = 'local_batch'
+
+    def __init__(self, work_dir: str, responder: Optional[Callable[[Dict[str, Any]], str]] = None,
+                 polls_until_complete: int = 1):
+        self.work_dir = work_dir
+        self.responder = responder or _local_transcript
+        self.polls_until_complete = polls_until_complete
+        self.deployment_name = 'local'
+        os.makedirs(work_dir, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.work_dir, name)
+
+    def upload(self, path: str) -> str:
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        with open(path, 'rb') as f:
+            atomic_write(self._path(file_id), f.read())
+        return file_id
+
+    def create(self, input_file_id: str) -> str:
+        batch_id = f"batch-{uuid.uuid4().hex[:12]}"
+        atomic_write(self._path(f"{batch_id}.json"), json.dumps({'input_file_id': input_file_id, 'polls': 0, 'status': 'validating'}))
+        return batch_id
+
+    def retrieve(self, batch_id: str) -> BatchStatus:
+        with open(self._path(f"{batch_id}.json")) as f:
+            state = json.load(f)
+
+        if state['status'] not in BATCH_TERMINAL_STATES:
+            state['polls'] += 1
+            state['status'] = 'in_progress'
+            if state['polls'] > self.polls_until_complete:
+                self._complete(batch_id, state)
+            atomic_write(self._path(f"{batch_id}.json"), json.dumps(state))
+
+        return BatchStatus(batch_id, state['status'], state.get('output_file_id'), state.get('error_file_id'),
+                           state.get('completed', 0), state.get('failed', 0), state.get('total', 0))
+
+    def _complete(self, batch_id: str, state: Dict[str, Any]) -> None:
+        output_file_id = f"file-{uuid.uuid4().hex[:12]}"
+        error_file_id = f"file-{uuid.uuid4().hex[:12]}"
+        completed = failed = 0
+        with open(self._path(state['input_file_id'])) as source, open(self._path(output_file_id), 'w') as output, \
+                open(self._path(error_file_id), 'w') as errors:
+            for line in source:
+                request = json.loads(line)
+                try:
+                    content = self.responder(request['body'])
+                except Exception as e:
+                    errors.write(json.dumps({
+                        'id': f"batch_req_{uuid.uuid4().hex[:12]}",
+                        'custom_id': request['custom_id'],
+                        'response': {'status_code': 500, 'body': {'error': {'code': 'server_error', 'message': str(e)}}},
+                        'error': None
+                    }) + '\n')
+                    failed += 1
+                    continue
+                output.write(json.dumps({
+                    'id': f"batch_req_{uuid.uuid4().hex[:12]}",
+                    'custom_id': request['custom_id'],
+                    'response': {
+                        'status_code': 200,
+                        'body': {'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': content}}]}
+                    },
+                    'error': None
+                }) + '\n')
+                completed += 1
+        state.update(status='completed', output_file_id=output_file_id, error_file_id=error_file_id if failed else None,
+                     completed=completed, failed=failed, total=completed + failed)
+
+    def iter_lines(self, file_id: str) -> Iterator[str]:
+        with open(self._path(file_id)) as f:
+            for line in f:
+                if line.strip():
+                    yield line
+
+    def cancel(self, batch_id: str) -> None:
+        with open(self._path(f"{batch_id}.json")) as f:
+            state = json.load(f)
+        state['status'] = 'cancelled'
+        atomic_write(self._path(f"{batch_id}.json"), json.dumps(state))
+
+
+class TranscriptBatchJob:
+    """An offline transcript run: prompts written as JSONL, submitted as one batch, results streamed back.
+
+    The job directory holds the request file and a manifest with the synthetic data for every
+    request, so a job can be resumed (polled and collected) from another process by its id.
+    """
+
+    def __init__(self, backend, generator: AzureOpenAITranscriptGenerator, job_id: Optional[str] = None,
+                 root: Optional[str] = None):
+        self.backend = backend
+        self.generator = generator
+        self.job_id = job_id or f"transcript_batch_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.directory = os.path.join(root or BATCH_JOB_ROOT, self.job_id)
+        self.manifest: Dict[str, Any] = {'job_id': self.job_id, 'batch_id': None, 'requests': {}}
+
+        manifest_path = self._manifest_path()
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.directory, 'manifest.json')
+
+    def _save_manifest(self) -> None:
+        atomic_write(self._manifest_path(), json.dumps(self.manifest))
+
+    @property
+    def batch_id(self) -> Optional[str]:
+        return self.manifest.get('batch_id')
+
+    def prepare(self, plan: List[Tuple[str, str, str]]) -> str:
+        """Write one chat completion request per (scenario, sentiment, duration) to requests.jsonl."""
+        os.makedirs(self.directory, exist_ok=True)
+        requests_path = os.path.join(self.directory, 'requests.jsonl')
+
+        with open(requests_path, 'w') as f:
+            for index, (scenario, sentiment, duration) in enumerate(plan, start=1):
+                request = self.generator.build_request(scenario, sentiment, duration)
+                custom_id = f"call_{index}"
+                f.write(json.dumps({
+                    'custom_id': custom_id,
+                    'method': 'POST',
+                    'url': BATCH_ENDPOINT,
+                    'body': {
+                        'model': self.backend.deployment_name,
+                        'messages': request.pop('messages'),
+                        'temperature': TEMPERATURE,
+                        'max_tokens': max_tokens_for(request['duration_minutes'])
+                    }
+                }) + '\n')
+                self.manifest['requests'][custom_id] = request
+
+        self._save_manifest()
+        return requests_path
+
+    def submit(self) -> str:
+        with tracer.span('llm.batch.submit', kind='stage', backend=self.backend.name, requests=len(self.manifest['requests'])) as span:
+            input_file_id = self.backend.upload(os.path.join(self.directory, 'requests.jsonl'))
+            self.manifest['input_file_id'] = input_file_id
+            self.manifest['batch_id'] = self.backend.create(input_file_id)
+            span.set_attribute('batch_id', self.batch_id)
+        self._save_manifest()
+        return self.batch_id
+
+    def wait(self, poll_interval: float = 30.0, timeout: Optional[float] = None,
+             on_status: Optional[Callable[[BatchStatus], None]] = None) -> BatchStatus:
+        """Poll until the batch reaches a terminal state (or the timeout elapses)."""
+        deadline = time.time() + timeout if timeout else None
+        with tracer.span('llm.batch.poll', kind='stage', batch_id=self.batch_id):
+            while True:
+                status = self.backend.retrieve(self.batch_id)
+                if on_status:
+                    on_status(status)
+                if status.status in BATCH_TERMINAL_STATES:
+                    break
+                if deadline and time.time() >= deadline:
+                    break
+                time.sleep(poll_interval)
+
+        self.manifest['status'] = status.status
+        self.manifest['output_file_id'] = status.output_file_id
+        self.manifest['error_file_id'] = status.error_file_id
+        self._save_manifest()
+        return status
+
+    def results(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (custom_id, transcript dict) for every successful request as the output file streams in."""
+        output_file_id = self.manifest.get('output_file_id')
+        if not output_file_id:
+            return
+
+        for line in self.backend.iter_lines(output_file_id):
+            result = json.loads(line)
+            custom_id = result.get('custom_id')
+            request = self.manifest['requests'].get(custom_id)
+            response = result.get('response') or {}
+            if request is None or result.get('error') or response.get('status_code') != 200:
+                tracer.error("Batch request %s failed: %s", custom_id, result.get('error') or response.get('status_code'))
+                continue
+
+            choice = response['body']['choices'][0]
+            yield custom_id, self.generator.transcript_result(
+                choice['message']['content'].strip(),
+                request['scenario'],
+                request['sentiment'],
+                request['duration_minutes'],
+                request['synthetic_data'],
+                generation_method=self.backend.name,
+                batch_id=self.batch_id,
+                finish_reason=choice.get('finish_reason')
+            )
+
+    def mark_collected(self, saved: int) -> None:
+        self.manifest['collected'] = saved
+        self._save_manifest()
+
+    def errors(self) -> Iterator[Dict[str, Any]]:
+        """Yield the raw error records of failed requests, if the batch produced an error file."""
+        error_file_id = self.manifest.get('error_file_id')
+        if error_file_id:
+            for line in self.backend.iter_lines(error_file_id):
+                yield json.loads(line)
@@ -1,9 +1,68 @@
 import os
+import re
 import json
-from typing import Dict, List, Any
+import time
+from typing import Callable, Dict, List, Any, Optional
 from datetime import datetime
 from openai import AzureOpenAI
 from .data_generator import SyntheticDataGenerator
+from .tracing import tracer
+from .artifact_layout import artifact_layout, atomic_write
+from .parsed_transcript import parse_transcript
+from .cancellation import GenerationCancelled, check_cancelled
+from .transcript_skeletons import (
+    SKELETON_INSTRUCTIONS, SkeletonCache, TranscriptSkeleton, hydrate, placeholder_data, placeholders_in
+)
+
+SYSTEM_PROMPT = "You are an expert at creating realistic call center transcripts for medical scenarios. Generate natural, professional conversations that sound authentic. Always include speaker labels (Agent:, Dr. [Name]:, [Patient Name]:, etc.) and maintain consistency throughout the conversation."
+
+TEMPERATURE = 0.7
+MAX_TOKENS = 2000
+MAX_OUTPUT_TOKENS = int(os.environ.get('AZURE_OPENAI_MAX_OUTPUT_TOKENS', '16000'))
+MAX_CONTINUATIONS = int(os.environ.get('AZURE_OPENAI_MAX_CONTINUATIONS', '2'))
+
+# The prompts ask for ~150 spoken words per minute; dialogue with speaker labels runs at about
+# 1.4 tokens per word, plus headroom so a call is rarely cut short.
+WORDS_PER_MINUTE = 150
+TOKENS_PER_WORD = 1.4
+TOKEN_HEADROOM = 1.25
+TRANSCRIPT_TOKEN_OVERHEAD = 64
+CONTINUATION_TOKENS = 1024
+
+CONTINUE_PROMPT = "The transcript was cut off. Continue it exactly where it stopped, without repeating anything, and bring the call to a natural close."
+
+_CALL_DELIMITER = re.compile(r'^[ \t]*=+[ \t]*CALL[ \t]+(\d+)[ \t]*=+[ \t]*$', re.MULTILINE | re.IGNORECASE)
+_TONE_INSTRUCTION = re.compile(r'^(\d+)\. The conversation should reflect .*$', re.MULTILINE)
+_LENGTH_INSTRUCTION = re.compile(r'^(\d+)\. Make the conversation approximately .*$', re.MULTILINE)
+
+def max_tokens_for(duration_minutes: int) -> int:
+    """Output token budget for one transcript of the given length."""
+    words = duration_minutes * WORDS_PER_MINUTE
+    tokens = int(words * TOKENS_PER_WORD * TOKEN_HEADROOM) + TRANSCRIPT_TOKEN_OVERHEAD
+    return min(tokens, MAX_OUTPUT_TOKENS)
+
+
+class _LineSplitter:
+    """Buffers streamed text and hands each complete, non-blank line to a callback."""
+    
+    def __init__(self, on_line: Callable[[str], None]):
+        self.on_line = on_line
+        self.started = False
+        self._pending = ''
+    
+    def feed(self, content: str) -> None:
+        self.started = True
+        self._pending += content
+        *complete, self._pending = self._pending.split('\n')
+        for line in complete:
+            if line.strip():
+                self.on_line(line)
+    
+    def close(self) -> None:
+        if self._pending.strip():
+            self.on_line(self._pending)
+        self._pending = ''
+
 
 class AzureOpenAITranscriptGenerator:
     def __init__(self):
@@ -16,6 +75,7 @@ class AzureOpenAITranscriptGenerator:
         )
         
         self.deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+        self.skeleton_cache = SkeletonCache()
         
         self.scenario_prompts = {
             'healthcare_provider': self._get_healthcare_provider_prompt,
@@ -23,42 +83,113 @@ class AzureOpenAITranscriptGenerator:
             'caregiver_inquiry': self._get_caregiver_inquiry_prompt
         }
     
-    def generate_transcript(self, scenario: str, sentiment: str, duration: str) -> Dict[str, Any]:
-        """Generate a complete transcript using Azure OpenAI for the specified scenario."""
+    def generate_transcript(self, scenario: str, sentiment: str, duration: str,
+                            on_line: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Generate a complete transcript using Azure OpenAI for the specified scenario.
+        
+        When `on_line` is given the completion is streamed and every complete transcript line
+        is passed to it as soon as it arrives (e.g. to start speech synthesis early).
+        """
         
         synthetic_data = self.data_gen.generate_call_data(scenario)
         
-        duration_minutes = self._parse_duration(duration)
         sentiment_type = self._parse_sentiment(sentiment)
+        skeleton_reused = None
         
-        prompt = self.scenario_prompts[scenario](synthetic_data, sentiment_type, duration_minutes)
+        if self.skeleton_cache.enabled:
+            skeleton = self.skeleton_cache.reusable(scenario, sentiment_type, duration)
+            skeleton_reused = skeleton is not None
+            if skeleton is None:
+                hydrated_line = (lambda line: on_line(hydrate(line, synthetic_data))) if on_line else None
+                skeleton = self._generate_skeleton(scenario, sentiment_type, duration, synthetic_data, on_line=hydrated_line)
+            elif on_line:
+                for line in hydrate(skeleton.transcript, synthetic_data).split('\n'):
+                    on_line(line)
+            duration_minutes = skeleton.duration_minutes
+            transcript = hydrate(skeleton.transcript, synthetic_data)
+        else:
+            duration_minutes = self._parse_duration(duration)
+            prompt = self.scenario_prompts[scenario](synthetic_data, sentiment_type, duration_minutes)
+            transcript = self._complete(prompt, scenario, on_line=on_line, max_tokens=max_tokens_for(duration_minutes))
         
-        try:
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert at creating realistic call center transcripts for medical scenarios. Generate natural, professional conversations that sound authentic. Always include speaker labels (Agent:, Dr. [Name]:, [Patient Name]:, etc.) and maintain consistency throughout the conversation."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=2000
-            )
-            
-            transcript = response.choices[0].message.content.strip()
-            
-        except Exception as e:
-            raise Exception(f"Error generating transcript with Azure OpenAI: {str(e)}")
+        metadata = {}
+        if skeleton_reused is not None:
+            metadata['skeleton_reused'] = skeleton_reused
+        
+        return self.transcript_result(transcript, scenario, sentiment_type, duration_minutes, synthetic_data, **metadata)
+    
+    def generate_transcripts(self, scenario: str, sentiment: str, duration: str, count: int) -> List[Dict[str, Any]]:
+        """Generate several transcripts for the same scenario/sentiment/duration in one completion.
+        
+        Every call keeps its own synthetic data, sentiment and length; the instructions are sent once
+        and the reply is split on `=== CALL n ===` delimiters. Calls missing from the reply are
+        generated individually.
+        """
+        if count <= 1 or self.skeleton_cache.enabled:
+            return [self.generate_transcript(scenario, sentiment, duration) for _ in range(count)]
+        
+        requests = [self.build_request(scenario, sentiment, duration) for _ in range(count)]
+        prompts = [self.scenario_prompts[scenario](r['synthetic_data'], r['sentiment'], r['duration_minutes']) for r in requests]
         
+        intro, _, _ = prompts[0].partition('**Call Details:**')
+        instructions = '**Instructions:**' + prompts[0].partition('**Instructions:**')[2]
+        instructions = _TONE_INSTRUCTION.sub(r'\1. Each conversation should reflect its own Sentiment throughout', instructions)
+        instructions = _LENGTH_INSTRUCTION.sub(r'\1. Make each conversation approximately its own Duration long (about 150 words per minute)', instructions)
+        instructions = instructions.replace('Generate a natural, realistic transcript', 'Generate natural, realistic transcripts')
+        
+        blocks = []
+        for number, prompt in enumerate(prompts, start=1):
+            details = prompt.partition('**Call Details:**')[2].partition('**Instructions:**')[0].strip()
+            blocks.append(f"**Call {number} Details:**\n{details}")
+        
+        prompt = (
+            f"{intro.strip().replace('Create a realistic call center transcript', f'Create {count} separate, realistic call center transcripts', 1)}\n\n"
+            + '\n\n'.join(blocks)
+            + f"\n\n{instructions.strip()}\n\n"
+            f"Write the {count} transcripts in order. Start each one with a line containing only `=== CALL <number> ===` "
+            "and write nothing outside the transcripts.\n"
+        )
+        
+        max_tokens = min(sum(max_tokens_for(r['duration_minutes']) for r in requests), MAX_OUTPUT_TOKENS)
+        text = self._complete(prompt, scenario, max_tokens=max_tokens, transcripts=count)
+        
+        parts = _CALL_DELIMITER.split(text)
+        parsed = {int(number): body.strip() for number, body in zip(parts[1::2], parts[2::2]) if body.strip()}
+        
+        results = []
+        for number, request in enumerate(requests, start=1):
+            transcript = parsed.get(number)
+            if transcript is None:
+                tracer.debug("Call %d missing from multi-transcript completion; generating it individually", number)
+                results.append(self.generate_transcript(scenario, sentiment, duration))
+                continue
+            results.append(self.transcript_result(
+                transcript, scenario, request['sentiment'], request['duration_minutes'], request['synthetic_data'],
+                transcripts_per_completion=count
+            ))
+        return results
+    
+    def build_request(self, scenario: str, sentiment: str, duration: str) -> Dict[str, Any]:
+        """Draw synthetic data and build the chat messages for one call, without sending them."""
+        synthetic_data = self.data_gen.generate_call_data(scenario)
+        sentiment_type = self._parse_sentiment(sentiment)
+        duration_minutes = self._parse_duration(duration)
+        prompt = self.scenario_prompts[scenario](synthetic_data, sentiment_type, duration_minutes)
         return {
-            'transcript': transcript,
             'scenario': scenario,
             'sentiment': sentiment_type,
+            'duration_minutes': duration_minutes,
+            'synthetic_data': synthetic_data,
+            'messages': self._messages(prompt)
+        }
+    
+    def transcript_result(self, transcript: str, scenario: str, sentiment: str, duration_minutes: int,
+                          synthetic_data: Dict[str, Any], generation_method: str = 'azure_openai', **metadata) -> Dict[str, Any]:
+        """Assemble the transcript dict returned by every generation path."""
+        return {
+            'transcript': transcript,
+            'scenario': scenario,
+            'sentiment': sentiment,
             'duration': f"{duration_minutes} minutes",
             'participants': self._extract_participants(transcript),
             'synthetic_data': synthetic_data,
@@ -66,10 +197,128 @@ class AzureOpenAITranscriptGenerator:
                 'generated_at': datetime.now().isoformat(),
                 'word_count': len(transcript.split()),
                 'estimated_duration': duration_minutes,
-                'generation_method': 'azure_openai'
+                'generation_method': generation_method,
+                **metadata
             }
         }
     
+    def _messages(self, prompt: str) -> List[Dict[str, str]]:
+        return [
+            {
+                "role": "system",
+                "content": SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    
+    def _complete(self, prompt: str, scenario: str, on_line: Optional[Callable[[str], None]] = None,
+                  max_tokens: int = MAX_TOKENS, transcripts: int = 1) -> str:
+        """Run a chat completion and return the transcript text.
+        
+        A reply cut off by the token limit (finish_reason 'length') is continued with follow-up
+        requests, up to AZURE_OPENAI_MAX_CONTINUATIONS times. With `on_line` the completion is
+        streamed and each complete line is handed over as soon as it arrives.
+        """
+        splitter = _LineSplitter(on_line) if on_line else None
+        messages = self._messages(prompt)
+        parts = []
+        
+        try:
+            with tracer.span('llm.completion', kind='stage', scenario=scenario, deployment=self.deployment_name,
+                             transcripts=transcripts, max_tokens=max_tokens, streamed=splitter is not None) as span:
+                started = time.time()
+                for attempt in range(MAX_CONTINUATIONS + 1):
+                    check_cancelled()
+                    if splitter is not None:
+                        text, finish_reason, response_id = self._stream_round(messages, max_tokens, splitter, span, started)
+                    else:
+                        response = self.client.chat.completions.create(
+                            model=self.deployment_name,
+                            messages=messages,
+                            temperature=TEMPERATURE,
+                            max_tokens=max_tokens
+                        )
+                        choice = response.choices[0]
+                        text, finish_reason, response_id = choice.message.content or '', choice.finish_reason, getattr(response, 'id', None)
+                    
+                    parts.append(text)
+                    span.set_attributes(**{'llm.response_id': response_id, 'llm.finish_reason': finish_reason})
+                    if finish_reason != 'length':
+                        break
+                    
+                    # Truncated: ask the model to carry on from the exact point it stopped
+                    span.set_attribute('llm.continuations', attempt + 1)
+                    tracer.debug("Completion for %s hit max_tokens=%d; requesting continuation %d", scenario, max_tokens, attempt + 1)
+                    messages = self._messages(prompt) + [
+                        {"role": "assistant", "content": ''.join(parts)},
+                        {"role": "user", "content": CONTINUE_PROMPT}
+                    ]
+                    max_tokens = CONTINUATION_TOKENS * transcripts
+                
+                if splitter is not None:
+                    splitter.close()
+            
+            return ''.join(parts).strip()
+            
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            raise Exception(f"Error generating transcript with Azure OpenAI: {str(e)}")
+    
+    def _stream_round(self, messages: List[Dict[str, str]], max_tokens: int, splitter: '_LineSplitter', span, started: float):
+        """Stream one completion request into the line splitter. Returns (text, finish_reason, response id)."""
+        stream = self.client.chat.completions.create(
+            model=self.deployment_name,
+            messages=messages,
+            temperature=TEMPERATURE,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        
+        pieces = []
+        finish_reason = None
+        response_id = None
+        try:
+            for chunk in stream:
+                check_cancelled()
+                response_id = getattr(chunk, 'id', None) or response_id
+                # Azure sends content-filter results in chunks without choices
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                finish_reason = getattr(choice, 'finish_reason', None) or finish_reason
+                content = choice.delta.content
+                if not content:
+                    continue
+                if not splitter.started:
+                    span.set_attribute('llm.first_token_seconds', round(time.time() - started, 3))
+                pieces.append(content)
+                splitter.feed(content)
+        except GenerationCancelled:
+            stream.close()  # Drop the connection so the service stops generating tokens
+            raise
+        
+        return ''.join(pieces), finish_reason, response_id
+    
+    def _generate_skeleton(self, scenario: str, sentiment: str, duration: str, synthetic_data: Dict[str, Any],
+                           on_line: Optional[Callable[[str], None]] = None) -> TranscriptSkeleton:
+        """Generate a placeholder transcript and cache it if it only uses known placeholders."""
+        duration_minutes = self._parse_duration(duration)
+        prompt = self.scenario_prompts[scenario](placeholder_data(synthetic_data), sentiment, duration_minutes) + SKELETON_INSTRUCTIONS
+        
+        text = self._complete(prompt, scenario, on_line=on_line, max_tokens=max_tokens_for(duration_minutes))
+        used = placeholders_in(text)
+        skeleton = TranscriptSkeleton(text, duration_minutes, tuple(sorted(used)))
+        
+        if 'agent_name' in used and used <= synthetic_data.keys():
+            self.skeleton_cache.add(scenario, sentiment, duration, skeleton)
+        else:
+            tracer.debug("Not caching %s skeleton; placeholders used: %s", scenario, sorted(used))
+        return skeleton
+    
     def _parse_duration(self, duration: str) -> int:
         """Parse duration string to minutes."""
         import random
@@ -89,14 +338,7 @@ class AzureOpenAITranscriptGenerator:
     
     def _extract_participants(self, transcript: str) -> List[str]:
         """Extract participant names from transcript."""
-        participants = []
-        lines = transcript.split('\n')
-        for line in lines:
-            if ':' in line:
-                speaker = line.split(':')[0].strip()
-                if speaker not in participants:
-                    participants.append(speaker)
-        return participants
+        return list(parse_transcript(transcript).participants)
     
     def _get_healthcare_provider_prompt(self, data: Dict, sentiment: str, duration: int) -> str:
         """Generate prompt for healthcare provider inquiry scenario."""
@@ -205,10 +447,8 @@ Create a realistic call center transcript for a caregiver inquiry scenario with
 Generate a natural, realistic transcript with proper speaker labels.
 """
     
-    def save_transcript_to_file(self, transcript_data: Dict[str, Any], transcript_id: str, save_locally: bool = True) -> Dict[str, Any]:
+    def save_transcript_to_file(self, transcript_data: Dict[str, Any], transcript_id: str, save_locally: bool = True, session_id: Optional[str] = None) -> Dict[str, Any]:
         """Save transcript to file, matching the original interface."""
-        import os
-        
         content = f"""Contoso Call Center Transcript
 Generated: {transcript_data['metadata']['generated_at']}
 Scenario: {transcript_data['scenario']}
@@ -228,14 +468,10 @@ All patient information is fictitious and does not represent real individuals or
 """
         
         if save_locally:
-            transcript_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'generated_transcripts')
-            os.makedirs(transcript_dir, exist_ok=True)
-            
-            file_path = os.path.join(transcript_dir, f"{transcript_id}.txt")
+            file_path = artifact_layout.path_for('transcript', transcript_id, 'txt', session_id=session_id)
             
             try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
+                atomic_write(file_path, content)
                 return {'file_path': file_path, 'content': content}
             except Exception as e:
                 return {'file_path': None, 'content': content, 'error': str(e)}
@@ -0,0 +1,290 @@
+import os
+import re
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from .tracing import tracer
+from .call_search import decode_cursor, encode_cursor
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS generated_calls (
+        session_id TEXT NOT NULL,
+        call_id INTEGER NOT NULL,
+        scenario TEXT NOT NULL,
+        sentiment TEXT NOT NULL,
+        duration_minutes INTEGER,
+        participants TEXT[] NOT NULL,
+        transcript TEXT NOT NULL,
+        synthetic_data JSONB NOT NULL,
+        metadata JSONB NOT NULL,
+        transcript_id TEXT,
+        transcript_path TEXT,
+        audio_id TEXT,
+        audio_path TEXT,
+        created_at TIMESTAMPTZ NOT NULL,
+        PRIMARY KEY (session_id, call_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_generated_calls_scenario_sentiment ON generated_calls (scenario, sentiment)",
+    "CREATE INDEX IF NOT EXISTS idx_generated_calls_sentiment ON generated_calls (sentiment)",
+    "CREATE INDEX IF NOT EXISTS idx_generated_calls_diagnosis ON generated_calls ((lower(synthetic_data->>'diagnosis')))",
+    "CREATE INDEX IF NOT EXISTS idx_generated_calls_medication ON generated_calls ((lower(synthetic_data->>'medication')))",
+    "CREATE INDEX IF NOT EXISTS idx_generated_calls_created_at ON generated_calls (created_at DESC, session_id DESC, call_id DESC)",
+    """
+    ALTER TABLE generated_calls ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (to_tsvector('english', transcript)) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_generated_calls_search ON generated_calls USING GIN (search_vector)"
+]
+
+SEARCH_COLUMNS = (
+    'session_id', 'call_id', 'scenario', 'sentiment', 'duration_minutes', 'participants',
+    'synthetic_data', 'transcript_id', 'audio_id', 'created_at'
+)
+
+COPY_COLUMNS = (
+    'session_id', 'call_id', 'scenario', 'sentiment', 'duration_minutes', 'participants', 'transcript',
+    'synthetic_data', 'metadata', 'transcript_id', 'transcript_path', 'audio_id', 'audio_path', 'created_at'
+)
+
+INSERT_ROW = (
+    f"INSERT INTO generated_calls ({', '.join(COPY_COLUMNS)}) VALUES ({', '.join(['%s'] * len(COPY_COLUMNS))}) "
+    "ON CONFLICT (session_id, call_id) DO NOTHING"
+)
+
+_DURATION_MINUTES = re.compile(r'(\d+)')
+
+
+def _duration_minutes(transcript_data: Dict[str, Any]) -> Optional[int]:
+    estimated = transcript_data.get('metadata', {}).get('estimated_duration')
+    if isinstance(estimated, int):
+        return estimated
+    match = _DURATION_MINUTES.search(str(transcript_data.get('duration', '')))
+    return int(match.group(1)) if match else None
+
+
+class CallCatalog:
+    """Persists generated call metadata to PostgreSQL through a pooled async connection.
+
+    Rows are buffered and written with COPY once CALL_CATALOG_BATCH_SIZE rows are pending
+    or every CALL_CATALOG_FLUSH_INTERVAL seconds. Disabled unless DATABASE_URL is set.
+
+    A batch that COPY rejects is inserted row by row, and rows the database still rejects
+    are logged and dropped. While the database is unreachable rows are kept for later
+    flushes, up to CALL_CATALOG_MAX_ATTEMPTS flushes each.
+    """
+
+    def __init__(self, dsn: Optional[str] = None, batch_size: Optional[int] = None, flush_interval: Optional[float] = None):
+        self.dsn = dsn or os.environ.get('DATABASE_URL')
+        self.enabled = bool(self.dsn)
+        self.batch_size = batch_size or int(os.environ.get('CALL_CATALOG_BATCH_SIZE', '200'))
+        self.flush_interval = flush_interval or float(os.environ.get('CALL_CATALOG_FLUSH_INTERVAL', '2.0'))
+        self.max_buffered = self.batch_size * 20
+        self.max_attempts = max(1, int(os.environ.get('CALL_CATALOG_MAX_ATTEMPTS', '5')))
+
+        self._pool = None
+        self._buffer: List[Tuple[tuple, int]] = []  # (row, failed flushes)
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def open(self) -> None:
+        if not self.enabled:
+            return
+
+        from psycopg_pool import AsyncConnectionPool
+
+        self._flush_lock = asyncio.Lock()
+        self._pool = AsyncConnectionPool(
+            self.dsn,
+            min_size=int(os.environ.get('CALL_CATALOG_POOL_MIN', '1')),
+            max_size=int(os.environ.get('CALL_CATALOG_POOL_MAX', '5')),
+            open=False
+        )
+        await self._pool.open()
+
+        async with self._pool.connection() as conn:
+            for statement in SCHEMA:
+                await conn.execute(statement)
+
+        self._flush_task = asyncio.create_task(self._flush_periodically())
+
+    async def close(self) -> None:
+        if not self.enabled or self._pool is None:
+            return
+
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+
+        await self.flush()
+        await self._pool.close()
+        self._pool = None
+
+    async def add(self, session_id: str, call_id: int, transcript_data: Dict[str, Any],
+                  transcript_id: Optional[str] = None, transcript_path: Optional[str] = None,
+                  audio_id: Optional[str] = None, audio_path: Optional[str] = None) -> None:
+        """Queue a generated call for the next COPY batch."""
+        if not self.enabled or self._pool is None:
+            return
+
+        from psycopg.types.json import Jsonb
+
+        self._buffer.append(((
+            session_id,
+            call_id,
+            transcript_data['scenario'],
+            transcript_data['sentiment'],
+            _duration_minutes(transcript_data),
+            list(transcript_data['participants']),
+            transcript_data['transcript'],
+            Jsonb(transcript_data['synthetic_data']),
+            Jsonb(transcript_data['metadata']),
+            transcript_id,
+            transcript_path,
+            audio_id,
+            audio_path,
+            datetime.now(timezone.utc)
+        ), 0))
+
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write all buffered rows in a single COPY. Returns the number of rows written."""
+        if not self.enabled or self._pool is None or not self._buffer:
+            return 0
+
+        from psycopg import OperationalError
+
+        async with self._flush_lock:
+            batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+
+            try:
+                with tracer.span('call_catalog.copy', kind='stage', rows=len(batch)):
+                    async with self._pool.connection() as conn:
+                        async with conn.cursor() as cur:
+                            async with cur.copy(f"COPY generated_calls ({', '.join(COPY_COLUMNS)}) FROM STDIN") as copy:
+                                for row, _ in batch:
+                                    await copy.write_row(row)
+                return len(batch)
+            except OperationalError as e:
+                tracer.error("Call catalog unavailable, keeping %d call(s) for the next flush: %s", len(batch), e)
+                self._requeue(batch)
+                return 0
+            except Exception as e:
+                tracer.error("COPY of %d call(s) to the call catalog failed, inserting them one at a time: %s", len(batch), e)
+                return await self._insert_rows(batch)
+
+    async def _insert_rows(self, batch: List[Tuple[tuple, int]]) -> int:
+        """Insert rows one at a time, each in its own transaction, dropping the ones the database rejects."""
+        from psycopg import OperationalError
+
+        written = 0
+        with tracer.span('call_catalog.insert', kind='stage', rows=len(batch)):
+            for index, (row, attempts) in enumerate(batch):
+                try:
+                    async with self._pool.connection() as conn:
+                        async with conn.transaction():
+                            await conn.execute(INSERT_ROW, row)
+                    written += 1
+                except OperationalError as e:
+                    tracer.error("Call catalog unavailable, keeping %d call(s) for the next flush: %s", len(batch) - index, e)
+                    self._requeue(batch[index:])
+                    break
+                except Exception as e:
+                    tracer.error("Dropping call %s/%s rejected by the call catalog: %s", row[0], row[1], e)
+        return written
+
+    def _requeue(self, batch: List[Tuple[tuple, int]]) -> None:
+        """Put rows back for the next flush, dropping those out of attempts and the oldest beyond max_buffered."""
+        retry = [(row, attempts + 1) for row, attempts in batch if attempts + 1 < self.max_attempts]
+        if len(retry) < len(batch):
+            tracer.error("Dropping %d call(s) after %d failed call catalog flushes", len(batch) - len(retry), self.max_attempts)
+        self._buffer = (retry + self._buffer)[-self.max_buffered:]
+
+    async def search(self, text: Optional[str] = None, filters: Optional[Dict[str, str]] = None,
+                     min_duration: Optional[int] = None, max_duration: Optional[int] = None,
+                     limit: int = 20, cursor: Optional[str] = None):
+        """Full-text and field search over persisted calls, newest first, with a keyset cursor.
+
+        Returns (results, next_cursor) in the same shape as CallSearchIndex.search.
+        """
+        await self.flush()
+
+        clauses = []
+        params: List[Any] = []
+        for key, value in (filters or {}).items():
+            if key in ('scenario', 'sentiment'):
+                clauses.append(f"{key} = %s")
+                params.append(value.lower())
+            else:
+                if not key.isidentifier():
+                    raise ValueError(f"Invalid synthetic_data field: {key}")
+                # Inline the (validated) key so expression indexes such as lower(synthetic_data->>'diagnosis') apply
+                clauses.append(f"lower(synthetic_data->>'{key}') = lower(%s)")
+                params.append(value)
+        if text:
+            clauses.append("search_vector @@ plainto_tsquery('english', %s)")
+            params.append(text)
+        if min_duration is not None:
+            clauses.append("duration_minutes >= %s")
+            params.append(min_duration)
+        if max_duration is not None:
+            clauses.append("duration_minutes <= %s")
+            params.append(max_duration)
+
+        position = decode_cursor(cursor, {'created_at': str, 'session_id': str, 'call_id': int})
+        if position:
+            datetime.fromisoformat(position['created_at'])  # ValueError for a tampered timestamp
+            clauses.append("(created_at, session_id, call_id) < (%s::timestamptz, %s, %s)")
+            params.extend([position['created_at'], position['session_id'], position['call_id']])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = (
+            f"SELECT {', '.join(SEARCH_COLUMNS)} FROM generated_calls {where} "
+            "ORDER BY created_at DESC, session_id DESC, call_id DESC LIMIT %s"
+        )
+        params.append(limit + 1)
+
+        async with self._pool.connection() as conn:
+            rows = await (await conn.execute(query, params)).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor({'created_at': last[-1].isoformat(), 'session_id': last[0], 'call_id': last[1]})
+
+        results = []
+        for session_id, call_id, scenario, sentiment, duration, participants, synthetic_data, transcript_id, audio_id, _ in rows:
+            results.append({
+                'session_id': session_id,
+                'call_id': call_id,
+                'scenario': scenario,
+                'sentiment': sentiment,
+                'duration_minutes': duration,
+                'participants': participants,
+                'synthetic_data': synthetic_data,
+                'transcript_file_url': f"/transcript/{transcript_id}" if transcript_id else None,
+                'audio_file_url': f"/audio/{audio_id}" if audio_id else None
+            })
+        return results, next_cursor
+
+    async def delete_session(self, session_id: str) -> None:
+        if not self.enabled or self._pool is None:
+            return
+        await self.flush()
+        async with self._pool.connection() as conn:
+            await conn.execute("DELETE FROM generated_calls WHERE session_id = %s", (session_id,))
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
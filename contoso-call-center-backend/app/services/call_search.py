@@ -0,0 +1,152 @@
+import re
+import json
+import base64
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(position, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: Optional[str], fields: Dict[str, type]) -> Optional[Dict[str, Any]]:
+    """Decode a cursor made by encode_cursor, checking it holds exactly `fields` with their types.
+
+    Raises ValueError for anything else, so a tampered cursor is a client error.
+    """
+    if not cursor:
+        return None
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(position, dict) or position.keys() != fields.keys():
+        raise ValueError("Invalid cursor")
+    for key, expected in fields.items():
+        value = position[key]
+        if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+            raise ValueError("Invalid cursor")
+    return position
+
+
+class CallSearchIndex:
+    """In-process inverted index over generated calls, updated as each call is generated.
+
+    Transcript words and exact field values (scenario, sentiment and every string in
+    synthetic_data) map to posting sets of document ids. Queries intersect the smallest
+    postings first and page newest-first with a cursor on the document id.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next_doc_id = 1
+        self._documents: Dict[int, Dict[str, Any]] = {}
+        self._terms: Dict[str, Set[int]] = {}
+        self._fields: Dict[Tuple[str, str], Set[int]] = {}
+        self._sessions: Dict[str, List[int]] = {}
+
+    def add(self, session_id: str, call_id: int, transcript_data: Dict[str, Any],
+            transcript_file_url: Optional[str] = None, audio_file_url: Optional[str] = None) -> int:
+        synthetic_data = transcript_data.get('synthetic_data', {})
+        document = {
+            'session_id': session_id,
+            'call_id': call_id,
+            'scenario': transcript_data['scenario'],
+            'sentiment': transcript_data['sentiment'],
+            'duration_minutes': transcript_data.get('metadata', {}).get('estimated_duration'),
+            'participants': list(transcript_data.get('participants', [])),
+            'synthetic_data': synthetic_data,
+            'transcript_file_url': transcript_file_url,
+            'audio_file_url': audio_file_url
+        }
+
+        field_keys = [('scenario', document['scenario'].lower()), ('sentiment', document['sentiment'].lower())]
+        field_keys.extend(
+            (key, value.lower()) for key, value in synthetic_data.items() if isinstance(value, str)
+        )
+        terms = set(tokenize(transcript_data.get('transcript', '')))
+
+        with self._lock:
+            doc_id = self._next_doc_id
+            self._next_doc_id += 1
+            document['_terms'] = terms
+            document['_fields'] = field_keys
+            self._documents[doc_id] = document
+            for term in terms:
+                self._terms.setdefault(term, set()).add(doc_id)
+            for key in field_keys:
+                self._fields.setdefault(key, set()).add(doc_id)
+            self._sessions.setdefault(session_id, []).append(doc_id)
+        return doc_id
+
+    def remove_session(self, session_id: str) -> int:
+        with self._lock:
+            doc_ids = self._sessions.pop(session_id, [])
+            for doc_id in doc_ids:
+                document = self._documents.pop(doc_id, None)
+                if document is None:
+                    continue
+                self._discard(self._terms, document['_terms'], doc_id)
+                self._discard(self._fields, document['_fields'], doc_id)
+        return len(doc_ids)
+
+    @staticmethod
+    def _discard(index: Dict, keys: Iterable, doc_id: int) -> None:
+        for key in keys:
+            postings = index.get(key)
+            if postings is not None:
+                postings.discard(doc_id)
+                if not postings:
+                    del index[key]
+
+    def search(self, text: Optional[str] = None, filters: Optional[Dict[str, str]] = None,
+               min_duration: Optional[int] = None, max_duration: Optional[int] = None,
+               limit: int = 20, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Return (results, next_cursor). Field filters match case-insensitively and exactly."""
+        position = decode_cursor(cursor, {'doc_id': int})
+        before = position['doc_id'] if position else None
+
+        with self._lock:
+            postings: List[Set[int]] = []
+            for key, value in (filters or {}).items():
+                postings.append(self._fields.get((key, value.lower()), set()))
+            for term in set(tokenize(text or '')):
+                postings.append(self._terms.get(term, set()))
+
+            if postings:
+                postings.sort(key=len)
+                candidates = set(postings[0])
+                for other in postings[1:]:
+                    if not candidates:
+                        break
+                    candidates &= other
+                ordered = sorted(candidates, reverse=True)
+            else:
+                ordered = sorted(self._documents, reverse=True)
+
+            results = []
+            next_cursor = None
+            for doc_id in ordered:
+                if before is not None and doc_id >= before:
+                    continue
+                document = self._documents[doc_id]
+                duration = document['duration_minutes']
+                if min_duration is not None and (duration is None or duration < min_duration):
+                    continue
+                if max_duration is not None and (duration is None or duration > max_duration):
+                    continue
+                if len(results) == limit:
+                    next_cursor = encode_cursor({'doc_id': results[-1][0]})
+                    break
+                results.append((doc_id, document))
+
+        return [
+            {key: value for key, value in document.items() if not key.startswith('_')}
+            for _, document in results
+        ], next_cursor
@@ -0,0 +1,84 @@
+import os
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Optional
+
+
+# A generation registered in the shared state store renews its entry a few times per lease;
+# one that is not renewed for this long was left by a worker that has gone away
+GENERATION_LEASE_SECONDS = float(os.environ.get('GENERATION_LEASE_SECONDS', '30'))
+
+
+class GenerationCancelled(Exception):
+    """Raised inside generation work once the request it belongs to has been cancelled."""
+
+
+class CancellationToken:
+    """Cancellation flag shared by every thread working on one generation request.
+
+    The request sets it when the client disconnects or the cancel endpoint is called;
+    LLM streams, TTS segment loops and batch synthesis polling check it between units of
+    work and stop with GenerationCancelled.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+
+    def cancel(self, reason: str = 'cancelled') -> None:
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise GenerationCancelled(self.reason)
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to `timeout` seconds; returns True as soon as the token is cancelled."""
+        return self._event.wait(timeout)
+
+
+_current_token: contextvars.ContextVar[Optional[CancellationToken]] = contextvars.ContextVar('generation_cancellation', default=None)
+
+
+@contextmanager
+def cancellation_scope(token: CancellationToken):
+    """Make `token` the current token for this context and everything copied from it (tasks, worker threads)."""
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+def current_token() -> Optional[CancellationToken]:
+    return _current_token.get()
+
+
+def check_cancelled() -> None:
+    """Raise GenerationCancelled if the current request has been cancelled; a no-op outside a request."""
+    token = _current_token.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def cancellable_sleep(seconds: float) -> None:
+    """time.sleep that ends early, raising GenerationCancelled, when the current request is cancelled."""
+    token = _current_token.get()
+    if token is None:
+        time.sleep(seconds)
+    elif token.wait(seconds):
+        raise GenerationCancelled(token.reason)
+
+
+def generation_running(store, request_id: str) -> bool:
+    """Whether a generation registered under `request_id` in `store` still holds its lease."""
+    blob = store.get_blob('generations', request_id)
+    return blob is not None and time.time() - blob.created_at <= GENERATION_LEASE_SECONDS
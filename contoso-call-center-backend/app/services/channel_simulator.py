@@ -0,0 +1,175 @@
+import io
+from functools import lru_cache
+from typing import Dict, Optional
+
+import numpy as np
+from scipy.signal import butter, lfilter, sosfilt
+
+from pydub import AudioSegment
+
+# G.712 telephone channel pass band
+TELEPHONE_BAND = (300.0, 3400.0)
+BAND_PASS_ORDER = 4
+
+# A tone at a quarter of the sample rate, far below 16-bit resolution, that keeps the filter
+# state out of subnormal floats through the exact-zero pauses between lines (which slow
+# sosfilt ~10x). Not at DC or Nyquist, where the band-pass has its zeros.
+DENORMAL_GUARD = 1e-9
+_GUARD_CYCLE = np.array([1.0, 0.0, -1.0, 0.0]) * DENORMAL_GUARD
+
+# Same defaults as pydub's compress_dynamic_range
+COMPRESSION_THRESHOLD_DB = -20.0
+COMPRESSION_RATIO = 4.0
+COMPRESSION_ATTACK_MS = 5.0
+COMPRESSION_RELEASE_MS = 50.0
+MAKEUP_PEAK_DB = -1.0
+
+COMPANDING_LAWS = ('mulaw', 'alaw', 'none')
+MU = 255.0
+A = 87.6
+COMPANDED_LEVELS = 127  # 8-bit code: sign plus 7 bits of magnitude
+
+# Audio per packet on a G.711 RTP stream
+PACKET_MS = 20
+
+DEFAULT_CHANNEL = {
+    'band_low_hz': TELEPHONE_BAND[0],
+    'band_high_hz': TELEPHONE_BAND[1],
+    'compression': True,
+    'companding': 'mulaw',
+    'packet_loss': 0.0,
+    'jitter': 0.0,
+    'seed': None
+}
+
+
+@lru_cache(maxsize=32)
+def _band_pass_sos(sample_rate: int, low_hz: float, high_hz: float) -> np.ndarray:
+    high_hz = min(high_hz, 0.45 * sample_rate)
+    if not 0 < low_hz < high_hz:
+        raise ValueError(f"Invalid pass band {low_hz}-{high_hz} Hz at {sample_rate} Hz")
+    return butter(BAND_PASS_ORDER, [low_hz, high_hz], btype='bandpass', fs=sample_rate, output='sos')
+
+
+def band_pass(samples: np.ndarray, sample_rate: int, low_hz: float, high_hz: float) -> np.ndarray:
+    """Butterworth band-pass along the time axis of (frames, channels) float samples."""
+    guard = np.resize(_GUARD_CYCLE, len(samples))
+    return sosfilt(_band_pass_sos(sample_rate, float(low_hz), float(high_hz)), samples + guard[:, None], axis=0)
+
+
+def compress(samples: np.ndarray, sample_rate: int, threshold_db: float = COMPRESSION_THRESHOLD_DB,
+             ratio: float = COMPRESSION_RATIO, attack_ms: float = COMPRESSION_ATTACK_MS,
+             release_ms: float = COMPRESSION_RELEASE_MS) -> np.ndarray:
+    """Feed-forward compressor: RMS level per attack-length frame, instant attack and exponential release.
+
+    Gain is computed per frame and interpolated per sample, so the work is a handful of
+    array operations rather than a loop over samples.
+    """
+    frame = max(1, int(sample_rate * attack_ms / 1000))
+    frames = -(-len(samples) // frame)
+    padded = np.zeros((frames * frame, samples.shape[1]))
+    padded[:len(samples)] = samples
+
+    power = np.mean(np.square(padded.reshape(frames, -1)), axis=1)
+    level_db = 10 * np.log10(power + 1e-12)
+    reduction_db = np.maximum(level_db - threshold_db, 0.0) * (1 - 1 / ratio)
+
+    release = np.exp(-frame / (sample_rate * release_ms / 1000))
+    released = lfilter([1 - release], [1, -release], reduction_db)
+    reduction_db = np.maximum(reduction_db, released)
+
+    centers = (np.arange(frames) + 0.5) * frame
+    gain = 10 ** (-np.interp(np.arange(len(samples)), centers, reduction_db) / 20)
+    return samples * gain[:, None]
+
+
+def compand(samples: np.ndarray, law: str) -> np.ndarray:
+    """Round-trip samples in [-1, 1] through 8-bit mu-law or A-law companding, adding its quantization noise."""
+    if law == 'none':
+        return samples
+    magnitude = np.minimum(np.abs(samples), 1.0)
+    sign = np.sign(samples)
+
+    if law == 'mulaw':
+        encoded = np.log1p(MU * magnitude) / np.log1p(MU)
+    elif law == 'alaw':
+        small = magnitude < 1 / A
+        encoded = np.where(small, A * magnitude, 1 + np.log(np.maximum(A * magnitude, 1.0))) / (1 + np.log(A))
+    else:
+        raise ValueError(f"Unknown companding law '{law}', expected one of: {', '.join(COMPANDING_LAWS)}")
+
+    encoded = np.round(encoded * COMPANDED_LEVELS) / COMPANDED_LEVELS
+
+    if law == 'mulaw':
+        decoded = np.expm1(encoded * np.log1p(MU)) / MU
+    else:
+        scaled = encoded * (1 + np.log(A))
+        decoded = np.where(scaled < 1, scaled / A, np.exp(scaled - 1) / A)
+    return sign * decoded
+
+
+def packet_artifacts(samples: np.ndarray, sample_rate: int, packet_loss: float = 0.0, jitter: float = 0.0,
+                     rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """Simulate a VoIP leg in PACKET_MS packets.
+
+    A `jitter` fraction of packets arrive too late for the jitter buffer, which replays the
+    previous packet in their place; a `packet_loss` fraction are lost and play as silence.
+    """
+    if not packet_loss and not jitter:
+        return samples
+    rng = rng or np.random.default_rng()
+
+    packet = max(1, int(sample_rate * PACKET_MS / 1000))
+    packets = -(-len(samples) // packet)
+    padded = np.zeros((packets * packet, samples.shape[1]))
+    padded[:len(samples)] = samples
+    padded = padded.reshape(packets, packet, -1)
+
+    source = np.arange(packets)
+    late = rng.random(packets) < jitter
+    source[late] = np.maximum(source[late] - 1, 0)
+    padded = padded[source]
+    padded[rng.random(packets) < packet_loss] = 0.0
+
+    return padded.reshape(-1, samples.shape[1])[:len(samples)]
+
+
+def simulate_channel(samples: np.ndarray, sample_rate: int, settings: Optional[Dict] = None) -> np.ndarray:
+    """Run (frames, channels) float samples in [-1, 1] through a telephone channel.
+
+    Stages, in signal order: band-pass, dynamic range compression with makeup gain,
+    companding, then packet loss and jitter. `settings` overrides DEFAULT_CHANNEL.
+    """
+    settings = {**DEFAULT_CHANNEL, **(settings or {})}
+
+    samples = band_pass(samples, sample_rate, settings['band_low_hz'], settings['band_high_hz'])
+
+    if settings['compression']:
+        samples = compress(samples, sample_rate)
+    peak = np.max(np.abs(samples)) if samples.size else 0.0
+    if peak > 0:
+        samples = samples * (10 ** (MAKEUP_PEAK_DB / 20) / peak)
+
+    samples = compand(samples, settings['companding'])
+
+    rng = np.random.default_rng(settings['seed'])
+    return packet_artifacts(samples, sample_rate, settings['packet_loss'], settings['jitter'], rng)
+
+
+def simulate_phone_line(audio: AudioSegment, settings: Optional[Dict] = None) -> AudioSegment:
+    """Apply simulate_channel to a pydub AudioSegment, returning 16-bit audio at the same rate and channels."""
+    audio = audio.set_sample_width(2)
+    samples = np.frombuffer(audio.raw_data, dtype=np.int16).reshape(-1, audio.channels) / 32768.0
+
+    processed = simulate_channel(samples, audio.frame_rate, settings)
+
+    pcm = np.clip(np.round(processed * 32767), -32768, 32767).astype(np.int16)
+    return audio._spawn(pcm.tobytes())
+
+
+def simulate_wav(wav_bytes: bytes, settings: Optional[Dict] = None) -> bytes:
+    """simulate_phone_line for WAV bytes, e.g. audio returned by batch synthesis."""
+    audio = simulate_phone_line(AudioSegment.from_wav(io.BytesIO(wav_bytes)), settings)
+    buffer = io.BytesIO()
+    audio.export(buffer, format='wav')
+    return buffer.getvalue()
@@ -0,0 +1,290 @@
+import os
+import math
+import time
+import heapq
+import asyncio
+import threading
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from .tracing import tracer
+
+# Starting estimate of how long an admitted request runs, refined from completed requests
+INITIAL_SERVICE_SECONDS = 30.0
+SERVICE_TIME_SMOOTHING = 0.2
+
+# Share of generation capacity per CallGenerationRequest.priority, relative to 'low'
+PRIORITY_WEIGHTS = {'high': 4.0, 'normal': 2.0, 'low': 1.0}
+
+
+class AdmissionRejected(Exception):
+    """Raised when a generation request cannot be queued; carries the HTTP status and Retry-After."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class FairQueue:
+    """Start-time fair queue over flows (clients or sessions).
+
+    Each item is tagged with a virtual start time: the later of the queue's virtual clock
+    and the finish tag of the flow's previous item, where an item finishes `cost / weight`
+    after it starts. Items leave in start-tag order, so a flow that has just arrived is
+    served almost immediately even behind a flow with hundreds of queued items, and a flow
+    with twice the weight gets twice the share while both are backlogged.
+    """
+
+    def __init__(self):
+        self._heap: List[list] = []
+        self._entries: Dict[Any, list] = {}
+        self._finish_tags: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def push(self, flow: str, item: Any, weight: float = 1.0, cost: float = 1.0) -> None:
+        start = max(self._virtual_time, self._finish_tags.get(flow, 0.0))
+        self._finish_tags[flow] = start + cost / weight
+        self._sequence += 1
+        entry = [start, self._sequence, item]
+        self._entries[item] = entry
+        heapq.heappush(self._heap, entry)
+
+    def pop(self) -> Any:
+        while self._heap:
+            start, _, item = heapq.heappop(self._heap)
+            if item is None:
+                continue  # Discarded while waiting
+            del self._entries[item]
+            self._virtual_time = start
+            if not self._entries:
+                self._finish_tags.clear()
+            elif len(self._finish_tags) > 2 * len(self._entries) + 64:
+                # Flows whose tags are behind the clock start fresh anyway
+                self._finish_tags = {flow: tag for flow, tag in self._finish_tags.items() if tag > start}
+            return item
+        raise IndexError("pop from an empty FairQueue")
+
+    def discard(self, item: Any) -> None:
+        entry = self._entries.pop(item, None)
+        if entry is not None:
+            entry[2] = None
+
+
+class FairSemaphore:
+    """An asyncio semaphore whose waiters are granted slots in weighted fair order."""
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.active = 0
+        self._queue = FairQueue()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._queue)
+
+    def try_acquire(self) -> bool:
+        if self.active < self.slots and not self._queue:
+            self.active += 1
+            return True
+        return False
+
+    async def acquire(self, flow: str, weight: float = 1.0, cost: float = 1.0, timeout: Optional[float] = None) -> float:
+        """Wait for a slot; returns the seconds waited. Raises asyncio.TimeoutError after `timeout`."""
+        if self.try_acquire():
+            return 0.0
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.push(flow, future, weight, cost)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            if future.done() and not future.cancelled():
+                self.release()  # The slot was handed over just as the wait ended
+            else:
+                self._queue.discard(future)
+            raise
+        return time.perf_counter() - started
+
+    def release(self) -> None:
+        """Hand the slot to the next live waiter, or free it."""
+        while self._queue:
+            future = self._queue.pop()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionController:
+    """Caps how many generation requests run at once, with a bounded wait queue in front.
+
+    Up to GENERATION_MAX_ACTIVE requests run concurrently; the next GENERATION_QUEUE_DEPTH
+    wait for at most GENERATION_QUEUE_TIMEOUT seconds and are admitted in weighted fair
+    order across clients (a request costs its number of calls, divided by its priority
+    weight). Beyond that requests are rejected straight away: 503 when the queue is full
+    or the wait times out, 429 when one client already has GENERATION_MAX_QUEUED_PER_CLIENT
+    requests waiting. Limits apply per worker process.
+    """
+
+    def __init__(self, max_active: Optional[int] = None, max_queue: Optional[int] = None,
+                 queue_timeout: Optional[float] = None, max_queued_per_client: Optional[int] = None):
+        self.max_active = max_active or int(os.environ.get('GENERATION_MAX_ACTIVE', '4'))
+        self.max_queue = max_queue if max_queue is not None else int(os.environ.get('GENERATION_QUEUE_DEPTH', '16'))
+        self.queue_timeout = queue_timeout or float(os.environ.get('GENERATION_QUEUE_TIMEOUT', '60'))
+        self.max_queued_per_client = max_queued_per_client or int(os.environ.get('GENERATION_MAX_QUEUED_PER_CLIENT', '4'))
+
+        self._slots = FairSemaphore(self.max_active)
+        self._queued_by_client: Counter = Counter()
+        self._service_seconds = INITIAL_SERVICE_SECONDS
+        self._counters: Counter = Counter()
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up, from the smoothed request duration."""
+        return max(1, math.ceil(self._service_seconds * (self._slots.waiting + 1) / self.max_active))
+
+    def _reject(self, status_code: int, detail: str, counter: str) -> AdmissionRejected:
+        self._counters[counter] += 1
+        return AdmissionRejected(status_code, detail, self.retry_after())
+
+    def _check_queue(self, client_id: str) -> None:
+        if self._slots.waiting >= self.max_queue:
+            raise self._reject(503, "Generation queue is full", 'rejected_queue_full')
+        if self._queued_by_client[client_id] >= self.max_queued_per_client:
+            raise self._reject(429, "Too many queued generation requests for this client", 'rejected_client_limit')
+
+    def check(self, client_id: str) -> None:
+        """Raise AdmissionRejected if a request from `client_id` would be turned away right now.
+
+        For streamed responses, which must settle their status before they start waiting.
+        """
+        if self._slots.active >= self.max_active or self._slots.waiting:
+            self._check_queue(client_id)
+
+    async def _acquire(self, client_id: str, weight: float, cost: float) -> float:
+        if self._slots.try_acquire():
+            return 0.0
+
+        self._check_queue(client_id)
+        self._queued_by_client[client_id] += 1
+        try:
+            return await self._slots.acquire(client_id, weight, cost, self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject(503, "Timed out waiting for a generation slot", 'rejected_timeout')
+        finally:
+            self._queued_by_client[client_id] -= 1
+            if not self._queued_by_client[client_id]:
+                del self._queued_by_client[client_id]
+
+    @asynccontextmanager
+    async def admit(self, client_id: str, weight: float = 1.0, cost: float = 1.0):
+        """Hold a generation slot for the duration of the block; yields the seconds spent queued."""
+        queue_wait = await self._acquire(client_id, weight, cost)
+        self._counters['admitted'] += 1
+        self._queue_wait_total += queue_wait
+        self._queue_wait_max = max(self._queue_wait_max, queue_wait)
+
+        started = time.perf_counter()
+        try:
+            yield queue_wait
+        finally:
+            elapsed = time.perf_counter() - started
+            self._service_seconds += SERVICE_TIME_SMOOTHING * (elapsed - self._service_seconds)
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        admitted = self._counters['admitted']
+        return {
+            'active': self._slots.active,
+            'queued': self._slots.waiting,
+            'max_active': self.max_active,
+            'queue_depth': self.max_queue,
+            'admitted': admitted,
+            'rejected_queue_full': self._counters['rejected_queue_full'],
+            'rejected_client_limit': self._counters['rejected_client_limit'],
+            'rejected_timeout': self._counters['rejected_timeout'],
+            'avg_queue_wait_seconds': round(self._queue_wait_total / admitted, 3) if admitted else 0.0,
+            'max_queue_wait_seconds': round(self._queue_wait_max, 3),
+            'estimated_request_seconds': round(self._service_seconds, 1)
+        }
+
+
+class CallScheduler:
+    """Runs the calls of all admitted requests on GENERATION_CALL_WORKERS worker threads.
+
+    Each request submits all of its calls at once as its own flow, and waiting calls are
+    picked in weighted fair order, so the calls of a small request are interleaved with
+    (rather than queued behind) those of a large one, and higher-priority requests get a
+    proportionally larger share of the workers.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or int(os.environ.get('GENERATION_CALL_WORKERS', '4'))
+        self._slots = FairSemaphore(self.workers)
+
+    async def run(self, flow: str, weight: float, function: Callable, *args):
+        """Run `function(*args)` in a worker thread once the flow's turn comes up.
+
+        If the caller is cancelled while the call runs, the slot stays taken until the
+        thread actually returns, so the worker count is never exceeded.
+        """
+        await self._slots.acquire(flow, weight)
+        task = asyncio.ensure_future(asyncio.to_thread(function, *args))
+        task.add_done_callback(self._finished)
+        return await asyncio.shield(task)
+
+    def _finished(self, task: asyncio.Future) -> None:
+        self._slots.release()
+        if not task.cancelled():
+            task.exception()  # Mark an abandoned call's error as retrieved
+
+    def stats(self) -> Dict[str, int]:
+        return {'workers': self.workers, 'running': self._slots.active, 'queued': self._slots.waiting}
+
+
+class StageLimits:
+    """Process-wide concurrency caps for the generation stages that spend external quota.
+
+    Calls run in worker threads, so each stage is guarded by a semaphore sized from
+    LLM_MAX_CONCURRENCY and TTS_MAX_CONCURRENCY. The time spent waiting for a stage slot
+    is recorded on the current span as `<stage>_wait_ms`.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        if limits is None:
+            limits = {
+                'llm': int(os.environ.get('LLM_MAX_CONCURRENCY', '8')),
+                'tts': int(os.environ.get('TTS_MAX_CONCURRENCY', '8'))
+            }
+        self.limits = limits
+        self._semaphores = {stage: threading.BoundedSemaphore(limit) for stage, limit in limits.items()}
+        self._in_use: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, stage: str):
+        semaphore = self._semaphores[stage]
+        started = time.perf_counter()
+        semaphore.acquire()
+        tracer.set_attribute(f'{stage}_wait_ms', round((time.perf_counter() - started) * 1000, 1))
+        with self._lock:
+            self._in_use[stage] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_use[stage] -= 1
+            semaphore.release()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {stage: {'limit': limit, 'in_use': self._in_use[stage]} for stage, limit in self.limits.items()}
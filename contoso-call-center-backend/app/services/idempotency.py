@@ -0,0 +1,90 @@
+import os
+import json
+import time
+import hashlib
+from typing import Any, Dict, List, Optional
+
+from .cancellation import generation_running
+
+IDEMPOTENCY_TTL = float(os.environ.get('IDEMPOTENCY_TTL', '86400'))
+# How long a retry waits for the still-running first request before answering 409
+IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get('IDEMPOTENCY_WAIT_SECONDS', '60'))
+
+# A running claim whose generation is not registered this long after it was made is abandoned
+STALE_CLAIM_SECONDS = 5.0
+
+
+class IdempotencyConflict(Exception):
+    """Raised when an Idempotency-Key is reused with a different request body."""
+
+
+def request_fingerprint(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class IdempotencyRecords:
+    """Maps Idempotency-Keys to the session generated for them, or to the generation still running.
+
+    Records live in the shared state store, so a retry that reaches another worker finds the
+    same record. A key is claimed atomically before generation starts; completed records
+    expire after IDEMPOTENCY_TTL seconds and running ones are taken over when the worker
+    running them has gone away.
+    """
+
+    kind = 'idempotency'
+
+    def __init__(self, store, ttl: Optional[float] = None):
+        self.store = store
+        self.ttl = ttl if ttl is not None else IDEMPOTENCY_TTL
+
+    @staticmethod
+    def _store_key(key: str) -> str:
+        # Keys are client-chosen strings; hash them into a safe, fixed-length name
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=20).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        blob = self.store.get_blob(self.kind, self._store_key(key))
+        if blob is None:
+            return None
+        record = json.loads(bytes(blob.content))
+        if time.time() - record['created_at'] > self.ttl:
+            self.release(key)
+            return None
+        return record
+
+    def claim(self, key: str, fingerprint: str, request_id: str, session_id: str) -> Optional[Dict[str, Any]]:
+        """Claim `key` for a new generation and return None, or return the live record that already holds it."""
+        record = {
+            'fingerprint': fingerprint,
+            'request_id': request_id,
+            'session_id': session_id,
+            'status': 'running',
+            'created_at': time.time()
+        }
+        while True:
+            if self.store.add_blob(self.kind, self._store_key(key), json.dumps(record)):
+                return None
+
+            existing = self.get(key)
+            if existing is None:
+                continue  # Expired or released in the meantime
+            if existing['fingerprint'] != fingerprint:
+                raise IdempotencyConflict(key)
+            if existing['status'] == 'running' and self._abandoned(existing):
+                self.release(key)
+                continue
+            return existing
+
+    def _abandoned(self, record: Dict[str, Any]) -> bool:
+        return (time.time() - record['created_at'] > STALE_CLAIM_SECONDS
+                and not generation_running(self.store, record['request_id']))
+
+    def complete(self, key: str, generation_time: float, failed_calls: List[Dict[str, Any]]) -> None:
+        """Mark the claimed generation done, keeping what is needed to replay its response."""
+        record = self.get(key)
+        if record is not None:
+            record.update(status='completed', generation_time=generation_time, failed_calls=failed_calls)
+            self.store.put_blob(self.kind, self._store_key(key), json.dumps(record))
+
+    def release(self, key: str) -> None:
+        self.store.delete_blob(self.kind, self._store_key(key))
@@ -0,0 +1,59 @@
+import time
+import importlib
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class LazyBackend:
+    """Stands in for a service backend and builds it on first use.
+
+    The backend's module is imported and its class instantiated the first time an attribute
+    is accessed (or `get()` / `warm()` is called), so importing the app does not pay for the
+    Azure SDKs, pydub or Faker. Import and construction times are kept for the startup report.
+    """
+
+    def __init__(self, name: str, module: str, class_name: str, after_init: Optional[Callable[[Any], None]] = None):
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_module', module)
+        object.__setattr__(self, '_class_name', class_name)
+        object.__setattr__(self, '_after_init', after_init)
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+        object.__setattr__(self, '_timings', {})
+
+    def get(self, initialized_by: str = 'request'):
+        instance = self._instance
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            if self._instance is None:
+                started = time.perf_counter()
+                backend_class = getattr(importlib.import_module(self._module, __package__), self._class_name)
+                imported = time.perf_counter()
+                instance = backend_class()
+                if self._after_init is not None:
+                    self._after_init(instance)
+                self._timings.update(
+                    import_seconds=round(imported - started, 3),
+                    init_seconds=round(time.perf_counter() - imported, 3),
+                    initialized_by=initialized_by
+                )
+                object.__setattr__(self, '_instance', instance)
+        return self._instance
+
+    def warm(self) -> None:
+        self.get(initialized_by='warmup')
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    def report(self) -> Dict[str, Any]:
+        return {'initialized': self.initialized, **self._timings}
+
+    def __getattr__(self, attribute: str):
+        return getattr(self.get(), attribute)
+
+    def __setattr__(self, attribute: str, value) -> None:
+        setattr(self.get(), attribute, value)
@@ -0,0 +1,130 @@
+import re
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+_AGENT_INTRO = re.compile(r'this is (\w+)', re.IGNORECASE)
+_TITLES = ('Dr.', 'Mr.', 'Ms.', 'Mrs.')
+
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def gender_detector():
+    """Shared gender_guesser detector; loading its name database takes ~0.4s, so it is built once."""
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                import gender_guesser.detector as gender
+                _detector = gender.Detector()
+    return _detector
+
+
+def _strip_titles(name: str) -> str:
+    for title in _TITLES:
+        name = name.replace(title, '')
+    return name.strip()
+
+
+class Segment(NamedTuple):
+    """One spoken line: who says it, in which role, under which name and voice."""
+    index: int
+    speaker: str
+    role: str
+    name: str
+    text: str
+    voice: Optional[Dict] = None
+
+
+class ParsedTranscript:
+    """A transcript split once into speaker segments, participants and the agent's name.
+
+    Built in a single pass over the lines and shared by participant extraction, SSML
+    building and speech synthesis. Lines can also be appended one at a time while a
+    transcript is still being generated.
+    """
+    __slots__ = ('segments', 'participants', 'agent_name', '_names', '_participant_set')
+
+    def __init__(self, text: str = ''):
+        self.segments: Sequence[Segment] = []
+        self.participants: Sequence[str] = []
+        self.agent_name: Optional[str] = None
+        self._names: Dict[str, str] = {}
+        self._participant_set = set()
+
+        if text:
+            match = _AGENT_INTRO.search(text)
+            self.agent_name = match.group(1) if match else None
+            for line in text.split('\n'):
+                self.add_line(line)
+
+    def add_line(self, line: str) -> Optional[Segment]:
+        """Parse one 'Speaker: text' line. Returns the new segment, or None for non-spoken lines."""
+        if ':' not in line:
+            return None
+
+        speaker, _, text = line.partition(':')
+        speaker = speaker.strip()
+        if speaker not in self._participant_set:
+            self._participant_set.add(speaker)
+            self.participants.append(speaker)
+
+        text = text.strip()
+        if not text:
+            return None
+
+        if self.agent_name is None:
+            match = _AGENT_INTRO.search(line)
+            if match:
+                self.agent_name = match.group(1)
+
+        segment = Segment(len(self.segments), speaker, self._role(speaker), self._name(speaker), text)
+        self.segments.append(segment)
+        return segment
+
+    @staticmethod
+    def _role(speaker: str) -> str:
+        return 'agent' if 'agent' in speaker.lower() else 'caller'
+
+    def _name(self, speaker: str) -> str:
+        if 'Agent' in speaker:
+            if self.agent_name:
+                return self.agent_name
+            parts = speaker.split()
+            return ' '.join(parts[1:]) if len(parts) > 1 else speaker
+
+        name = self._names.get(speaker)
+        if name is None:
+            name = self._names[speaker] = _strip_titles(speaker) or speaker
+        return name
+
+    def with_voices(self, resolve: Callable[[str, str], Dict]) -> List[Segment]:
+        """Return the segments with a voice attached, resolving it once per distinct (speaker, name).
+
+        The parse itself is left unchanged, so one shared by several calls is safe to use.
+        """
+        voices: Dict[tuple, Dict] = {}
+        voiced = []
+        for segment in self.segments:
+            key = (segment.speaker, segment.name)
+            voice = voices.get(key)
+            if voice is None:
+                voice = voices[key] = resolve(segment.speaker, segment.name)
+            voiced.append(segment._replace(voice=voice))
+        return voiced
+
+    def freeze(self) -> 'ParsedTranscript':
+        """Make the parse read-only (no more add_line), for sharing between threads."""
+        self.segments = tuple(self.segments)
+        self.participants = tuple(self.participants)
+        return self
+
+
+@lru_cache(maxsize=128)
+def parse_transcript(text: str) -> ParsedTranscript:
+    """Parse a transcript, reusing the result when another stage asks for the same text.
+
+    The cached parse is shared by concurrent calls, so it is frozen; see with_voices.
+    """
+    return ParsedTranscript(text).freeze()
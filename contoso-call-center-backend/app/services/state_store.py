@@ -0,0 +1,323 @@
+import os
+import re
+import json
+import mmap
+import time
+import uuid
+import heapq
+import bisect
+import contextlib
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+
+from pydantic import TypeAdapter
+
+from ..models import GeneratedCall
+from ..responses import bytes_etag, file_validators
+from .artifact_layout import ARTIFACT_ROOT, atomic_write
+
+STATE_BACKENDS = ('memory', 'filesystem')
+
+_SAFE_KEY = re.compile(r'^[\w.-]+$')
+_SESSION_HEADER = re.compile(rb'^\{"total_calls":(\d+)')
+_CALL_ID = re.compile(rb'^\{"id":(\d+)')
+_CALLS = TypeAdapter(List[GeneratedCall])
+_CALL = TypeAdapter(GeneratedCall)
+
+
+class StoredBlob(NamedTuple):
+    content: Union[bytes, memoryview]
+    etag: str
+    created_at: float
+
+
+class MemoryStateStore:
+    """Session calls and in-memory artifacts held in this process (the original behaviour).
+
+    Only correct with a single worker: a follow-up request routed to another process
+    will not find the session or its artifacts.
+    """
+
+    name = 'memory'
+
+    def __init__(self):
+        self._blobs: Dict[Tuple[str, str], StoredBlob] = {}
+        self._sessions: Dict[str, List[GeneratedCall]] = {}
+
+    def put_blob(self, kind: str, key: str, content: Union[bytes, str]) -> StoredBlob:
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        blob = StoredBlob(content, bytes_etag(content), time.time())
+        self._blobs[(kind, key)] = blob
+        return blob
+
+    def add_blob(self, kind: str, key: str, content: Union[bytes, str]) -> bool:
+        """Store the blob only if the key is free; returns whether it was stored."""
+        if (kind, key) in self._blobs:
+            return False
+        self.put_blob(kind, key, content)
+        return True
+
+    def get_blob(self, kind: str, key: str) -> Optional[StoredBlob]:
+        return self._blobs.get((kind, key))
+
+    def delete_blob(self, kind: str, key: str) -> None:
+        self._blobs.pop((kind, key), None)
+
+    def put_session(self, session_id: str, calls: List[GeneratedCall]) -> None:
+        self._sessions[session_id] = calls
+
+    def append_session(self, session_id: str, calls: List[GeneratedCall]) -> None:
+        self._sessions.setdefault(session_id, []).extend(calls)
+
+    def get_session(self, session_id: str) -> Optional[List[GeneratedCall]]:
+        return self._sessions.get(session_id)
+
+    def iter_session(self, session_id: str, after: Optional[int] = None) -> Optional[Iterator[GeneratedCall]]:
+        """Iterate over a session's calls with an id above `after`, in id order."""
+        calls = self._sessions.get(session_id)
+        if calls is None:
+            return None
+        start = bisect.bisect_right([call.id for call in calls], after) if after is not None else 0
+        return iter(calls[start:])
+
+    def count_session(self, session_id: str) -> Optional[int]:
+        calls = self._sessions.get(session_id)
+        return len(calls) if calls is not None else None
+
+    def session_call_ids(self, session_id: str) -> Optional[Set[int]]:
+        calls = self._sessions.get(session_id)
+        return {call.id for call in calls} if calls is not None else None
+
+    def delete_session(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+    def session_stats(self) -> Tuple[int, int]:
+        """(sessions, calls) currently stored."""
+        return len(self._sessions), sum(len(calls) for calls in self._sessions.values())
+
+
+class FilesystemStateStore:
+    """Session calls and in-memory artifacts kept under a directory shared by all workers.
+
+    Every write is atomic (write-then-rename), so uvicorn workers on one host, or hosts
+    mounting the same volume, can serve each other's sessions. Artifacts are read through
+    mmap and served from the mapping without copying; sessions are stored as JSON.
+    """
+
+    name = 'filesystem'
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.environ.get('STATE_DIR') or os.path.join(ARTIFACT_ROOT, 'generated_state')
+        os.makedirs(os.path.join(self.root, 'sessions'), exist_ok=True)
+
+    def _path(self, *parts: str) -> str:
+        if not _SAFE_KEY.match(parts[-1]):
+            raise KeyError(parts[-1])
+        return os.path.join(self.root, *parts)
+
+    def _session_path(self, session_id: str) -> str:
+        return self._path('sessions', f"{session_id}.json")
+
+    def _appended_session_path(self, session_id: str) -> str:
+        return self._path('sessions', f"{session_id}.jsonl")
+
+    def put_blob(self, kind: str, key: str, content: Union[bytes, str]) -> StoredBlob:
+        path = atomic_write(self._path('blobs', kind, key), content)
+        etag, created_at, _ = file_validators(path)
+        return StoredBlob(content.encode('utf-8') if isinstance(content, str) else content, etag, created_at)
+
+    def add_blob(self, kind: str, key: str, content: Union[bytes, str]) -> bool:
+        """Store the blob only if the key is free, atomically across workers; returns whether it was stored."""
+        path = self._path('blobs', kind, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(content.encode('utf-8') if isinstance(content, str) else content)
+            os.link(temp_path, path)  # Fails if another worker got there first
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            with contextlib.suppress(FileNotFoundError):  # open() itself may have failed
+                os.unlink(temp_path)
+
+    def get_blob(self, kind: str, key: str) -> Optional[StoredBlob]:
+        try:
+            with open(self._path('blobs', kind, key), 'rb') as f:
+                etag, created_at, size = file_validators(f.name)
+                content = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)) if size else b''
+        except (FileNotFoundError, KeyError):
+            return None
+        return StoredBlob(content, etag, created_at)
+
+    def delete_blob(self, kind: str, key: str) -> None:
+        try:
+            os.remove(self._path('blobs', kind, key))
+        except (OSError, KeyError):
+            pass  # Already removed by another worker
+
+    def put_session(self, session_id: str, calls: List[GeneratedCall]) -> None:
+        # total_calls leads the document so session_stats() can read it without parsing the calls
+        payload = b'{"total_calls":%d,"calls":%s}' % (len(calls), _CALLS.dump_json(calls))
+        atomic_write(self._session_path(session_id), payload)
+        self._remove(self._appended_session_path(session_id))  # Superseded by the full list
+
+    def append_session(self, session_id: str, calls: List[GeneratedCall]) -> None:
+        """Add calls to a session without reading or rewriting it, one JSON line per call.
+
+        Used by bulk generation, the session's only writer, so memory use does not grow
+        with the session.
+        """
+        lines = b''.join(_CALL.dump_json(call) + b'\n' for call in calls)
+        with open(self._appended_session_path(session_id), 'ab') as f:
+            f.write(lines)
+
+    def get_session(self, session_id: str) -> Optional[List[GeneratedCall]]:
+        try:
+            with open(self._session_path(session_id), 'rb') as f:
+                document = json.loads(f.read())
+            return _CALLS.validate_python(document['calls'])
+        except (FileNotFoundError, KeyError):
+            pass
+        try:
+            with open(self._appended_session_path(session_id), 'rb') as f:
+                lines = f.read().split(b'\n')
+        except (FileNotFoundError, KeyError):
+            return None
+        # The last element is empty, or a line still being appended
+        return sorted((_CALL.validate_json(line) for line in lines[:-1]), key=lambda call: call.id)
+
+    def iter_session(self, session_id: str, after: Optional[int] = None) -> Optional[Iterator[GeneratedCall]]:
+        """Iterate over a session's calls with an id above `after`, in id order.
+
+        An appended (bulk) session is read a line at a time, skipping calls up to `after`
+        by their id prefix without parsing them, so memory use does not grow with the session.
+        Each generation run appends its calls in id order; the runs of a resumed session are
+        merged as they are read.
+        """
+        try:
+            if not os.path.exists(self._session_path(session_id)):
+                path = self._appended_session_path(session_id)
+                runs = [self._iter_appended(path, start, end, after) for start, end in _appended_runs(path)]
+                return runs[0] if len(runs) == 1 else heapq.merge(*runs, key=lambda call: call.id)
+        except (FileNotFoundError, KeyError):
+            return None
+        calls = self.get_session(session_id)
+        if calls is None:
+            return None
+        start = bisect.bisect_right([call.id for call in calls], after) if after is not None else 0
+        return iter(calls[start:])
+
+    @staticmethod
+    def _iter_appended(path: str, start: int, end: int, after: Optional[int]) -> Iterator[GeneratedCall]:
+        f = open(path, 'rb')  # Opened now, so a missing session is reported by iter_session
+        f.seek(start)
+
+        def calls() -> Iterator[GeneratedCall]:
+            with f:
+                position = start
+                for line in f:
+                    position += len(line)
+                    if position > end:
+                        break  # Past this run, or a line still being appended
+                    if after is not None:
+                        match = _CALL_ID.match(line)
+                        if match and int(match.group(1)) <= after:
+                            continue
+                    yield _CALL.validate_json(line)
+        return calls()
+
+    def count_session(self, session_id: str) -> Optional[int]:
+        """Number of calls in a session, read from the session's header or by counting appended lines."""
+        try:
+            with open(self._session_path(session_id), 'rb') as f:
+                match = _SESSION_HEADER.match(f.read(32))
+            return int(match.group(1)) if match else 0
+        except (FileNotFoundError, KeyError):
+            pass
+        try:
+            return _count_lines(self._appended_session_path(session_id))
+        except (FileNotFoundError, KeyError):
+            return None
+
+    def session_call_ids(self, session_id: str) -> Optional[Set[int]]:
+        """Ids of a session's calls; an appended session's are read from the line prefixes without parsing the calls."""
+        if os.path.exists(self._session_path(session_id)):
+            calls = self.get_session(session_id)
+            return {call.id for call in calls} if calls is not None else None
+        try:
+            with open(self._appended_session_path(session_id), 'rb') as f:
+                return {int(match.group(1)) for match in map(_CALL_ID.match, f) if match}
+        except (FileNotFoundError, KeyError):
+            return None
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def delete_session(self, session_id: str) -> None:
+        try:
+            self._remove(self._session_path(session_id))
+            self._remove(self._appended_session_path(session_id))
+        except KeyError:
+            pass
+
+    def session_stats(self) -> Tuple[int, int]:
+        sessions = calls = 0
+        with os.scandir(os.path.join(self.root, 'sessions')) as entries:
+            for entry in entries:
+                try:
+                    if entry.name.endswith('.json'):
+                        with open(entry.path, 'rb') as f:
+                            match = _SESSION_HEADER.match(f.read(32))
+                        calls += int(match.group(1)) if match else 0
+                    elif entry.name.endswith('.jsonl'):
+                        calls += _count_lines(entry.path)
+                    else:
+                        continue
+                except FileNotFoundError:
+                    continue
+                sessions += 1
+        return sessions, calls
+
+
+def _appended_runs(path: str) -> List[Tuple[int, int]]:
+    """Byte ranges of the complete lines of an appended session, split wherever the call ids stop ascending."""
+    runs = []
+    start = end = 0
+    last_id = None
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break  # Still being appended
+            match = _CALL_ID.match(line)
+            call_id = int(match.group(1)) if match else last_id
+            if last_id is not None and call_id < last_id:
+                runs.append((start, end))
+                start = end
+            last_id = call_id
+            end += len(line)
+    runs.append((start, end))
+    return runs
+
+
+def _count_lines(path: str) -> int:
+    lines = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            lines += block.count(b'\n')
+    return lines
+
+
+def create_state_store(backend: Optional[str] = None):
+    """Build the state store selected by STATE_BACKEND ('memory' by default, or 'filesystem')."""
+    backend = (backend or os.environ.get('STATE_BACKEND', 'memory')).lower()
+    if backend == 'filesystem':
+        return FilesystemStateStore()
+    if backend != 'memory':
+        raise ValueError(f"Unknown STATE_BACKEND '{backend}', expected one of: {', '.join(STATE_BACKENDS)}")
+    return MemoryStateStore()
@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import uuid
+import random
+import threading
+import contextvars
+from typing import Any, Dict, List, Optional
+
+TRACE_LEVELS = {
+    'off': 0,
+    'error': 10,
+    'info': 20,
+    'debug': 30
+}
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar('contoso_current_span', default=None)
+
+
+class _NoopSpan:
+    """Span returned when tracing is disabled or the trace was not sampled."""
+    __slots__ = ('_token',)
+
+    trace_id = None
+    span_id = None
+    sampled = False
+
+    def __init__(self):
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes) -> None:
+        pass
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        return False
+
+
+class _DisabledSpan(_NoopSpan):
+    """Shared span used when nothing can be recorded; never touches the context."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_DISABLED_SPAN = _DisabledSpan()
+
+
+class Span:
+    """A timed unit of work (request, call, stage or segment) within a trace."""
+    __slots__ = ('tracer', 'name', 'kind', 'trace_id', 'span_id', 'parent', 'attributes',
+                 'children', 'start_time', 'end_time', 'status', '_token', '_lock')
+
+    sampled = True
+
+    def __init__(self, tracer: 'Tracer', name: str, kind: str, parent: Optional['Span'], attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.attributes = attributes
+        self.children: List['Span'] = []
+        self.start_time = 0.0
+        self.end_time = 0.0
+        self.status = 'ok'
+        self._token = None
+        self._lock = threading.Lock()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.start_time = time.time()
+        if self.parent is not None:
+            with self.parent._lock:
+                self.parent.children.append(self)
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_time = time.time()
+        if exc_type is not None:
+            self.status = 'error'
+            self.attributes['error'] = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        if self.parent is None:
+            self.tracer._export(self)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'kind': self.kind,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent.span_id if self.parent else None,
+            'start_time': self.start_time,
+            'duration_ms': round((self.end_time - self.start_time) * 1000, 3),
+            'status': self.status,
+            'attributes': self.attributes,
+            'children': [child.to_dict() for child in self.children]
+        }
+
+
+class Tracer:
+    """Low-overhead span tracer with sampling, level-gated debug output and JSONL export.
+
+    Configured from the environment:
+    - TRACE_LEVEL: off, error, info or debug (default: info). Debug messages are only
+      formatted and printed at 'debug'.
+    - TRACE_SAMPLE_RATE: fraction of requests whose spans are recorded (default: 0.0).
+    - TRACE_EXPORT_PATH: JSON Lines file that sampled traces are appended to.
+    """
+
+    def __init__(self, level: Optional[str] = None, sample_rate: Optional[float] = None, export_path: Optional[str] = None):
+        level = (level or os.environ.get('TRACE_LEVEL', 'info')).lower()
+        self.level = TRACE_LEVELS.get(level, TRACE_LEVELS['info'])
+        self.debug_enabled = self.level >= TRACE_LEVELS['debug']
+
+        if sample_rate is None:
+            sample_rate = float(os.environ.get('TRACE_SAMPLE_RATE', '0'))
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+
+        default_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'generated_traces', 'traces.jsonl')
+        self.export_path = export_path or os.environ.get('TRACE_EXPORT_PATH') or default_path
+        self._export_lock = threading.Lock()
+
+    def span(self, name: str, kind: str = 'stage', **attributes):
+        """Start a span as a child of the current span, or a new sampled root trace."""
+        parent = _current_span.get()
+
+        if parent is None:
+            if self.sample_rate <= 0.0:
+                return _DISABLED_SPAN
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                return _NoopSpan()
+            return Span(self, name, kind, None, attributes)
+
+        if not parent.sampled:
+            return _DISABLED_SPAN
+
+        return Span(self, name, kind, parent, attributes)
+
+    def current_span(self):
+        return _current_span.get() or _DISABLED_SPAN
+
+    def current_trace_id(self) -> Optional[str]:
+        return self.current_span().trace_id
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set an attribute on the current span, if one is being recorded."""
+        self.current_span().set_attribute(key, value)
+
+    def debug(self, message: str, *args) -> None:
+        """Print a debug message. Formatting is deferred until the level allows it."""
+        if self.debug_enabled:
+            self._emit('Debug', message, args)
+
+    def info(self, message: str, *args) -> None:
+        if self.level >= TRACE_LEVELS['info']:
+            self._emit('Info', message, args)
+
+    def error(self, message: str, *args) -> None:
+        if self.level >= TRACE_LEVELS['error']:
+            self._emit('Error', message, args)
+
+    def _emit(self, label: str, message: str, args: tuple) -> None:
+        if args:
+            message = message % args
+        trace_id = self.current_trace_id()
+        if trace_id:
+            print(f"{label} [{trace_id[:8]}]: {message}")
+        else:
+            print(f"{label}: {message}")
+
+    def _export(self, root: Span) -> None:
+        """Append a finished root span and its children to the export file."""
+        try:
+            line = json.dumps(root.to_dict(), default=str)
+            with self._export_lock:
+                os.makedirs(os.path.dirname(self.export_path), exist_ok=True)
+                with open(self.export_path, 'a', encoding='utf-8') as f:
+                    f.write(line + '\n')
+        except Exception as e:
+            print(f"Error exporting trace {root.trace_id}: {e}")
+
+
+tracer = Tracer()
@@ -1,8 +1,10 @@
 import random
 import json
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from .data_generator import SyntheticDataGenerator
+from .artifact_layout import artifact_layout, atomic_write
+from .parsed_transcript import parse_transcript
 
 class TranscriptGenerator:
     def __init__(self):
@@ -13,7 +15,8 @@ class TranscriptGenerator:
             'caregiver_inquiry': self._generate_caregiver_inquiry_scenario
         }
     
-    def generate_transcript(self, scenario: str, sentiment: str, duration: str) -> Dict[str, Any]:
+    def generate_transcript(self, scenario: str, sentiment: str, duration: str,
+                            on_line: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """Generate a complete transcript for the specified scenario."""
         
         synthetic_data = self.data_gen.generate_call_data(scenario)
@@ -23,6 +26,10 @@ class TranscriptGenerator:
         
         transcript = self.scenarios[scenario](synthetic_data, sentiment_type, duration_minutes)
         
+        if on_line:
+            for line in transcript.split('\n'):
+                on_line(line)
+        
         return {
             'transcript': transcript,
             'scenario': scenario,
@@ -37,6 +44,10 @@ class TranscriptGenerator:
             }
         }
     
+    def generate_transcripts(self, scenario: str, sentiment: str, duration: str, count: int) -> List[Dict[str, Any]]:
+        """Generate several transcripts for the same scenario, sentiment and duration."""
+        return [self.generate_transcript(scenario, sentiment, duration) for _ in range(count)]
+    
     def _parse_duration(self, duration: str) -> int:
         """Parse duration string to minutes."""
         if duration.lower() == "short":
@@ -54,14 +65,7 @@ class TranscriptGenerator:
     
     def _extract_participants(self, transcript: str) -> List[str]:
         """Extract participant names from transcript."""
-        participants = []
-        lines = transcript.split('\n')
-        for line in lines:
-            if ':' in line:
-                speaker = line.split(':')[0].strip()
-                if speaker not in participants:
-                    participants.append(speaker)
-        return participants
+        return list(parse_transcript(transcript).participants)
     
     def _generate_healthcare_provider_scenario(self, data: Dict, sentiment: str, duration: int) -> str:
         """Generate transcript for healthcare provider inquiry scenario."""
@@ -420,10 +424,8 @@ class TranscriptGenerator:
         
         return '\n'.join(transcript_parts)
     
-    def save_transcript_to_file(self, transcript_data: Dict[str, Any], transcript_id: str, save_locally: bool = True) -> Dict[str, Any]:
+    def save_transcript_to_file(self, transcript_data: Dict[str, Any], transcript_id: str, save_locally: bool = True, session_id: Optional[str] = None) -> Dict[str, Any]:
         """Save transcript to file if save_locally=True and return transcript info with content."""
-        import os
-        
         content = f"Contoso Call Center Transcript\n"
         content += f"Generated: {transcript_data['metadata']['generated_at']}\n"
         content += f"Scenario: {transcript_data['scenario']}\n"
@@ -440,13 +442,8 @@ class TranscriptGenerator:
         }
         
         if save_locally:
-            transcript_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'generated_transcripts')
-            os.makedirs(transcript_dir, exist_ok=True)
-            
-            file_path = os.path.join(transcript_dir, f"{transcript_id}.txt")
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            file_path = artifact_layout.path_for('transcript', transcript_id, 'txt', session_id=session_id)
+            atomic_write(file_path, content)
             
             result['file_path'] = file_path
         
@@ -0,0 +1,79 @@
+import os
+import re
+import random
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterable, NamedTuple, Optional, Set, Tuple
+
+_PLACEHOLDER = re.compile(r"\{\{(\w+)\}\}")
+
+SKELETON_INSTRUCTIONS = """
+**Placeholders:**
+The values above are placeholders in double braces (e.g. {{patient_name}}). Copy them verbatim
+wherever that detail is spoken, including speaker labels, and never replace them with invented
+names, dates, numbers or identifiers. Do not introduce any other personal details.
+"""
+
+
+class TranscriptSkeleton(NamedTuple):
+    transcript: str
+    duration_minutes: int
+    placeholders: Tuple[str, ...]
+
+
+def placeholder_data(fields: Iterable[str]) -> Dict[str, str]:
+    """Map every synthetic_data field to its '{{field}}' placeholder, for use in place of real values."""
+    return {field: f"{{{{{field}}}}}" for field in fields}
+
+
+def placeholders_in(text: str) -> Set[str]:
+    return set(_PLACEHOLDER.findall(text))
+
+
+def hydrate(skeleton: str, data: Dict[str, str]) -> str:
+    """Fill a skeleton's placeholders from synthetic data, leaving unknown placeholders untouched."""
+    return _PLACEHOLDER.sub(lambda match: str(data.get(match.group(1), match.group(0))), skeleton)
+
+
+class SkeletonCache:
+    """Per (scenario, sentiment, duration bucket) pools of LLM transcript skeletons.
+
+    A skeleton is a transcript generated with placeholders instead of synthetic data. With
+    probability TRANSCRIPT_SKELETON_REUSE a new call re-hydrates a cached skeleton instead of
+    paying for a completion; 0 (the default) disables skeletons entirely.
+    """
+
+    def __init__(self, reuse_ratio: Optional[float] = None, pool_size: Optional[int] = None):
+        if reuse_ratio is None:
+            reuse_ratio = float(os.environ.get('TRANSCRIPT_SKELETON_REUSE', '0'))
+        if pool_size is None:
+            pool_size = int(os.environ.get('TRANSCRIPT_SKELETON_POOL_SIZE', '5'))
+
+        self.reuse_ratio = min(max(reuse_ratio, 0.0), 1.0)
+        self.pool_size = pool_size
+        self._pools: Dict[Tuple[str, str, str], Deque[TranscriptSkeleton]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.reuse_ratio > 0
+
+    def reusable(self, scenario: str, sentiment: str, duration: str) -> Optional[TranscriptSkeleton]:
+        """Return a cached skeleton to re-hydrate, or None when a fresh generation is due."""
+        with self._lock:
+            pool = self._pools.get((scenario, sentiment, duration.lower()))
+            if not pool or random.random() >= self.reuse_ratio:
+                return None
+            return random.choice(pool)
+
+    def add(self, scenario: str, sentiment: str, duration: str, skeleton: TranscriptSkeleton) -> None:
+        key = (scenario, sentiment, duration.lower())
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = self._pools[key] = deque(maxlen=self.pool_size)
+            pool.append(skeleton)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'/'.join(key): len(pool) for key, pool in self._pools.items()}
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Generate a large transcript corpus offline through the Azure OpenAI Batch API.
+
+Prompts are written to a JSONL request file, submitted as a single batch job and the
+results are streamed back into transcript files once the job completes. A job can be
+collected later (or from another machine sharing the job directory) with --resume.
+
+Usage:
+    python batch_generate_transcripts.py --count 10000 [--scenarios healthcare_provider,caregiver_inquiry]
+                                         [--sentiment mixed] [--duration medium] [--local]
+    python batch_generate_transcripts.py --resume <job_id>
+"""
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+load_dotenv()
+
+from app.services.azure_openai_generator import AzureOpenAITranscriptGenerator
+from app.services.azure_openai_batch import (
+    BATCH_JOB_ROOT, AzureOpenAIBatchBackend, LocalBatchBackend, TranscriptBatchJob
+)
+from app.services.artifact_layout import new_artifact_id
+
+SCENARIOS = ['healthcare_provider', 'patient_visit', 'caregiver_inquiry']
+
+
+def build_plan(count: int, scenarios, sentiment: str, duration: str):
+    return [(scenarios[i % len(scenarios)], sentiment, duration) for i in range(count)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate transcripts offline with the Azure OpenAI Batch API")
+    parser.add_argument('--count', type=int, default=100, help="Number of transcripts to generate")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help="Comma-separated scenarios, used round-robin")
+    parser.add_argument('--sentiment', default='mixed', choices=['positive', 'neutral', 'negative', 'mixed'])
+    parser.add_argument('--duration', default='medium', choices=['short', 'medium', 'long'])
+    parser.add_argument('--resume', metavar='JOB_ID', help="Collect an already submitted job")
+    parser.add_argument('--poll-interval', type=float, default=30.0, help="Seconds between status checks")
+    parser.add_argument('--local', action='store_true', help="Use the local stand-in backend instead of Azure")
+    args = parser.parse_args()
+
+    generator = AzureOpenAITranscriptGenerator()
+    backend = LocalBatchBackend(os.path.join(BATCH_JOB_ROOT, 'local_backend')) if args.local else AzureOpenAIBatchBackend()
+    job = TranscriptBatchJob(backend, generator, job_id=args.resume)
+
+    if args.resume:
+        if not job.batch_id:
+            print(f"❌ No submitted job found for {args.resume}")
+            return 1
+        if job.manifest.get('collected') is not None:
+            print(f"Job {job.job_id} was already collected ({job.manifest['collected']} transcript(s))")
+            return 0
+    else:
+        scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+        unknown = [s for s in scenarios if s not in SCENARIOS]
+        if unknown:
+            print(f"❌ Unknown scenario(s): {', '.join(unknown)}")
+            return 1
+
+        requests_path = job.prepare(build_plan(args.count, scenarios, args.sentiment, args.duration))
+        print(f"Wrote {args.count} request(s) to {requests_path}")
+        batch_id = job.submit()
+        print(f"Submitted batch {batch_id} as job {job.job_id}")
+
+    def report(status):
+        print(f"Batch {status.batch_id}: {status.status} ({status.completed}/{status.total} completed, {status.failed} failed)")
+
+    status = job.wait(poll_interval=0 if args.local else args.poll_interval, on_status=report)
+    if status.status != 'completed':
+        print(f"❌ Batch finished with status '{status.status}'")
+        return 1
+
+    saved = 0
+    for custom_id, transcript_data in job.results():
+        transcript_id = new_artifact_id(int(custom_id.rsplit('_', 1)[1]))
+        result = generator.save_transcript_to_file(transcript_data, transcript_id, session_id=job.job_id)
+        if result.get('file_path'):
+            saved += 1
+
+    job.mark_collected(saved)
+    failed = sum(1 for _ in job.errors())
+    print(f"✓ Saved {saved} transcript(s) for job {job.job_id}" + (f", {failed} failed request(s)" if failed else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
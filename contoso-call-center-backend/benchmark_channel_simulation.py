@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vectorized telephone channel simulator against the pydub filter chain
+it replaced (low_pass_filter, high_pass_filter, compress_dynamic_range), on synthetic
+speech-like audio, and report how much energy each leaves outside the 300-3400 Hz band.
+
+Usage:
+    python benchmark_channel_simulation.py [--seconds 60] [--rate 16000] [--iterations 3]
+"""
+import os
+import sys
+import time
+import argparse
+from statistics import median
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np
+from pydub import AudioSegment
+
+from app.services.channel_simulator import TELEPHONE_BAND, simulate_phone_line
+
+
+def speech_like(seconds: float, sample_rate: int, seed: int = 7) -> AudioSegment:
+    """Voiced harmonics with a gliding pitch, syllable-rate envelope, pauses and broadband noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+
+    pitch = 160 + 40 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 30) if k * 220 < sample_rate / 2)
+
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) ** 2
+    pauses = (np.sin(2 * np.pi * 0.2 * t) > -0.6).astype(float)
+    signal = (voiced * syllables + 0.05 * rng.standard_normal(len(t))) * pauses
+
+    pcm = (signal / np.max(np.abs(signal)) * 0.8 * 32767).astype(np.int16)
+    return AudioSegment(pcm.tobytes(), frame_rate=sample_rate, sample_width=2, channels=1)
+
+
+def legacy_phone_quality(audio: AudioSegment) -> AudioSegment:
+    """The previous AudioGenerator.simulate_phone_quality."""
+    audio = audio.low_pass_filter(3400)
+    audio = audio.high_pass_filter(300)
+    return audio.compress_dynamic_range()
+
+
+def out_of_band_fraction(audio: AudioSegment) -> float:
+    samples = np.frombuffer(audio.raw_data, dtype=np.int16).astype(np.float64)
+    power = np.abs(np.fft.rfft(samples)) ** 2
+    freqs = np.fft.rfftfreq(len(samples), 1 / audio.frame_rate)
+    outside = (freqs < TELEPHONE_BAND[0]) | (freqs > TELEPHONE_BAND[1])
+    return power[outside].sum() / power.sum()
+
+
+def time_it(fn, iterations: int) -> float:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return median(timings) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark telephone channel simulation")
+    parser.add_argument('--seconds', type=float, default=60.0)
+    parser.add_argument('--rate', type=int, default=16000)
+    parser.add_argument('--iterations', type=int, default=3)
+    args = parser.parse_args()
+
+    audio = speech_like(args.seconds, args.rate)
+    print(f"Input: {args.seconds:.0f} s of mono audio at {args.rate} Hz "
+          f"({out_of_band_fraction(audio):.1%} of energy outside {TELEPHONE_BAND[0]:.0f}-{TELEPHONE_BAND[1]:.0f} Hz)")
+
+    legacy_ms = time_it(lambda: legacy_phone_quality(audio), args.iterations)
+    print(f"pydub chain (filters + compress_dynamic_range): {legacy_ms:9.1f} ms  "
+          f"out of band {out_of_band_fraction(legacy_phone_quality(audio)):.1%}")
+
+    variants = [
+        ('band-pass + compression + mu-law', {}),
+        ('band-pass + compression + A-law', {'companding': 'alaw'}),
+        ('... + 2% packet loss + 2% jitter', {'packet_loss': 0.02, 'jitter': 0.02, 'seed': 1})
+    ]
+    for name, settings in variants:
+        vectorized_ms = time_it(lambda: simulate_phone_line(audio, settings), args.iterations)
+        processed = simulate_phone_line(audio, settings)
+        print(f"vectorized {name:<36} {vectorized_ms:9.1f} ms  ({legacy_ms / vectorized_ms:5.0f}x)  "
+              f"out of band {out_of_band_fraction(processed):.1%}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
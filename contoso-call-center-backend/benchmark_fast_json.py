@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark the standard and fast serialization paths of /generate-calls on a
+50-call, long-duration response, and report gzip/brotli payload sizes.
+
+Usage:
+    python benchmark_fast_json.py [--calls 50] [--iterations 20]
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+from statistics import median
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi.encoders import jsonable_encoder
+
+from app.models import CallGenerationResponse, GeneratedCall, TranscriptData
+from app.services.transcript_generator import TranscriptGenerator
+from app.responses import BROTLI_QUALITY, GZIP_LEVEL, brotli
+
+SCENARIOS = ['healthcare_provider', 'patient_visit', 'caregiver_inquiry']
+WORDS_PER_MINUTE = 150
+
+
+def build_calls(num_calls: int):
+    """Generate long-duration calls, padding transcripts to a realistic spoken length."""
+    generator = TranscriptGenerator()
+    calls = []
+    for i in range(num_calls):
+        data = generator.generate_transcript(SCENARIOS[i % len(SCENARIOS)], 'neutral', 'long')
+        target_words = data['metadata']['estimated_duration'] * WORDS_PER_MINUTE
+        lines = data['transcript'].split('\n')
+        padded = list(lines)
+        while len(' '.join(padded).split()) < target_words:
+            padded.extend(lines)
+        data['transcript'] = '\n'.join(padded)
+        data['metadata']['word_count'] = len(data['transcript'].split())
+
+        calls.append(GeneratedCall(
+            id=i + 1,
+            scenario=data['scenario'],
+            transcript_data=TranscriptData(**data),
+            audio_file_url=f"/audio/benchmark_call_{i + 1}",
+            transcript_file_url=f"/transcript/benchmark_call_{i + 1}"
+        ))
+    return calls
+
+
+def standard_path(calls) -> bytes:
+    """What FastAPI does with response_model: revalidate, encode generically, json.dumps."""
+    response = CallGenerationResponse(calls=calls, total_calls=len(calls), generation_time=1.0, session_id='benchmark')
+    validated = CallGenerationResponse.model_validate(response.model_dump())
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(',', ':')).encode('utf-8')
+
+
+def fast_path(calls) -> bytes:
+    response = CallGenerationResponse.model_construct(calls=calls, total_calls=len(calls), generation_time=1.0, session_id='benchmark')
+    return response.model_dump_json().encode('utf-8')
+
+
+def time_it(fn, iterations: int) -> float:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return median(timings) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark /generate-calls response serialization")
+    parser.add_argument('--calls', type=int, default=50)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    calls = build_calls(args.calls)
+    body = fast_path(calls)
+
+    if json.loads(body) != json.loads(standard_path(calls)):
+        print("❌ Fast path output differs from the standard path")
+        return 1
+
+    standard_ms = time_it(lambda: standard_path(calls), args.iterations)
+    fast_ms = time_it(lambda: fast_path(calls), args.iterations)
+
+    print(f"Response: {args.calls} calls, {len(body):,} bytes of JSON")
+    print(f"Standard path (response_model): {standard_ms:8.2f} ms")
+    print(f"Fast path (model_dump_json):    {fast_ms:8.2f} ms  ({standard_ms / fast_ms:.1f}x)")
+
+    gzip_ms = time_it(lambda: gzip.compress(body, compresslevel=GZIP_LEVEL), args.iterations)
+    gzipped = gzip.compress(body, compresslevel=GZIP_LEVEL)
+    print(f"gzip (level {GZIP_LEVEL}):   {len(gzipped):>9,} bytes ({len(body) / len(gzipped):.1f}:1) in {gzip_ms:.2f} ms")
+
+    if brotli is not None:
+        brotli_ms = time_it(lambda: brotli.compress(body, quality=BROTLI_QUALITY), args.iterations)
+        compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+        print(f"brotli (quality {BROTLI_QUALITY}): {len(compressed):>9,} bytes ({len(body) / len(compressed):.1f}:1) in {brotli_ms:.2f} ms")
+    else:
+        print("brotli: not installed (pip install brotli)")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Move artifacts from the flat generated_audio/ and generated_transcripts/ directories
+into the sharded layout selected by ARTIFACT_LAYOUT, updating the artifact catalog.
+
+Usage:
+    python migrate_artifact_layout.py [--layout date|session|hash] [--dry-run]
+"""
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+load_dotenv()
+
+from app.services.artifact_catalog import ArtifactCatalog
+from app.services.artifact_layout import ArtifactLayout, legacy_created_at
+
+AUDIO_EXTENSION_FORMATS = {
+    'wav': 'wav',
+    'flac': 'flac',
+    'ogg': 'opus',
+    'mulaw.wav': 'mulaw'
+}
+
+ORIGINAL_FORMATS = {
+    'audio': 'wav',
+    'transcript': 'txt'
+}
+
+
+def _artifact_format(kind: str, extension: str):
+    if kind == 'transcript':
+        return 'txt' if extension == 'txt' else None
+    return AUDIO_EXTENSION_FORMATS.get(extension)
+
+
+def migrate_kind(layout: ArtifactLayout, catalog: ArtifactCatalog, kind: str, dry_run: bool = False) -> int:
+    """Relocate the top-level files of one artifact directory. Returns the number of files moved."""
+    base = layout.base_directory(kind)
+    if not os.path.isdir(base):
+        return 0
+
+    moved = 0
+    with os.scandir(base) as entries:
+        for entry in entries:
+            if not entry.is_file() or entry.name.endswith('.tmp'):
+                continue
+
+            artifact_id, _, extension = entry.name.partition('.')
+            artifact_format = _artifact_format(kind, extension)
+            if artifact_format is None:
+                print(f"Skipping unrecognised file: {entry.path}")
+                continue
+
+            original = catalog.lookup(artifact_id, kind, ORIGINAL_FORMATS[kind])
+            session_id = original.session_id if original else None
+            target = layout.path_for(kind, artifact_id, extension, session_id=session_id,
+                                     created=legacy_created_at(artifact_id, entry.path))
+
+            if os.path.abspath(target) == os.path.abspath(entry.path):
+                continue
+
+            print(f"{'Would move' if dry_run else 'Moving'} {entry.path} -> {target}")
+            if dry_run:
+                moved += 1
+                continue
+
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(entry.path, target)
+
+            record = catalog.lookup(artifact_id, kind, artifact_format)
+            if record:
+                catalog.update_path(record, target)
+            else:
+                catalog.record(artifact_id, kind, artifact_format, os.path.getsize(target), path=target)
+            moved += 1
+
+    return moved
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Migrate flat artifact directories to a sharded layout")
+    parser.add_argument('--layout', help="Target layout (defaults to ARTIFACT_LAYOUT)")
+    parser.add_argument('--dry-run', action='store_true', help="Only print the moves that would be made")
+    args = parser.parse_args()
+
+    layout = ArtifactLayout(scheme=args.layout)
+    if layout.scheme == 'flat':
+        print("Target layout is 'flat'; nothing to migrate")
+        return 0
+
+    catalog = ArtifactCatalog()
+
+    total = 0
+    for kind in ('audio', 'transcript'):
+        count = migrate_kind(layout, catalog, kind, dry_run=args.dry_run)
+        print(f"{kind}: {count} file(s) {'to move' if args.dry_run else 'moved'}")
+        total += count
+
+    print(f"Migration {'planned' if args.dry_run else 'completed'}: {total} file(s) into '{layout.scheme}' layout")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
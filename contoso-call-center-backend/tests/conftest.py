@@ -0,0 +1,20 @@
+import pytest
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """TestClient for the API with template transcripts instead of Azure OpenAI and a fresh in-memory state store."""
+    monkeypatch.setenv('ARTIFACT_CATALOG_PATH', str(tmp_path / 'catalog.sqlite3'))
+    monkeypatch.setenv('WARM_BACKENDS', 'false')
+    from fastapi.testclient import TestClient
+
+    from app import main
+    from app.services.idempotency import IdempotencyRecords
+    from app.services.state_store import MemoryStateStore
+    from app.services.transcript_generator import TranscriptGenerator
+
+    store = MemoryStateStore()
+    monkeypatch.setattr(main, 'transcript_generator', TranscriptGenerator())
+    monkeypatch.setattr(main, 'state_store', store)
+    monkeypatch.setattr(main, 'idempotency_records', IdempotencyRecords(store))
+    return TestClient(main.app)
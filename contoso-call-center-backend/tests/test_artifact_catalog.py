@@ -0,0 +1,26 @@
+"""
+Artifact catalog counters, which /stats reports without scanning the artifact directories.
+"""
+from app.services.artifact_catalog import ArtifactCatalog
+
+
+def test_counts_are_kept_per_kind_and_format(tmp_path):
+    catalog = ArtifactCatalog(str(tmp_path / 'catalog.sqlite3'))
+    catalog.record('call_1', 'audio', 'wav', 100, path=str(tmp_path / 'call_1.wav'))
+    catalog.record('call_2', 'audio', 'wav', 100)
+    catalog.record('call_1', 'transcript', 'txt', 10, path=str(tmp_path / 'call_1.txt'))
+
+    # Delivery variants and re-recorded entries do not add audio files
+    catalog.record('call_1', 'audio', 'flac', 60, path=str(tmp_path / 'call_1.flac'))
+    catalog.record('call_1', 'audio', 'flac', 60, path=str(tmp_path / 'call_1.flac'))
+
+    counts = catalog.counts()
+    assert counts['audio']['wav'] == {'files': 1, 'in_memory': 1}
+    assert counts['audio']['flac'] == {'files': 1, 'in_memory': 0}
+    assert counts['transcript']['txt'] == {'files': 1, 'in_memory': 0}
+
+    catalog.remove([catalog.lookup('call_1', 'audio', 'flac')])
+    assert catalog.counts()['audio']['flac'] == {'files': 0, 'in_memory': 0}
+
+    # Counts survive reopening the catalog
+    assert ArtifactCatalog(catalog.db_path).counts()['audio']['wav'] == {'files': 1, 'in_memory': 1}
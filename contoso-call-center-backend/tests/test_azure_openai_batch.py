@@ -0,0 +1,66 @@
+"""
+TranscriptBatchJob end to end against the on-disk LocalBatchBackend: prepare, submit, poll,
+collect results and report failed requests, without Azure.
+"""
+import json
+
+import pytest
+
+from app.services.azure_openai_batch import LocalBatchBackend, TranscriptBatchJob
+from app.services.azure_openai_generator import AzureOpenAITranscriptGenerator
+
+PLAN = [
+    ('healthcare_provider', 'positive', 'short'),
+    ('patient_visit', 'negative', 'medium'),
+    ('caregiver_inquiry', 'neutral', 'long')
+]
+
+
+@pytest.fixture
+def generator(monkeypatch):
+    # The client is only constructed, never called
+    monkeypatch.setenv('AZURE_OPENAI_API_KEY', 'test-key')
+    monkeypatch.setenv('AZURE_OPENAI_ENDPOINT', 'https://example.openai.azure.com')
+    return AzureOpenAITranscriptGenerator()
+
+
+def test_transcript_batch_job_runs_against_local_backend(tmp_path, generator):
+    def responder(body):
+        if 'patient visit inquiry' in body['messages'][-1]['content']:
+            raise RuntimeError('model overloaded')
+        return "Agent: Thank you for calling, this is Alex.\nCaller: Hi, I have a question."
+
+    backend = LocalBatchBackend(str(tmp_path / 'backend'), responder=responder, polls_until_complete=2)
+    job = TranscriptBatchJob(backend, generator, root=str(tmp_path / 'jobs'))
+
+    requests_path = job.prepare(PLAN)
+    with open(requests_path) as f:
+        lines = [json.loads(line) for line in f]
+    assert [line['custom_id'] for line in lines] == ['call_1', 'call_2', 'call_3']
+    assert all(line['body']['model'] == 'local' and line['url'] == '/chat/completions' for line in lines)
+
+    batch_id = job.submit()
+    assert batch_id and job.batch_id == batch_id
+
+    seen = []
+    status = job.wait(poll_interval=0, on_status=seen.append)
+    assert [s.status for s in seen] == ['in_progress', 'in_progress', 'completed']
+    assert (status.completed, status.failed, status.total) == (2, 1, 3)
+
+    # A second process resumes the job from its manifest
+    resumed = TranscriptBatchJob(backend, generator, job_id=job.job_id, root=str(tmp_path / 'jobs'))
+    assert resumed.batch_id == batch_id
+
+    results = dict(resumed.results())
+    assert sorted(results) == ['call_1', 'call_3']
+    for custom_id, (scenario, _, _) in zip(('call_1', 'call_3'), (PLAN[0], PLAN[2])):
+        transcript = results[custom_id]
+        assert transcript['scenario'] == scenario
+        assert transcript['participants'] == ['Agent', 'Caller']
+        assert transcript['synthetic_data'] == resumed.manifest['requests'][custom_id]['synthetic_data']
+        assert transcript['metadata']['generation_method'] == 'local_batch'
+        assert transcript['metadata']['batch_id'] == batch_id
+
+    errors = list(resumed.errors())
+    assert [error['custom_id'] for error in errors] == ['call_2']
+    assert errors[0]['response']['status_code'] == 500
@@ -0,0 +1,75 @@
+"""
+Search cursors and the in-process call search index.
+"""
+import base64
+import json
+
+import pytest
+
+from app.services.call_search import CallSearchIndex, decode_cursor, encode_cursor
+
+CATALOG_FIELDS = {'created_at': str, 'session_id': str, 'call_id': int}
+
+
+def _raw_cursor(position) -> str:
+    return base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+
+
+def test_cursor_round_trip():
+    position = {'created_at': '2026-10-19T12:00:00+00:00', 'session_id': 'abc', 'call_id': 7}
+    assert decode_cursor(encode_cursor(position), CATALOG_FIELDS) == position
+    assert decode_cursor(encode_cursor({'doc_id': 42}), {'doc_id': int}) == {'doc_id': 42}
+
+
+@pytest.mark.parametrize('cursor', [None, ''])
+def test_missing_cursor_starts_from_the_beginning(cursor):
+    assert decode_cursor(cursor, {'doc_id': int}) is None
+
+
+@pytest.mark.parametrize('cursor', [
+    'not base64!',
+    base64.urlsafe_b64encode(b'\xff\xfe').decode('ascii'),
+    base64.urlsafe_b64encode(b'{"doc_id":').decode('ascii'),
+    _raw_cursor([1, 2]),
+    _raw_cursor({}),
+    _raw_cursor({'doc_id': 1, 'extra': 2}),
+    _raw_cursor({'after': 1}),
+    _raw_cursor({'doc_id': '1'}),
+    _raw_cursor({'doc_id': 1.5}),
+    _raw_cursor({'doc_id': True}),
+    _raw_cursor({'doc_id': None})
+])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, {'doc_id': int})
+
+
+def _transcript(scenario: str, text: str, customer: str):
+    return {
+        'transcript': text,
+        'scenario': scenario,
+        'sentiment': 'positive',
+        'participants': ['Agent', 'Caller'],
+        'synthetic_data': {'customer_name': customer},
+        'metadata': {'estimated_duration': 3}
+    }
+
+
+def test_search_filters_and_pages_newest_first():
+    index = CallSearchIndex()
+    for call_id in range(1, 6):
+        index.add('session', call_id, _transcript('patient_visit', f"Agent: Billing question number {call_id}", 'Ana Lee'))
+    index.add('session', 6, _transcript('caregiver_inquiry', "Agent: Billing question", 'Ana Lee'))
+
+    results, cursor = index.search(text='billing', filters={'scenario': 'PATIENT_VISIT'}, limit=2)
+    assert [result['call_id'] for result in results] == [5, 4]
+
+    seen = [result['call_id'] for result in results]
+    while cursor:
+        results, cursor = index.search(text='billing', filters={'scenario': 'patient_visit'}, limit=2, cursor=cursor)
+        seen += [result['call_id'] for result in results]
+    assert seen == [5, 4, 3, 2, 1]
+
+    assert index.search(filters={'customer_name': 'ana lee'}, max_duration=2) == ([], None)
+    assert index.remove_session('session') == 6
+    assert index.search() == ([], None)
@@ -0,0 +1,198 @@
+"""
+Admission control, weighted fair queuing and stage limits for call generation.
+"""
+import asyncio
+import threading
+
+import pytest
+
+from app.services.generation_admission import (
+    AdmissionController, AdmissionRejected, CallScheduler, FairQueue, FairSemaphore, StageLimits
+)
+
+
+def test_admission_queues_then_rejects_when_the_queue_is_full():
+    async def scenario():
+        controller = AdmissionController(max_active=1, max_queue=1, queue_timeout=5, max_queued_per_client=1)
+        release = asyncio.Event()
+
+        async def hold(client_id):
+            async with controller.admit(client_id) as queue_wait:
+                await release.wait()
+                return queue_wait
+
+        running = asyncio.create_task(hold('a'))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(hold('b'))
+        await asyncio.sleep(0)
+        assert controller.stats()['active'] == 1 and controller.stats()['queued'] == 1
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            controller.check('c')
+        assert rejected.value.status_code == 503 and rejected.value.retry_after >= 1
+        with pytest.raises(AdmissionRejected):
+            async with controller.admit('c'):
+                pass
+
+        release.set()
+        assert await running == 0.0
+        assert await queued > 0.0
+        stats = controller.stats()
+        assert (stats['admitted'], stats['rejected_queue_full'], stats['active'], stats['queued']) == (2, 2, 0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_admission_limits_queued_requests_per_client():
+    async def scenario():
+        controller = AdmissionController(max_active=1, max_queue=10, queue_timeout=5, max_queued_per_client=1)
+        release = asyncio.Event()
+
+        async def hold(client_id):
+            async with controller.admit(client_id):
+                await release.wait()
+
+        tasks = [asyncio.create_task(hold('a')), asyncio.create_task(hold('b'))]
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            controller.check('b')
+        assert rejected.value.status_code == 429
+        controller.check('c')  # Another client may still queue
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert controller.stats()['rejected_client_limit'] == 1
+
+    asyncio.run(scenario())
+
+
+def test_admission_rejects_a_request_that_waits_too_long():
+    async def scenario():
+        controller = AdmissionController(max_active=1, max_queue=1, queue_timeout=0.05, max_queued_per_client=1)
+        async with controller.admit('a'):
+            with pytest.raises(AdmissionRejected) as rejected:
+                async with controller.admit('b'):
+                    pass
+        assert rejected.value.status_code == 503
+        assert controller.stats()['rejected_timeout'] == 1 and controller.stats()['queued'] == 0
+
+        # The slot is free again once the holder leaves
+        async with controller.admit('b') as queue_wait:
+            assert queue_wait == 0.0
+
+    asyncio.run(scenario())
+
+
+def test_stage_limits_count_slots_in_use():
+    limits = StageLimits({'llm': 1, 'tts': 2})
+    with limits.slot('tts'), limits.slot('tts'):
+        assert limits.stats()['tts'] == {'limit': 2, 'in_use': 2}
+    assert limits.stats() == {'llm': {'limit': 1, 'in_use': 0}, 'tts': {'limit': 2, 'in_use': 0}}
+
+
+def _drain(queue: FairQueue) -> list:
+    return [queue.pop() for _ in range(len(queue))]
+
+
+def test_fair_queue_serves_a_new_flow_ahead_of_a_backlog():
+    queue = FairQueue()
+    for i in range(5):
+        queue.push('large', f'large-{i}')
+    assert queue.pop() == 'large-0'
+    queue.push('small', 'small-0')
+
+    assert _drain(queue) == ['small-0', 'large-1', 'large-2', 'large-3', 'large-4']
+    with pytest.raises(IndexError):
+        queue.pop()
+
+
+def test_fair_queue_shares_by_weight_and_cost():
+    queue = FairQueue()
+    for i in range(4):
+        queue.push('high', f'high-{i}', weight=2.0)
+        queue.push('low', f'low-{i}', weight=1.0)
+    assert _drain(queue)[:6] == ['high-0', 'low-0', 'high-1', 'low-1', 'high-2', 'high-3']
+
+    queue.push('expensive', 'expensive-0', cost=3.0)
+    queue.push('expensive', 'expensive-1', cost=3.0)
+    queue.push('cheap', 'cheap-0')
+    queue.push('cheap', 'cheap-1')
+    queue.push('cheap', 'cheap-2')
+    assert _drain(queue) == ['expensive-0', 'cheap-0', 'cheap-1', 'cheap-2', 'expensive-1']
+
+
+def test_fair_queue_skips_discarded_items():
+    queue = FairQueue()
+    for item in ('a', 'b', 'c'):
+        queue.push('flow', item)
+    queue.discard('b')
+    queue.discard('missing')
+    assert len(queue) == 2
+    assert _drain(queue) == ['a', 'c']
+
+
+def test_fair_semaphore_grants_waiters_in_fair_order():
+    async def scenario():
+        semaphore = FairSemaphore(1)
+        assert await semaphore.acquire('holder') == 0.0
+        granted = []
+
+        async def wait(flow, name):
+            await semaphore.acquire(flow)
+            granted.append(name)
+            semaphore.release()
+
+        waiters = [asyncio.create_task(wait('large', f'large-{i}')) for i in range(3)]
+        await asyncio.sleep(0)
+        waiters.append(asyncio.create_task(wait('small', 'small-0')))
+        await asyncio.sleep(0)
+        assert semaphore.waiting == 4
+
+        semaphore.release()
+        await asyncio.gather(*waiters)
+        assert granted == ['large-0', 'small-0', 'large-1', 'large-2']
+        assert (semaphore.active, semaphore.waiting) == (0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_fair_semaphore_timeout_and_cancellation_give_up_the_place():
+    async def scenario():
+        semaphore = FairSemaphore(1)
+        await semaphore.acquire('holder')
+
+        with pytest.raises(asyncio.TimeoutError):
+            await semaphore.acquire('late', timeout=0.01)
+        cancelled = asyncio.create_task(semaphore.acquire('gone'))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert semaphore.waiting == 0
+
+        semaphore.release()
+        assert semaphore.active == 0 and semaphore.try_acquire()
+
+    asyncio.run(scenario())
+
+
+def test_call_scheduler_caps_running_calls():
+    async def scenario():
+        scheduler = CallScheduler(workers=2)
+        running = []
+        peak = []
+
+        def call(number):
+            running.append(number)
+            peak.append(len(running))
+            threading.Event().wait(0.02)
+            running.remove(number)
+            return number
+
+        results = await asyncio.gather(*(scheduler.run(f'flow-{i % 2}', 1.0, call, i) for i in range(6)))
+        assert results == list(range(6))
+        assert max(peak) <= 2
+        assert scheduler.stats() == {'workers': 2, 'running': 0, 'queued': 0}
+
+    asyncio.run(scenario())
@@ -0,0 +1,78 @@
+"""
+Idempotency-Key records: claiming a key, replaying its result and taking over abandoned claims.
+"""
+import pytest
+
+from app.services import idempotency
+from app.services.idempotency import IdempotencyConflict, IdempotencyRecords, request_fingerprint
+from app.services.state_store import FilesystemStateStore, MemoryStateStore
+
+FINGERPRINT = request_fingerprint(b'{"num_calls":2}')
+
+
+@pytest.fixture(params=['memory', 'filesystem'])
+def store(request, tmp_path):
+    return MemoryStateStore() if request.param == 'memory' else FilesystemStateStore(str(tmp_path))
+
+
+def test_first_claim_wins_and_completed_result_is_replayed(store):
+    records = IdempotencyRecords(store)
+    store.put_blob('generations', 'first', b'')  # The first request's generation is running
+
+    assert records.claim('key', FINGERPRINT, 'first', 'session-1') is None
+    running = records.claim('key', FINGERPRINT, 'retry', 'session-2')
+    assert (running['status'], running['request_id'], running['session_id']) == ('running', 'first', 'session-1')
+
+    records.complete('key', 1.5, [{'id': 2, 'scenario': 'patient_visit', 'error': 'llm down', 'attempts': 3}])
+    replayed = records.claim('key', FINGERPRINT, 'retry', 'session-3')
+    assert (replayed['status'], replayed['session_id'], replayed['generation_time']) == ('completed', 'session-1', 1.5)
+    assert [failed['id'] for failed in replayed['failed_calls']] == [2]
+
+
+def test_key_reused_with_a_different_request_is_a_conflict(store):
+    records = IdempotencyRecords(store)
+    records.claim('key', FINGERPRINT, 'first', 'session-1')
+
+    with pytest.raises(IdempotencyConflict):
+        records.claim('key', request_fingerprint(b'{"num_calls":3}'), 'second', 'session-2')
+
+
+def test_released_and_expired_keys_can_be_claimed_again(store):
+    records = IdempotencyRecords(store)
+    records.claim('key', FINGERPRINT, 'first', 'session-1')
+    records.release('key')
+    assert records.claim('key', FINGERPRINT, 'second', 'session-2') is None
+
+    expiring = IdempotencyRecords(store, ttl=-1)
+    assert expiring.claim('key', FINGERPRINT, 'third', 'session-3') is None
+    assert records.get('key')['request_id'] == 'third'
+
+
+def test_claim_of_a_generation_that_is_no_longer_running_is_taken_over(store, monkeypatch):
+    monkeypatch.setattr(idempotency, 'STALE_CLAIM_SECONDS', -1)
+    records = IdempotencyRecords(store)
+
+    records.claim('key', FINGERPRINT, 'crashed', 'session-1')
+    assert records.claim('key', FINGERPRINT, 'retry', 'session-2') is None
+    assert records.get('key')['request_id'] == 'retry'
+
+    # A claim whose generation still holds its lease is kept
+    store.put_blob('generations', 'retry', b'')
+    assert records.claim('key', FINGERPRINT, 'other', 'session-3')['request_id'] == 'retry'
+
+
+def test_generate_calls_replays_by_idempotency_key(client):
+    body = {'scenarios': ['patient_visit'], 'num_calls': 2, 'audio_settings': {'generate_audio': False},
+            'save_transcripts_locally': False}
+    headers = {'Idempotency-Key': 'order-42'}
+
+    first = client.post('/generate-calls', json=body, headers=headers)
+    assert first.status_code == 200 and 'Idempotent-Replayed' not in first.headers
+
+    replay = client.post('/generate-calls', json=body, headers=headers)
+    assert replay.status_code == 200 and replay.headers['Idempotent-Replayed'] == 'true'
+    assert replay.json()['session_id'] == first.json()['session_id']
+    assert replay.json()['calls'] == first.json()['calls']
+
+    conflict = client.post('/generate-calls', json={**body, 'num_calls': 3}, headers=headers)
+    assert conflict.status_code == 422
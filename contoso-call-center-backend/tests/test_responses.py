@@ -0,0 +1,52 @@
+"""
+Byte-range parsing for artifact responses.
+"""
+import pytest
+
+from app.responses import RangeNotSatisfiable, parse_range_header
+
+SIZE = 1266
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('bytes=0-9', (0, 9)),
+    ('bytes=5-', (5, SIZE - 1)),
+    ('bytes=-100', (SIZE - 100, SIZE - 1)),
+    ('bytes=-5000', (0, SIZE - 1)),
+    ('bytes=1000-5000', (1000, SIZE - 1)),
+    ('bytes=1265-1265', (1265, 1265)),
+    ('Bytes = 0-9 ', (0, 9))
+])
+def test_satisfiable_ranges(header, expected):
+    assert parse_range_header(header, SIZE) == expected
+
+
+@pytest.mark.parametrize('header', [
+    None,
+    '',
+    'bytes=100-50',
+    'bytes=0-9,20-29',
+    'bytes=-',
+    'bytes=abc-',
+    'bytes=--5',
+    'bytes=5',
+    'items=0-9'
+])
+def test_ignored_ranges_send_the_whole_representation(header):
+    assert parse_range_header(header, SIZE) is None
+
+
+@pytest.mark.parametrize('header', [
+    'bytes=-0',
+    f'bytes={SIZE}-',
+    'bytes=999999-',
+    f'bytes={SIZE}-{SIZE + 10}'
+])
+def test_unsatisfiable_ranges(header):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header(header, SIZE)
+
+
+def test_any_range_is_unsatisfiable_for_empty_content():
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header('bytes=0-', 0)
@@ -0,0 +1,49 @@
+"""
+Cursor paging and field projection on /sessions/{session_id}/calls.
+"""
+import base64
+import json
+
+import pytest
+
+BODY = {'scenarios': ['patient_visit', 'caregiver_inquiry'], 'num_calls': 5,
+        'audio_settings': {'generate_audio': False}, 'save_transcripts_locally': False}
+
+
+@pytest.fixture
+def session_id(client):
+    response = client.post('/generate-calls', json=BODY)
+    assert response.status_code == 200
+    return response.json()['session_id']
+
+
+def test_pages_through_a_session_with_a_cursor(client, session_id):
+    ids, cursor = [], None
+    while True:
+        params = {'limit': 2, 'fields': 'id,transcript_data.scenario'}
+        if cursor:
+            params['cursor'] = cursor
+        page = client.get(f'/sessions/{session_id}/calls', params=params).json()
+        assert page['total_calls'] == 5
+        assert all(set(call) == {'id', 'transcript_data'} and set(call['transcript_data']) == {'scenario'}
+                   for call in page['calls'])
+        ids += [call['id'] for call in page['calls']]
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    assert ids == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.parametrize('cursor', [
+    'not base64!',
+    base64.urlsafe_b64encode(json.dumps({'after': '2'}).encode('utf-8')).decode('ascii'),
+    base64.urlsafe_b64encode(json.dumps({'doc_id': 2}).encode('utf-8')).decode('ascii')
+])
+def test_malformed_cursor_is_a_client_error(client, session_id, cursor):
+    response = client.get(f'/sessions/{session_id}/calls', params={'cursor': cursor})
+    assert response.status_code == 400
+
+
+def test_unknown_session_and_field(client, session_id):
+    assert client.get('/sessions/missing/calls').status_code == 404
+    assert client.get(f'/sessions/{session_id}/calls', params={'fields': 'transcript_data.nope'}).status_code == 400
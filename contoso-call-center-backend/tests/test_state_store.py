@@ -0,0 +1,51 @@
+"""
+Session storage in the filesystem state store, including appended (bulk) sessions.
+"""
+import pytest
+
+from app.models import GeneratedCall, TranscriptData
+from app.services.state_store import FilesystemStateStore, MemoryStateStore
+
+
+def _call(call_id: int) -> GeneratedCall:
+    transcript = TranscriptData(transcript=f"Agent: Call {call_id}", scenario='patient_visit', sentiment='neutral',
+                                duration='short', participants=['Agent'], synthetic_data={}, metadata={})
+    return GeneratedCall(id=call_id, scenario='patient_visit', transcript_data=transcript)
+
+
+@pytest.fixture(params=['memory', 'filesystem'])
+def store(request, tmp_path):
+    return MemoryStateStore() if request.param == 'memory' else FilesystemStateStore(str(tmp_path))
+
+
+def test_put_session_round_trip(store):
+    store.put_session('session', [_call(1), _call(2), _call(3)])
+
+    assert [call.id for call in store.get_session('session')] == [1, 2, 3]
+    assert [call.id for call in store.iter_session('session', after=1)] == [2, 3]
+    assert store.count_session('session') == 3
+    assert store.session_call_ids('session') == {1, 2, 3}
+    assert store.get_session('missing') is None and store.iter_session('missing') is None
+
+
+def test_resumed_appended_session_is_read_in_id_order(tmp_path):
+    store = FilesystemStateStore(str(tmp_path))
+    # A bulk run that missed calls 2 and 5, then the resume that generated them
+    store.append_session('bulk', [_call(1), _call(3)])
+    store.append_session('bulk', [_call(4), _call(6)])
+    store.append_session('bulk', [_call(2), _call(5)])
+
+    assert store.session_call_ids('bulk') == {1, 2, 3, 4, 5, 6}
+    assert store.count_session('bulk') == 6
+    assert [call.id for call in store.iter_session('bulk')] == [1, 2, 3, 4, 5, 6]
+    assert [call.id for call in store.iter_session('bulk', after=3)] == [4, 5, 6]
+    assert [call.id for call in store.get_session('bulk')] == [1, 2, 3, 4, 5, 6]
+
+
+def test_line_still_being_appended_is_not_read(tmp_path):
+    store = FilesystemStateStore(str(tmp_path))
+    store.append_session('bulk', [_call(1)])
+    with open(tmp_path / 'sessions' / 'bulk.jsonl', 'ab') as f:
+        f.write(_call(2).model_dump_json().encode('utf-8')[:20])
+
+    assert [call.id for call in store.iter_session('bulk')] == [1]
@@ -90,6 +90,12 @@ def main():
                 index=0
             )
             
+            simulate_phone_line = st.checkbox("Simulate Phone Line (300-3400 Hz)", value=False)
+            if simulate_phone_line:
+                companding = st.selectbox("Companding", ["mu-law", "A-law", "None"], index=0)
+                packet_loss = st.slider("Packet Loss (%)", min_value=0, max_value=20, value=0)
+                jitter = st.slider("Jitter (% of late packets)", min_value=0, max_value=20, value=0)
+            
             st.info(f"""
             **Audio Specifications:**
             - Format: WAV (Microsoft PCM)
@@ -130,6 +136,12 @@ def main():
                     'sampling_rate': int(sampling_rate.split()[0]) * 1000,
                     'channels': 1 if 'Mono' in channels else 2
                 }
+                if simulate_phone_line:
+                    audio_settings['channel_simulation'] = {
+                        'companding': companding.replace('-', '').lower(),
+                        'packet_loss': packet_loss / 100,
+                        'jitter': jitter / 100
+                    }
                 audio_file = st.session_state.audio_gen.generate_audio(
                     transcript_data['transcript'],
                     audio_settings
@@ -243,10 +255,10 @@ Call Metadata:
     return zip_buffer.getvalue()
 
 def create_audio_zip(calls: List[Dict]) -> bytes:
-    """Create a ZIP file containing all audio files."""
+    """Create a ZIP file containing all audio files (stored, since PCM does not deflate)."""
     zip_buffer = io.BytesIO()
     
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_STORED) as zip_file:
         for call in calls:
             if call['audio_file']:
                 filename = f"call_{call['id']:03d}_audio.wav"
@@ -8,6 +8,8 @@ import tempfile
 import os
 from typing import Dict, Optional
 
+from channel_simulator import simulate_phone_line
+
 class AudioGenerator:
     def __init__(self):
         self.voice_settings = {
@@ -41,6 +43,9 @@ class AudioGenerator:
             
             final_audio = self._apply_audio_settings(combined_audio, audio_settings)
             
+            if audio_settings.get('channel_simulation'):
+                final_audio = self.simulate_phone_quality(final_audio, audio_settings['channel_simulation'])
+            
             return self._to_wav_bytes(final_audio, audio_settings)
             
         except Exception as e:
@@ -143,14 +148,6 @@ class AudioGenerator:
         
         return audio.overlay(noise, gain_during_overlay=-20)
     
-    def simulate_phone_quality(self, audio: AudioSegment) -> AudioSegment:
-        """Apply phone-like audio filtering."""
-        
-        
-        audio = audio.low_pass_filter(3400)
-        
-        audio = audio.high_pass_filter(300)
-        
-        audio = audio.compress_dynamic_range()
-        
-        return audio
+    def simulate_phone_quality(self, audio: AudioSegment, settings: Optional[Dict] = None) -> AudioSegment:
+        """Apply a telephone channel (band-pass, compression, companding, packet artifacts); see channel_simulator."""
+        return simulate_phone_line(audio, settings)